@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from playwright.async_api import BrowserContext, Route
+from loguru import logger
+
+# Static bundles worth caching; matched server-side so other requests never reach Python
+STATIC_ASSET_PATTERN = re.compile(r"^https?://[^?#]+\.(?:js|css|woff2?|ttf)(?:[?#].*)?$")
+
+# Headers describing the transfer rather than the content, the body we store is already decoded
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def _http_time(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str], max_age: float) -> float:
+    """Seconds a response stays fresh per its Cache-Control/Expires headers, at most max_age
+
+    Responses that say nothing about freshness get max_age.
+    """
+    cache_control = headers.get("cache-control", "")
+    if "no-cache" in cache_control:
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return min(max_age, float(match.group(1)))
+    if "expires" in headers:
+        # An invalid Expires means already expired
+        expires = _http_time(headers["expires"])
+        if expires is None:
+            return 0.0
+        date = _http_time(headers.get("date")) or time.time()
+        return max(0.0, min(max_age, expires - date))
+    return max_age
+
+
+class StaticAssetCache:
+    """Disk-backed cache for JD's static JS/CSS bundles, shared across contexts and runs
+
+    Installed through context.route, so every context (including ones recreated during
+    403 recovery and the mobile context) is served from the same cache. An entry is
+    served without asking the server while its response headers say it is fresh
+    (never longer than max_age seconds); a stale entry is revalidated with its ETag
+    or Last-Modified and refetched if it changed. Entries are evicted
+    least-recently-used once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age: float = 86400):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_path = self.directory / "index.json"
+        # key -> {"url", "status", "headers", "size", "fetched_at", "expires"}, least recently used first
+        self.index: "OrderedDict[str, Dict]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_stored = 0
+        self._load_index()
+
+    def _load_index(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            for key, entry in entries:
+                if (self.directory / key).exists():
+                    self.index[key] = entry
+                    self.total_bytes += entry["size"]
+        except Exception as e:
+            logger.warning(f"Could not load asset cache index: {str(e)}")
+
+    def save(self):
+        """Persist the index (in LRU order) for the next run"""
+        # Written aside and renamed, so an interrupted save leaves the previous index intact
+        tmp_path = self.directory / "index.json.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(list(self.index.items()), f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.warning(f"Could not save asset cache index: {str(e)}")
+
+    async def install(self, context: BrowserContext):
+        """Serve static assets of context from the cache"""
+        await context.route(STATIC_ASSET_PATTERN, self._handle)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    async def _handle(self, route: Route):
+        request = route.request
+        if request.method != "GET":
+            await route.fallback()
+            return
+
+        key = self._key(request.url)
+        entry = self.index.get(key)
+        if entry and time.time() < entry.get("expires", 0):
+            if await self._serve(route, key, entry):
+                self.hits += 1
+                return
+            entry = None
+
+        # Stale entries are checked with the server, which answers 304 if they are still current
+        validators = self._validators(entry) if entry else {}
+        try:
+            response = await route.fetch(headers={**request.headers, **validators} if validators else None)
+            if response.status == 304 and entry:
+                entry["headers"] = {**entry["headers"], **self._headers(response)}
+                self._set_freshness(entry)
+                if await self._serve(route, key, entry):
+                    self.revalidated += 1
+                    return
+                response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            # Let the browser load it normally (and report the error) if fetching fails here
+            await route.fallback()
+            return
+
+        self.misses += 1
+        headers = self._headers(response)
+        if response.status == 200 and "no-store" not in response.headers.get("cache-control", ""):
+            await self._store(key, request.url, headers, body)
+        await route.fulfill(status=response.status, headers=headers, body=body)
+
+    async def _serve(self, route: Route, key: str, entry: Dict) -> bool:
+        """Fulfill route from the stored body, False (and the entry evicted) if it is gone"""
+        try:
+            body = await asyncio.to_thread((self.directory / key).read_bytes)
+        except OSError:
+            self._evict(key)
+            return False
+        self.index.move_to_end(key)
+        self.bytes_served += len(body)
+        await route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+        return True
+
+    @staticmethod
+    def _headers(response) -> Dict[str, str]:
+        return {name: value for name, value in response.headers.items() if name.lower() not in _DROPPED_HEADERS}
+
+    @staticmethod
+    def _validators(entry: Dict) -> Dict[str, str]:
+        validators = {}
+        if "etag" in entry["headers"]:
+            validators["if-none-match"] = entry["headers"]["etag"]
+        if "last-modified" in entry["headers"]:
+            validators["if-modified-since"] = entry["headers"]["last-modified"]
+        return validators
+
+    def _set_freshness(self, entry: Dict):
+        entry["fetched_at"] = time.time()
+        entry["expires"] = entry["fetched_at"] + freshness_lifetime(entry["headers"], self.max_age)
+
+    async def _store(self, key: str, url: str, headers: Dict[str, str], body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        try:
+            await asyncio.to_thread((self.directory / key).write_bytes, body)
+        except OSError as e:
+            logger.debug("Could not cache {}: {}", url, e)
+            return
+        if key in self.index:
+            self.total_bytes -= self.index[key]["size"]
+        self.index[key] = {"url": url, "status": 200, "headers": headers, "size": len(body)}
+        self._set_freshness(self.index[key])
+        self.index.move_to_end(key)
+        self.total_bytes += len(body)
+        self.bytes_stored += len(body)
+        while self.total_bytes > self.max_bytes and self.index:
+            self._evict(next(iter(self.index)))
+
+    def _evict(self, key: str):
+        entry = self.index.pop(key, None)
+        if entry:
+            self.total_bytes -= entry["size"]
+        try:
+            os.remove(self.directory / key)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        """Cache effectiveness for the run report"""
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "bytes_served": self.bytes_served,
+            "bytes_stored": self.bytes_stored,
+            "entries": len(self.index),
+            "size_bytes": self.total_bytes,
+        }
@@ -0,0 +1,241 @@
+"""Search result extraction microbenchmark
+
+Loads synthetic search pages (benchmarks/synthetic_pages.py) into headless Chromium
+and times the buyer's SEARCH_EXTRACTION_SCRIPT against alternative implementations.
+Per variant and page size it reports the median time spent inside the page
+(performance.now() around the function) and the median round-trip of the
+page.evaluate() call the buyer makes, including serialization and, for the column
+variant, zipping the columns back into records in Python. Every variant's records
+are checked against the current script's.
+
+    python -m benchmarks.extraction
+    python -m benchmarks.extraction --items 30,1000,10000 --missing 0.2 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from playwright.async_api import Page, async_playwright
+from loguru import logger
+
+from benchmarks.synthetic_pages import generate_search_page
+from jd_buyer import SEARCH_EXTRACTION_SCRIPT
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# One querySelectorAll over the items and all their fields, walked in document order;
+# the first match of each field within an item wins, as with querySelector
+SINGLE_PASS_SCRIPT = """
+    () => {
+        const fields = [
+            ['price', '.p-price strong'],
+            ['name', '.p-name em'],
+            ['link', '.p-img a'],
+            ['comments', '.p-commit strong'],
+            ['shop', '.p-shop a'],
+        ];
+        const selector = ['.gl-item', ...fields.map(([, css]) => '.gl-item ' + css)].join(', ');
+        const records = [];
+        let found = null;
+        let item = null;
+        const flush = () => {
+            if (!item) return;
+            records.push({
+                id: item.getAttribute('data-sku') || '',
+                name: found.name ? found.name.innerText.trim() : '',
+                price: found.price ? parseFloat(found.price.innerText.replace('¥', '')) : 0,
+                link: found.link ? found.link.getAttribute('href') : '',
+                comments: found.comments ? found.comments.innerText.trim() : '0',
+                shop: found.shop ? found.shop.innerText.trim() : '',
+            });
+        };
+        for (const element of document.querySelectorAll(selector)) {
+            if (element.classList.contains('gl-item')) {
+                flush();
+                item = element;
+                found = {};
+                continue;
+            }
+            for (const [field, css] of fields) {
+                if (!found[field] && element.matches(css)) {
+                    found[field] = element;
+                    break;
+                }
+            }
+        }
+        flush();
+        return records;
+    }
+"""
+
+# Child combinators anchored at the item, so each lookup only walks the item's own layout
+SCOPE_SCRIPT = """
+    () => {
+        const items = Array.from(document.querySelectorAll('.gl-item'));
+        return items.map(item => {
+            const priceElement = item.querySelector(':scope > .gl-i-wrap > .p-price > strong');
+            const nameElement = item.querySelector(':scope > .gl-i-wrap > .p-name em');
+            const linkElement = item.querySelector(':scope > .gl-i-wrap > .p-img > a');
+            const commentElement = item.querySelector(':scope > .gl-i-wrap > .p-commit > strong');
+            const shopElement = item.querySelector(':scope > .gl-i-wrap > .p-shop a');
+
+            return {
+                id: item.getAttribute('data-sku') || '',
+                name: nameElement ? nameElement.innerText.trim() : '',
+                price: priceElement ? parseFloat(priceElement.innerText.replace('¥', '')) : 0,
+                link: linkElement ? linkElement.getAttribute('href') : '',
+                comments: commentElement ? commentElement.innerText.trim() : '0',
+                shop: shopElement ? shopElement.innerText.trim() : '',
+            };
+        });
+    }
+"""
+
+# textContent does not depend on layout, unlike innerText
+TEXT_CONTENT_SCRIPT = SEARCH_EXTRACTION_SCRIPT.replace('innerText', 'textContent')
+
+# One array per field instead of one object per item, zipped in Python
+COLUMNS_SCRIPT = """
+    () => {
+        const items = Array.from(document.querySelectorAll('.gl-item'));
+        const text = (item, css, fallback) => {
+            const element = item.querySelector(css);
+            return element ? element.innerText.trim() : fallback;
+        };
+        return {
+            id: items.map(item => item.getAttribute('data-sku') || ''),
+            name: items.map(item => text(item, '.p-name em', '')),
+            price: items.map(item => {
+                const element = item.querySelector('.p-price strong');
+                return element ? parseFloat(element.innerText.replace('¥', '')) : 0;
+            }),
+            link: items.map(item => {
+                const element = item.querySelector('.p-img a');
+                return element ? element.getAttribute('href') : '';
+            }),
+            comments: items.map(item => text(item, '.p-commit strong', '0')),
+            shop: items.map(item => text(item, '.p-shop a', '')),
+        };
+    }
+"""
+
+
+def rows_from_columns(columns: Dict[str, List]) -> List[Dict]:
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+# name -> (script, conversion of the evaluate() result into records)
+VARIANTS: Dict[str, tuple] = {
+    "current": (SEARCH_EXTRACTION_SCRIPT, None),
+    "single_pass": (SINGLE_PASS_SCRIPT, None),
+    "scope": (SCOPE_SCRIPT, None),
+    "text_content": (TEXT_CONTENT_SCRIPT, None),
+    "columns": (COLUMNS_SCRIPT, rows_from_columns),
+}
+
+# Runs a variant's source inside the page and returns only its duration, so that the
+# in-page time excludes serialization
+IN_PAGE_TIMER = """
+    (source) => {
+        const extract = eval('(' + source + ')');
+        const start = performance.now();
+        const result = extract();
+        const elapsed = performance.now() - start;
+        window.__extractionSink = result;
+        return elapsed;
+    }
+"""
+
+
+async def time_variant(page: Page, script: str, convert: Optional[Callable], repeat: int) -> Dict:
+    in_page, round_trip = [], []
+    records = None
+    for _ in range(repeat + 1):
+        in_page.append(await page.evaluate(IN_PAGE_TIMER, script))
+        start = time.perf_counter()
+        result = await page.evaluate(script)
+        records = convert(result) if convert else result
+        round_trip.append((time.perf_counter() - start) * 1000)
+    # The first repetition compiles the script and warms style caches
+    in_page, round_trip = in_page[1:], round_trip[1:]
+    return {
+        "in_page_ms": round(statistics.median(in_page), 3),
+        "round_trip_ms": round(statistics.median(round_trip), 3),
+        "payload_bytes": len(json.dumps(result, ensure_ascii=False).encode('utf-8')),
+        "records": records,
+    }
+
+
+async def run_benchmark(sizes: List[int], missing: float, repeat: int, variants: List[str], seed: int) -> Dict:
+    cells = []
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page()
+        try:
+            for size in sizes:
+                await page.set_content(generate_search_page(size, missing, seed=seed))
+                expected = None
+                for name in variants:
+                    script, convert = VARIANTS[name]
+                    logger.info(f"{size} items: {name}")
+                    cell = await time_variant(page, script, convert, repeat)
+                    records = cell.pop("records")
+                    if expected is None:
+                        expected = records
+                    cell.update({"items": size, "variant": name, "matches_current": records == expected})
+                    if not cell["matches_current"]:
+                        logger.warning(f"{name} returned different records than {variants[0]} on {size} items")
+                    cells.append(cell)
+        finally:
+            await browser.close()
+    return {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "missing_ratio": missing,
+        "repeat": repeat,
+        "seed": seed,
+        "cells": cells,
+    }
+
+
+def format_table(cells: List[Dict]) -> str:
+    rows = [["items", "variant", "in-page ms", "round-trip ms", "KB", "matches"]]
+    for cell in cells:
+        rows.append([str(cell["items"]), cell["variant"], f"{cell['in_page_ms']:.2f}", f"{cell['round_trip_ms']:.2f}",
+                     f"{cell['payload_bytes'] / 1024:.0f}", "yes" if cell["matches_current"] else "NO"])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search result extraction microbenchmark")
+    parser.add_argument("--items", default="30,300,1000,3000,10000", help="comma separated .gl-item counts")
+    parser.add_argument("--missing", type=float, default=0.1, help="probability each field is missing")
+    parser.add_argument("--repeat", type=int, default=15, help="timed repetitions per variant and size")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="comma separated variants, the first is the reference")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/extraction_<time>.json)")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.items.split(",") if size.strip()]
+    variants = [name.strip() for name in args.variants.split(",") if name.strip()]
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        parser.error(f"unknown variants: {', '.join(unknown)} (choose from {', '.join(VARIANTS)})")
+
+    results = asyncio.run(run_benchmark(sizes, args.missing, args.repeat, variants, args.seed))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"extraction_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(format_table(results["cells"]))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
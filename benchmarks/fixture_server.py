@@ -0,0 +1,329 @@
+"""Local stand-in for the JD pages the buyer touches
+
+Serves just enough of the homepage, search results, product, cart, order and
+login pages, plus the mobile search, product, cart and order pages (same
+selectors as the live site), the batch price/stock and cart select APIs, for the full
+JDAutoBuyer flow to run offline. Used by the benchmarks; start it with
+FixtureServer().start() and point the buyer at it with use_fixture_urls().
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+from config import config
+
+STATIC_JS = "/* fixture bundle */\n" + "var jdFixture = 1;\n" * 4000
+STATIC_CSS = "/* fixture styles */\n" + ".gl-item { margin: 0; }\n" * 2000
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/static/base.css"><script src="/static/base.js"></script></head>
+<body>
+<div id="shortcut"><a class="nickname" href="/">fixture_user</a>
+<a href="{base}/cart" id="settleup">我的购物车</a></div>
+{body}
+</body></html>"""
+
+# The mobile pages skip the desktop bundles and page chrome, like JD's own
+MOBILE_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width">
+<title>{title}</title><style>.search_prolist_item {{ padding: 4px; }}</style></head>
+<body>{body}</body></html>"""
+
+
+def product_record(sku: str) -> Dict:
+    """Deterministic name/price/stock for a SKU"""
+    rng = random.Random(sku)
+    return {
+        "id": sku,
+        "name": f"测试商品 {sku}",
+        "price": round(rng.uniform(5, 200), 2),
+        "comments": f"{rng.randint(0, 50)}万+",
+        "shop": f"测试店铺 {rng.randint(1, 20)}",
+        "in_stock": rng.random() > 0.1,
+    }
+
+
+class FixtureState:
+    """Server-side state shared by all handler threads"""
+
+    def __init__(self, items_per_page: int):
+        self.items_per_page = items_per_page
+        self.cart: Set[str] = set()
+        self.requests = 0
+        self.latency = 0.0  # seconds added to every response
+        self.lock = threading.Lock()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "JDFixture/1.0"
+
+    @property
+    def state(self) -> FixtureState:
+        return self.server.state
+
+    @property
+    def base(self) -> str:
+        return f"http://{self.headers.get('Host')}"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        with self.state.lock:
+            self.state.requests += 1
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode("utf-8") if length else ""
+            query.update({key: values[0] for key, values in parse_qs(body).items()})
+
+        path = parts.path
+        if path.startswith("/static/"):
+            return self._static(path)
+        if path.startswith("/item/"):
+            return self._item(path.rsplit("/", 1)[-1].split(".")[0])
+        if path.startswith("/m/item/"):
+            return self._mobile_item(path.rsplit("/", 1)[-1].split(".")[0])
+        handler = {
+            "/": self._homepage,
+            "/login": self._login,
+            "/search": self._search,
+            "/cart": self._cart,
+            "/cart/add": self._cart_add,
+            "/order": self._order,
+            "/m/search": self._mobile_search,
+            "/m/cart": self._mobile_cart,
+            "/m/order": self._mobile_order,
+            "/api": self._api,
+            "/prices/mgets": self._prices,
+            "/stocks": self._stocks,
+        }.get(path)
+        if handler is None:
+            return self._send(404, "text/plain", "not found")
+        return handler(query)
+
+    def _send(self, status: int, content_type: str, body: str, headers: Optional[Dict[str, str]] = None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _page(self, title: str, body: str):
+        self._send(200, "text/html", PAGE_TEMPLATE.format(title=title, base=self.base, body=body))
+
+    def _mobile_page(self, title: str, body: str):
+        self._send(200, "text/html", MOBILE_PAGE_TEMPLATE.format(title=title, body=body))
+
+    def _json(self, data):
+        self._send(200, "application/json", json.dumps(data, ensure_ascii=False))
+
+    def _static(self, path: str):
+        if path.endswith(".js"):
+            return self._send(200, "application/javascript", STATIC_JS, {"Cache-Control": "max-age=86400"})
+        return self._send(200, "text/css", STATIC_CSS, {"Cache-Control": "max-age=86400"})
+
+    def _homepage(self, query: Dict):
+        self._page("京东(JD.COM)-正品低价、品质保障、配送及时、轻松购物！", """
+<div class="search"><input id="key" type="text">
+<button class="button" onclick="location.href='/search?keyword=' + encodeURIComponent(document.getElementById('key').value)">搜索</button></div>
+<div class="content">""" + "<div class=\"floor\"><span>楼层</span><img alt=\"\"></div>" * 50 + "</div>")
+
+    def _login(self, query: Dict):
+        self._page("京东-欢迎登录", """
+<a href="#">账户登录</a><a href="#">扫码登录</a>
+<input id="loginname"><input id="nloginpwd" type="password">
+<a class="login-btn" href="/">登 录</a><div class="qrcode-img"><img alt="qr"></div>""")
+
+    def _search_skus(self, keyword: str):
+        base = 100000 + zlib.crc32(keyword.encode('utf-8')) % 100000 * 100
+        return [str(base + index) for index in range(self.state.items_per_page)]
+
+    def _search(self, query: Dict):
+        keyword = query.get("keyword", "")
+        items = []
+        for sku in self._search_skus(keyword):
+            record = product_record(sku)
+            items.append(f"""
+<li class="gl-item" data-sku="{sku}"><div class="gl-i-wrap">
+<div class="p-img"><a href="{self.base}/item/{sku}.html"><img alt=""></a></div>
+<div class="p-price"><strong><em>¥</em><i>{record['price']:.2f}</i></strong></div>
+<div class="p-name"><a href="{self.base}/item/{sku}.html"><em>{record['name']} {keyword}</em></a></div>
+<div class="p-commit"><strong><a>{record['comments']}</a>条评价</strong></div>
+<div class="p-shop"><a>{record['shop']}</a></div></div></li>""")
+        self._page(f"{keyword} - 商品搜索 - 京东", f"<ul class=\"gl-warp\">{''.join(items)}</ul>")
+
+    def _item(self, sku: str):
+        record = product_record(sku)
+        self._page(record["name"], f"""
+<div class="sku-name">{record['name']}</div><div class="p-price"><span class="price">{record['price']:.2f}</span></div>
+<div style="height: 2000px"></div>
+<a id="InitCartUrl" class="btn-special1 btn-lg" href="javascript:;"
+ onclick="fetch('/cart/add?sku={sku}').then(() => {{ const d = document.createElement('div'); d.className = 'dialog-wrap'; d.textContent = '已成功加入购物车'; document.body.appendChild(d); }})">加入购物车</a>""")
+
+    def _api(self, query: Dict):
+        if query.get("functionId") == "pcCart_jc_cartCheckAll":
+            return self._json({"success": bool(self.state.cart), "resultData": {"checkedCount": len(self.state.cart)}})
+        self._json({"success": False, "message": "unknown functionId"})
+
+    def _prices(self, query: Dict):
+        skus = [sku.replace("J_", "") for sku in query.get("skuIds", "").split(",") if sku]
+        self._json([
+            {"id": f"J_{sku}", "p": f"{product_record(sku)['price']:.2f}", "m": f"{product_record(sku)['price'] * 1.2:.2f}"}
+            for sku in skus
+        ])
+
+    def _stocks(self, query: Dict):
+        skus = [sku for sku in query.get("skuIds", "").split(",") if sku]
+        self._json({
+            sku: {"StockState": 33, "StockStateName": "现货"} if product_record(sku)["in_stock"]
+            else {"StockState": 34, "StockStateName": "无货"}
+            for sku in skus
+        })
+
+    def _cart_add(self, query: Dict):
+        with self.state.lock:
+            self.state.cart.add(query.get("sku", ""))
+        self._json({"success": True})
+
+    def _cart(self, query: Dict):
+        if not self.state.cart:
+            return self._page("我的购物车 - 京东商城", "<div class=\"cart-title\">全部商品</div><div class=\"empty-cart\">购物车空空的哦</div>")
+        rows = "".join(f"<div class=\"item-item\" data-sku=\"{sku}\">{product_record(sku)['name']}</div>" for sku in sorted(self.state.cart))
+        self._page("我的购物车 - 京东商城", f"""
+<div class="cart-title">全部商品</div><div class="cart-warp"><div class="cart-list">{rows}</div>
+<input class="jdcheckbox" type="checkbox" checked><a class="common-submit-btn" href="{self.base}/order">去结算</a></div>""")
+
+    def _order(self, query: Dict):
+        self._page("订单结算页 -京东商城", "<div class=\"order-summary\"></div><div class=\"order-submit\"><button class=\"btn-submit\">提交订单</button></div>")
+
+    def _mobile_search(self, query: Dict):
+        keyword = query.get("keyword", "")
+        items = []
+        for sku in self._search_skus(keyword):
+            record = product_record(sku)
+            items.append(f"""
+<div class="search_prolist_item" skuid="{sku}"><a href="{self.base}/m/item/{sku}.html">
+<div class="search_prolist_title">{record['name']} {keyword}</div>
+<div class="search_prolist_price"><em>¥</em><span>{record['price']:.2f}</span></div></a>
+<div class="search_prolist_other"><span class="comment">{record['comments']}条评价</span></div>
+<div class="search_prolist_shop">{record['shop']}</div></div>""")
+        self._mobile_page(f"{keyword} - 京东", f"<div id=\"itemList\">{''.join(items)}</div>")
+
+    def _mobile_item(self, sku: str):
+        record = product_record(sku)
+        self._mobile_page(record["name"], f"""
+<div class="title">{record['name']}</div><div class="price">{record['price']:.2f}</div>
+<a id="addCart2" href="javascript:;"
+ onclick="fetch('/cart/add?sku={sku}').then(() => {{ const d = document.createElement('div'); d.className = 'addcart-success'; d.textContent = '加入购物车成功'; document.body.appendChild(d); }})">加入购物车</a>""")
+
+    def _mobile_cart(self, query: Dict):
+        if not self.state.cart:
+            return self._mobile_page("购物车", "<div class=\"cart-empty\">购物车空空如也</div>")
+        rows = "".join(f"<div class=\"cart-item\" data-sku=\"{sku}\">{product_record(sku)['name']}</div>" for sku in sorted(self.state.cart))
+        self._mobile_page("购物车", f"<div class=\"shop-list\">{rows}</div><a class=\"btn-settle\" href=\"{self.base}/m/order\">去结算</a>")
+
+    def _mobile_order(self, query: Dict):
+        self._mobile_page("确认订单", "<div class=\"order\"></div><a id=\"pay-btn\" href=\"javascript:;\">提交订单</a>")
+
+
+class FixtureServer:
+    """Threaded HTTP server running the fixture pages in the background"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, items_per_page: int = 30):
+        self.httpd = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = FixtureState(items_per_page)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def state(self) -> FixtureState:
+        return self.httpd.state
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def use_fixture_urls(base_url: str):
+    """Point the buyer's URLs at a running fixture server"""
+    config.login_url = f"{base_url}/login"
+    config.homepage_url = f"{base_url}/"
+    config.cart_url = f"{base_url}/cart"
+    config.cart_select_api_url = f"{base_url}/api"
+    config.order_url = f"{base_url}/order"
+    config.item_url = f"{base_url}/item/{{sku}}.html"
+    config.search_url = f"{base_url}/search?keyword={{keyword}}"
+    config.mobile_search_url = f"{base_url}/m/search?keyword={{keyword}}"
+    config.mobile_item_url = f"{base_url}/m/item/{{sku}}.html"
+    config.mobile_cart_url = f"{base_url}/m/cart"
+    config.price_api_url = f"{base_url}/prices/mgets?type=1&skuIds={{skus}}"
+    config.stock_api_url = f"{base_url}/stocks?type=getstocks&skuIds={{skus}}&area={{area}}"
+    config.alternative_urls = {
+        "homepage": [f"{base_url}/"],
+        "cart": [f"{base_url}/cart"],
+        "mobile_cart": [f"{base_url}/cart"],
+    }
+    # The fixture has no rate limit to stay under; requests are still counted per host
+    config.rate_limit_hosts = {**config.rate_limit_hosts, urlsplit(base_url).hostname: [0, 1]}
+
+
+def isolate_buyer_files(workdir: Path):
+    """Run the buyer headless with every file it writes kept under workdir"""
+    config.headless = True
+    config.username = "fixture_user"
+    config.password = "fixture_password"
+    config.cookies_path = str(workdir / "cookies.json")
+    config.price_history_path = str(workdir / "price_history.db")
+    config.latency_stats_path = str(workdir / "latency_stats.json")
+    config.warmup_stats_path = str(workdir / "warmup_stats.json")
+    config.screenshots_dir = str(workdir / "screenshots")
+    config.reports_dir = str(workdir / "reports")
+    config.asset_cache = False
+    config.har_record_path = None
+    config.har_replay_path = None
+    Path(config.screenshots_dir).mkdir(parents=True, exist_ok=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the JD fixture pages")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--items", type=int, default=30, help="search results per page")
+    args = parser.parse_args()
+    server = FixtureServer(port=args.port, items_per_page=args.items)
+    print(f"Fixture server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
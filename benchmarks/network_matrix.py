@@ -0,0 +1,197 @@
+"""Run the full buying flow under a matrix of network and CPU conditions
+
+Every cell starts a fresh buyer, in its own empty working directory, against the
+local fixture server, throttles each page through CDP
+(Network.emulateNetworkConditions, Emulation.setCPUThrottlingRate) and times login,
+search, select, add_to_cart and checkout. Adaptive timeouts are off, so every cell
+runs with the configured ones. The buyer's timeout and retry counters are collected
+per cell, which shows where navigation_timeout, action_timeout and the retry loops
+start to dominate total latency.
+
+    python -m benchmarks.network_matrix
+    python -m benchmarks.network_matrix --network 4g,3g --cpu 1,4
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from playwright.async_api import BrowserContext, Page
+from loguru import logger
+
+from benchmarks.fixture_server import FixtureServer, isolate_buyer_files, use_fixture_urls
+from config import config
+from jd_buyer import JDAutoBuyer
+
+# name: (latency ms, download kbit/s, upload kbit/s); None throughput means unthrottled
+NETWORK_PROFILES: Dict[str, tuple] = {
+    "lan": (0, None, None),
+    "broadband": (20, 20000, 5000),
+    "4g": (85, 9000, 1500),
+    "3g": (562, 1440, 675),
+    "edge": (840, 240, 200),
+}
+
+CPU_RATES = [1, 4]
+
+PHASES = ["login", "search", "select", "add_to_cart", "checkout"]
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _throughput(kbps: Optional[int]) -> float:
+    """kbit/s to the bytes/s CDP expects, -1 disables throttling"""
+    return kbps * 1000 / 8 if kbps else -1
+
+
+class ThrottledBuyer(JDAutoBuyer):
+    """JDAutoBuyer whose pages all run under the given network and CPU conditions"""
+
+    def __init__(self, network: str, cpu_rate: float):
+        super().__init__()
+        self.network = network
+        self.cpu_rate = cpu_rate
+
+    async def _new_page(self, context: Optional[BrowserContext] = None) -> Page:
+        page = await super()._new_page(context)
+        latency, download, upload = NETWORK_PROFILES[self.network]
+        session = await page.context.new_cdp_session(page)
+        await session.send("Network.enable")
+        await session.send("Network.emulateNetworkConditions", {
+            "offline": False,
+            "latency": latency,
+            "downloadThroughput": _throughput(download),
+            "uploadThroughput": _throughput(upload),
+        })
+        if self.cpu_rate > 1:
+            await session.send("Emulation.setCPUThrottlingRate", {"rate": self.cpu_rate})
+        return page
+
+
+async def run_cell(server: FixtureServer, network: str, cpu_rate: float, keyword: str) -> Dict:
+    """One full flow under one network/CPU combination"""
+    server.state.cart.clear()
+    buyer = ThrottledBuyer(network, cpu_rate)
+    phases: Dict[str, Dict] = {}
+    started = time.perf_counter()
+    error = None
+
+    async def timed(name: str, coro):
+        phase_started = time.perf_counter()
+        result = await coro
+        phases[name] = {"seconds": round(time.perf_counter() - phase_started, 3), "ok": bool(result)}
+        return result
+
+    async def selected(products):
+        return buyer.select_product_by_strategy(products, config.product_selection_strategy)
+
+    try:
+        await buyer.setup()
+        if await timed("login", buyer.login()):
+            products = await timed("search", buyer.search_product(keyword))
+            product = await timed("select", selected(products))
+            if product and await timed("add_to_cart", buyer.add_to_cart(product)):
+                await timed("checkout", buyer.checkout())
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        logger.error(f"Cell {network}/cpu x{cpu_rate} failed: {error}")
+    finally:
+        await buyer.close()
+
+    counters = dict(buyer.metrics.counters)
+    return {
+        "network": network,
+        "cpu_rate": cpu_rate,
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "completed": all(phases.get(name, {}).get("ok") for name in PHASES),
+        "phases": phases,
+        "timeouts": {name: count for name, count in counters.items() if name.startswith("timeouts.")},
+        "retries": {name: count for name, count in counters.items() if name.startswith(("retries.", "recovery_403."))},
+        "deadline_exceeded": {name: count for name, count in counters.items() if name.startswith("deadline_exceeded.")},
+        "fixture_requests": server.state.requests,
+        "error": error,
+    }
+
+
+def format_table(cells: List[Dict]) -> str:
+    header = ["network", "cpu"] + PHASES + ["total", "timeouts", "retries", "done"]
+    rows = [header]
+    for cell in cells:
+        phase_times = [
+            f"{cell['phases'][name]['seconds']:.1f}" + ("" if cell['phases'][name]['ok'] else "!")
+            if name in cell['phases'] else "-"
+            for name in PHASES
+        ]
+        rows.append([
+            cell["network"], f"x{cell['cpu_rate']:g}", *phase_times, f"{cell['total_seconds']:.1f}",
+            str(sum(cell["timeouts"].values())), str(sum(cell["retries"].values())),
+            "yes" if cell["completed"] else "no",
+        ])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+async def run_matrix(networks: List[str], cpu_rates: List[float], keyword: str, items: int) -> Dict:
+    server = FixtureServer(items_per_page=items).start()
+    use_fixture_urls(server.base_url)
+    # Cells measure the configured timeouts, not ones learned from the cells before them
+    config.adaptive_timeouts = False
+    config.price_history = False
+    cells = []
+    try:
+        for network in networks:
+            for cpu_rate in cpu_rates:
+                logger.info(f"Running cell network={network} cpu=x{cpu_rate:g}")
+                server.state.requests = 0
+                # A fresh working directory per cell, so every cell logs in cold
+                with tempfile.TemporaryDirectory(prefix="jd_bench_") as workdir:
+                    isolate_buyer_files(Path(workdir))
+                    cells.append(await run_cell(server, network, cpu_rate, keyword))
+    finally:
+        server.stop()
+    return {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "settings": {
+            "navigation_timeout": config.navigation_timeout,
+            "action_timeout": config.action_timeout,
+            "retry_delay": config.retry_delay,
+            "max_retries": config.max_retries,
+            "adaptive_timeouts": config.adaptive_timeouts,
+        },
+        "profiles": {name: NETWORK_PROFILES[name] for name in networks},
+        "cells": cells,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Network/CPU condition benchmark matrix")
+    parser.add_argument("--network", default=",".join(NETWORK_PROFILES),
+                        help=f"comma separated network profiles ({', '.join(NETWORK_PROFILES)})")
+    parser.add_argument("--cpu", default=",".join(str(rate) for rate in CPU_RATES), help="comma separated CPU slowdown rates")
+    parser.add_argument("--keyword", default="零食")
+    parser.add_argument("--items", type=int, default=30, help="search results per fixture page")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/network_matrix_<time>.json)")
+    args = parser.parse_args()
+
+    networks = [name.strip() for name in args.network.split(",") if name.strip()]
+    unknown = [name for name in networks if name not in NETWORK_PROFILES]
+    if unknown:
+        parser.error(f"unknown network profile(s): {', '.join(unknown)}")
+    cpu_rates = [float(rate) for rate in args.cpu.split(",") if rate.strip()]
+
+    results = asyncio.run(run_matrix(networks, cpu_rates, args.keyword, args.items))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"network_matrix_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(format_table(results["cells"]))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
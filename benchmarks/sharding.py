@@ -0,0 +1,117 @@
+"""Sharded search scaling against the fixture server
+
+Searches the same keyword list with ShardCoordinator at increasing shard counts and
+reports wall time, keywords per minute, speedup and parallel efficiency against one
+shard, and the combined navigation rate of all shards. With --rate the fixture host
+gets a global budget (requests/s), which the shards split between them; the
+combined rate shows whether they stay within it.
+
+    python -m benchmarks.sharding
+    python -m benchmarks.sharding --shards 1,2,4,8 --keywords 48 --latency 100
+    python -m benchmarks.sharding --rate 4
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from benchmarks.fixture_server import FixtureServer, isolate_buyer_files, use_fixture_urls
+from config import config
+from sharding import ShardCoordinator
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def run_benchmark(shard_counts: List[int], keywords: List[str], latency_ms: float, rate: float, items: int) -> Dict:
+    server = FixtureServer(items_per_page=items).start()
+    server.state.latency = latency_ms / 1000
+    use_fixture_urls(server.base_url)
+    host = urlsplit(server.base_url).hostname
+    if rate:
+        config.rate_limit_hosts[host] = [rate, max(1, int(rate))]
+    cells = []
+    try:
+        for shards in shard_counts:
+            logger.info(f"{len(keywords)} keywords in {shards} shards")
+            server.state.requests = 0
+            # Nothing else navigates here, the shards get the whole budget
+            coordinator = ShardCoordinator(keywords, shards, parent_share=False)
+            # Every cell starts cold: no cookies, learned latencies or warm-up stats from the last one
+            with tempfile.TemporaryDirectory(prefix="jd_bench_") as workdir:
+                isolate_buyer_files(Path(workdir))
+                coordinator.run()
+            stats = coordinator.stats()
+            navigations = sum(
+                (shard["rate_limit"] or {}).get(host, {}).get("requests", 0) for shard in stats["per_shard"]
+            )
+            search_seconds = stats["seconds"] - (stats["first_result_seconds"] or 0)
+            cells.append({
+                "shards": stats["shards"],
+                "seconds": stats["seconds"],
+                "first_result_seconds": stats["first_result_seconds"],
+                "keywords_per_minute": stats["keywords_per_minute"],
+                "keywords_searched": stats["candidates"]["keywords"],
+                "navigations": navigations,
+                "navigations_per_second": round(navigations / search_seconds, 2) if search_seconds > 0 else None,
+                "server_requests": server.state.requests,
+                "errors": [shard["error"] for shard in stats["per_shard"] if shard["error"]],
+            })
+    finally:
+        server.stop()
+    baseline = next((cell for cell in cells if cell["shards"] == 1), None)
+    for cell in cells:
+        if baseline and cell["seconds"]:
+            cell["speedup"] = round(baseline["seconds"] / cell["seconds"], 2)
+            cell["efficiency"] = round(cell["speedup"] / cell["shards"], 2)
+    return {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "cpu_count": os.cpu_count(),
+        "keywords": len(keywords),
+        "latency_ms": latency_ms,
+        "global_rate": rate or None,
+        "cells": cells,
+    }
+
+
+def format_table(cells: List[Dict]) -> str:
+    rows = [["shards", "seconds", "kw/min", "speedup", "efficiency", "nav/s", "errors"]]
+    for cell in cells:
+        rows.append([str(cell["shards"]), f"{cell['seconds']:.1f}", f"{cell['keywords_per_minute'] or 0:.1f}",
+                     f"{cell.get('speedup', 0):.2f}", f"{cell.get('efficiency', 0):.2f}",
+                     f"{cell['navigations_per_second'] or 0:.2f}", str(len(cell["errors"]))])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded search scaling benchmark")
+    default_shards = ",".join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)) or "1"
+    parser.add_argument("--shards", default=default_shards, help="comma separated shard counts, include 1 for the baseline")
+    parser.add_argument("--keywords", type=int, default=24, help="number of keywords to search")
+    parser.add_argument("--latency", type=float, default=50, help="added server latency per request (ms)")
+    parser.add_argument("--rate", type=float, default=0, help="global navigation budget for the fixture host (requests/s, 0 = unlimited)")
+    parser.add_argument("--items", type=int, default=30, help="search results per fixture page")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/sharding_<time>.json)")
+    args = parser.parse_args()
+    shard_counts = [int(count) for count in args.shards.split(",") if count.strip()]
+    keywords = [f"零食{index}" for index in range(args.keywords)]
+
+    results = run_benchmark(shard_counts, keywords, args.latency, args.rate, args.items)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"sharding_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(format_table(results["cells"]))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
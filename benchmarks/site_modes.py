@@ -0,0 +1,166 @@
+"""Compare the desktop and mobile site modes
+
+Runs search, add_to_cart and navigate_to_cart in each site mode against the local
+fixture server (or the live site with --live) and reports, per step, the
+end-to-end latency, the bytes received by the browser (CDP Network.loadingFinished)
+and the DOM size of the resulting page. Medians over --runs repetitions.
+
+    python -m benchmarks.site_modes
+    python -m benchmarks.site_modes --runs 5 --keyword 牛奶
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from playwright.async_api import BrowserContext, Page
+from loguru import logger
+
+from benchmarks.fixture_server import FixtureServer, isolate_buyer_files, use_fixture_urls
+from config import config
+from jd_buyer import JDAutoBuyer
+
+MODES = ["desktop", "mobile"]
+
+STEPS = ["search", "add_to_cart", "navigate_to_cart"]
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+class MeasuredBuyer(JDAutoBuyer):
+    """JDAutoBuyer that counts the bytes and requests every page receives"""
+
+    def __init__(self):
+        super().__init__()
+        self.received_bytes = 0
+        self.requests = 0
+
+    async def _new_page(self, context: Optional[BrowserContext] = None) -> Page:
+        page = await super()._new_page(context)
+        session = await page.context.new_cdp_session(page)
+        session.on("Network.loadingFinished", self._on_loading_finished)
+        await session.send("Network.enable")
+        return page
+
+    def _on_loading_finished(self, params: Dict):
+        self.received_bytes += params.get("encodedDataLength", 0)
+        self.requests += 1
+
+
+async def run_mode(mode: str, keyword: str, live: bool) -> Dict:
+    """One pass of the steps in one site mode"""
+    config.site_mode = mode
+    buyer = MeasuredBuyer()
+    steps: Dict[str, Dict] = {}
+    error = None
+
+    async def measured(name: str, coro):
+        bytes_before, requests_before = buyer.received_bytes, buyer.requests
+        started = time.perf_counter()
+        result = await coro
+        page = await buyer._site_page()
+        steps[name] = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "bytes": buyer.received_bytes - bytes_before,
+            "requests": buyer.requests - requests_before,
+            "dom_nodes": await page.evaluate("document.getElementsByTagName('*').length"),
+            "ok": bool(result),
+        }
+        return result
+
+    try:
+        await buyer.setup()
+        # The live cart needs a session; without one only the search is compared
+        if live or await buyer.login():
+            products = await measured("search", buyer.search_product(keyword))
+            product = buyer.select_product_by_strategy(products, 'first')
+            if product and not live and await measured("add_to_cart", buyer.add_to_cart(product)):
+                await measured("navigate_to_cart", buyer.navigate_to_cart())
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        logger.error(f"{mode} run failed: {error}")
+    finally:
+        await buyer.close()
+    return {"steps": steps, "error": error}
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    """Median of every step metric over the successful runs"""
+    summary = {}
+    for step in STEPS:
+        samples = [run["steps"][step] for run in runs if run["steps"].get(step, {}).get("ok")]
+        if samples:
+            summary[step] = {
+                key: round(statistics.median(sample[key] for sample in samples), 3)
+                for key in ("seconds", "bytes", "requests", "dom_nodes")
+            }
+            summary[step]["runs"] = len(samples)
+    return summary
+
+
+def format_table(results: Dict[str, Dict]) -> str:
+    rows = [["step", "mode", "seconds", "KB", "requests", "DOM nodes"]]
+    for step in STEPS:
+        for mode, summary in results.items():
+            if step in summary:
+                row = summary[step]
+                rows.append([step, mode, f"{row['seconds']:.2f}", f"{row['bytes'] / 1024:.0f}",
+                             f"{row['requests']:.0f}", f"{row['dom_nodes']:.0f}"])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+
+
+async def run_benchmark(runs: int, keyword: str, live: bool, items: int) -> Dict:
+    server = None
+    if not live:
+        server = FixtureServer(items_per_page=items).start()
+        use_fixture_urls(server.base_url)
+    raw: Dict[str, List[Dict]] = {mode: [] for mode in MODES}
+    try:
+        for index in range(runs):
+            # Alternate the order so neither mode always runs first
+            for mode in (MODES if index % 2 == 0 else list(reversed(MODES))):
+                if server:
+                    server.state.cart.clear()
+                logger.info(f"Run {index + 1}/{runs}: {mode}")
+                raw[mode].append(await run_mode(mode, keyword, live))
+    finally:
+        if server:
+            server.stop()
+    return {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "target": "live" if live else "fixture",
+        "keyword": keyword,
+        "summary": {mode: summarize(mode_runs) for mode, mode_runs in raw.items()},
+        "runs": raw,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Desktop vs mobile site mode benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--keyword", default="零食")
+    parser.add_argument("--items", type=int, default=30, help="search results per fixture page")
+    parser.add_argument("--live", action="store_true", help="search the live site instead of the fixture (search step only)")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/site_modes_<time>.json)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="jd_bench_") as workdir:
+        isolate_buyer_files(Path(workdir))
+        results = asyncio.run(run_benchmark(args.runs, args.keyword, args.live, args.items))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"site_modes_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(format_table(results["summary"]))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
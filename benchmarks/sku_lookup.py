@@ -0,0 +1,63 @@
+"""Batched price/stock lookup against the fixture endpoints
+
+Looks up increasing numbers of SKUs through SkuLookup and reports wall time and
+the number of HTTP requests, against the fixture server's stand-in endpoints
+(optionally throttled with --latency ms added per request).
+
+    python -m benchmarks.sku_lookup
+    python -m benchmarks.sku_lookup --counts 50,500 --latency 100
+"""
+import argparse
+import asyncio
+import time
+
+from playwright.async_api import async_playwright
+
+from benchmarks.fixture_server import FixtureServer, use_fixture_urls
+from config import config
+from sku_lookup import SkuLookup
+
+
+async def run(counts, latency_ms: float):
+    server = FixtureServer().start()
+    server.state.latency = latency_ms / 1000
+    use_fixture_urls(server.base_url)
+    rows = []
+    try:
+        async with async_playwright() as playwright:
+            request = await playwright.request.new_context()
+            for count in counts:
+                lookup = SkuLookup(
+                    config.price_api_url,
+                    config.stock_api_url,
+                    area=config.stock_area,
+                    chunk_size=config.sku_lookup_chunk_size,
+                    concurrency=config.sku_lookup_concurrency
+                )
+                skus = [str(100000 + index) for index in range(count)]
+                start = time.perf_counter()
+                results = await lookup.lookup(request, skus)
+                elapsed = time.perf_counter() - start
+                priced = sum(1 for entry in results.values() if entry["price"] is not None)
+                rows.append((count, lookup.requests, elapsed, priced))
+            await request.dispose()
+    finally:
+        server.stop()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched SKU price/stock lookup benchmark")
+    parser.add_argument("--counts", default="1,10,50,200,1000", help="comma separated SKU counts")
+    parser.add_argument("--latency", type=float, default=50, help="added server latency per request (ms)")
+    args = parser.parse_args()
+    counts = [int(count) for count in args.counts.split(",") if count.strip()]
+
+    rows = asyncio.run(run(counts, args.latency))
+    print(f"{'skus':>6}  {'requests':>8}  {'seconds':>8}  {'priced':>6}")
+    for count, requests, elapsed, priced in rows:
+        print(f"{count:>6}  {requests:>8}  {elapsed:>8.3f}  {priced:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Synthetic JD-style desktop search result pages
+
+generate_search_page() builds a results page with any number of .gl-item entries
+using the live site's markup (including the icon and promo noise around the fields
+the buyer extracts). A share of the fields can be left out to exercise the
+extraction's missing-field handling.
+
+    python -m benchmarks.synthetic_pages --items 5000 --missing 0.1 -o page.html
+"""
+import argparse
+import random
+from typing import Optional
+
+ITEM_TEMPLATE = """<li class="gl-item" data-sku="{sku}" data-spu="{spu}" ware-type="10"><div class="gl-i-wrap">
+{img_html}
+<div class="p-scroll"><span class="ps-prev">&lt;</span><div class="ps-wrap"><ul class="ps-main">{thumbs}</ul></div><span class="ps-next">&gt;</span></div>
+{price_html}
+{name_html}
+{commit_html}
+{shop_html}
+<div class="p-icons" id="J_pro_{sku}"><i class="goods-icons J-picon-tips J-picon-fix" data-tips="京东自营">自营</i><i class="goods-icons4 J-picon-tips">{promo}</i></div>
+<div class="p-operate"><a class="p-o-btn contrast J_contrast" data-sku="{sku}" href="javascript:;"><i></i>对比</a><a class="p-o-btn focus J_focus" data-sku="{sku}" href="javascript:;"><i></i>关注</a><a class="p-o-btn addcart" href="//cart.jd.com/gate.action?pid={sku}&amp;pcount=1&amp;ptype=1"><i></i>加入购物车</a></div>
+</div></li>"""
+
+FIELDS = {
+    "img": '<div class="p-img"><a target="_blank" title="{name}" href="//item.jd.com/{sku}.html"><img width="220" height="220" data-img="1" src="//img14.360buyimg.com/n7/jfs/t1/{sku}.jpg"></a></div>',
+    "price": '<div class="p-price"><strong class="J_{sku}" data-done="1"><em>¥</em><i data-price="{sku}">{price:.2f}</i></strong></div>',
+    "name": '<div class="p-name p-name-type-2"><a target="_blank" title="{name}" href="//item.jd.com/{sku}.html"><em>{name}</em><i class="promo-words" id="J_AD_{sku}">{promo}</i></a></div>',
+    "commit": '<div class="p-commit"><strong><a id="J_comment_{sku}" target="_blank" href="//item.jd.com/{sku}.html#comment">{comments}</a>条评价</strong></div>',
+    "shop": '<div class="p-shop" data-selfware="1" data-score="5"><span class="J_im_icon"><a target="_blank" class="curr-shop hd-shopname" title="{shop}" href="//mall.jd.com/index-{shop_id}.html">{shop}</a></span></div>',
+}
+
+WORDS = ["进口", "新鲜", "有机", "坚果", "零食", "礼盒", "家庭装", "原味", "低糖", "每日", "混合", "大包装", "特产", "休闲", "早餐"]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{keyword} - 商品搜索 - 京东</title></head>
+<body><div id="J_searchWrap"><div id="J_goodsList" class="goods-list-v2 gl-type-1 J-goods-list"><ul class="gl-warp clearfix">
+{items}
+</ul></div></div></body></html>"""
+
+
+def generate_item(rng: random.Random, index: int, missing_ratio: float) -> str:
+    sku = 100000000 + index
+    values = {
+        "sku": sku,
+        "spu": sku - index % 7,
+        "name": " ".join(rng.sample(WORDS, 4)) + f" {rng.randint(100, 999)}g",
+        "price": rng.uniform(1, 500),
+        "comments": f"{rng.randint(1, 99)}{rng.choice(['万+', '000+', '+'])}",
+        "shop": f"{rng.choice(WORDS)}旗舰店",
+        "shop_id": rng.randint(1000, 99999),
+        "promo": rng.choice(["满99减10", "新品", "限时特惠", "放心购"]),
+    }
+    parts = {
+        f"{field}_html": "" if rng.random() < missing_ratio else template.format(**values)
+        for field, template in FIELDS.items()
+    }
+    thumbs = "".join(f'<li class="ps-item"><a href="javascript:;"><img width="25" height="25" data-sku="{sku + n}"></a></li>' for n in range(3))
+    return ITEM_TEMPLATE.format(thumbs=thumbs, **parts, **values)
+
+
+def generate_search_page(items: int, missing_ratio: float = 0.0, keyword: str = "零食", seed: Optional[int] = 0) -> str:
+    """HTML of a search results page with items .gl-item entries
+
+    Every extracted field (image link, price, name, comments, shop) is independently
+    left out with probability missing_ratio. The same seed gives the same page.
+    """
+    rng = random.Random(seed)
+    return PAGE_TEMPLATE.format(
+        keyword=keyword,
+        items="\n".join(generate_item(rng, index, missing_ratio) for index in range(items))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic JD search results page")
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--missing", type=float, default=0.0, help="probability each field is missing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="search_page.html")
+    args = parser.parse_args()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(generate_search_page(args.items, args.missing, seed=args.seed))
+    print(f"Wrote {args.items} items to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
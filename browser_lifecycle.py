@@ -0,0 +1,158 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Set
+
+from playwright.async_api import Browser, BrowserContext, Page
+from loguru import logger
+
+
+def _process_tree_rss_mb(root_pid: int) -> Optional[float]:
+    """Total RSS of root_pid's descendants (Playwright driver and Chromium), Linux only"""
+    if not os.path.isdir("/proc"):
+        return None
+    children: Dict[int, list] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # The command name may contain spaces, fields after it are fixed
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total_kb = 0
+    pending = list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status", 'r') as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class BrowserResources:
+    """Central accounting for every browser context and page
+
+    Caps the number of open pages, samples the browser's memory and tells the
+    buyer when a context should be recycled (RSS or navigation-count watermark).
+    """
+
+    def __init__(self, max_pages: int, rss_limit_mb: float, max_navigations: int, rss_sample_interval: float):
+        self.max_pages = max_pages
+        self.rss_limit_mb = rss_limit_mb
+        self.max_navigations = max_navigations
+        self.rss_sample_interval = rss_sample_interval
+        self.contexts: Set[BrowserContext] = set()
+        self.pages: Set[Page] = set()
+        # Slots taken by new_page() calls whose page is not open yet
+        self._pending_pages = 0
+        self._page_closed = asyncio.Condition()
+        self.navigations = 0  # since the last recycle
+        self.contexts_created = 0
+        self.pages_created = 0
+        self.peak_pages = 0
+        self.recycles = 0
+        self.last_rss_mb: Optional[float] = None
+        self.peak_rss_mb: Optional[float] = None
+        self._last_rss_sample = 0.0
+
+    async def new_context(self, browser: Browser, **options) -> BrowserContext:
+        """Create a tracked context; every page it opens is tracked too"""
+        context = await browser.new_context(**options)
+        self.contexts.add(context)
+        self.contexts_created += 1
+        context.on("page", self._track_page)
+        context.on("close", lambda ctx: self.contexts.discard(ctx))
+        return context
+
+    async def new_page(self, context: BrowserContext) -> Page:
+        """Open a page, waiting while the open-page limit is reached"""
+        async with self._page_closed:
+            await self._page_closed.wait_for(lambda: len(self.pages) + self._pending_pages < self.max_pages)
+            # Reserved before the lock is released, so concurrent callers cannot all take the last slot
+            self._pending_pages += 1
+        try:
+            page = await context.new_page()
+        except BaseException:
+            self._pending_pages -= 1
+            asyncio.ensure_future(self._notify_page_closed())
+            raise
+        # Tracked here as well in case the "page" event has not been handled yet
+        self._track_page(page)
+        self._pending_pages -= 1
+        return page
+
+    def _track_page(self, page: Page):
+        if page in self.pages or page.is_closed():
+            return
+        self.pages.add(page)
+        self.pages_created += 1
+        self.peak_pages = max(self.peak_pages, len(self.pages))
+        page.on("close", self._untrack_page)
+
+    def _untrack_page(self, page: Page):
+        self.pages.discard(page)
+        asyncio.ensure_future(self._notify_page_closed())
+
+    async def _notify_page_closed(self):
+        async with self._page_closed:
+            self._page_closed.notify_all()
+
+    def count_navigation(self):
+        self.navigations += 1
+
+    async def sample_rss(self) -> Optional[float]:
+        """Sample browser RSS, at most once per rss_sample_interval"""
+        now = time.monotonic()
+        if now - self._last_rss_sample >= self.rss_sample_interval:
+            self._last_rss_sample = now
+            self.last_rss_mb = await asyncio.to_thread(_process_tree_rss_mb, os.getpid())
+            if self.last_rss_mb is not None:
+                self.peak_rss_mb = max(self.peak_rss_mb or 0, self.last_rss_mb)
+        return self.last_rss_mb
+
+    async def recycle_reason(self) -> Optional[str]:
+        """Why the main context should be recycled now, or None"""
+        if self.max_navigations and self.navigations >= self.max_navigations:
+            return f"{self.navigations} navigations"
+        if self.rss_limit_mb:
+            rss = await self.sample_rss()
+            if rss is not None and rss >= self.rss_limit_mb:
+                return f"browser RSS {rss:.0f} MB"
+        return None
+
+    def recycled(self):
+        self.recycles += 1
+        self.navigations = 0
+        # Force a fresh sample after the old context is gone
+        self._last_rss_sample = 0.0
+
+    async def close_all(self):
+        """Close every context still open"""
+        for context in list(self.contexts):
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug("Error closing context: {}", e)
+        self.contexts.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "open_contexts": len(self.contexts),
+            "open_pages": len(self.pages),
+            "contexts_created": self.contexts_created,
+            "pages_created": self.pages_created,
+            "peak_pages": self.peak_pages,
+            "recycles": self.recycles,
+            "last_rss_mb": round(self.last_rss_mb, 1) if self.last_rss_mb is not None else None,
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+        }
@@ -48,12 +48,78 @@ class JDConfig(BaseModel):
     # Shopping settings
     search_keywords: List[str] = []
     max_price: Optional[float] = None
+    product_selection_strategy: str = os.getenv('PRODUCT_SELECTION_STRATEGY', 'price_low')
+    
+    # Run search -> select -> add to cart -> checkout preparation for search_keywords after login
+    auto_purchase: bool = os.getenv('AUTO_PURCHASE', 'False').lower() == 'true'
+    prepare_checkout: bool = True
+    pipeline_search_workers: int = int(os.getenv('PIPELINE_SEARCH_WORKERS', '2'))
+    pipeline_cart_workers: int = 1
+    pipeline_queue_size: int = 4
+    
+    # Run journal: completed pipeline stages, so a crashed run resumes where it stopped
+    # (--fresh starts over); records are fsynced in batches, cart confirmations at once.
+    # A journal started more than run_journal_max_age seconds ago is not resumed,
+    # its search results and selections are out of date by then
+    run_journal: bool = os.getenv('RUN_JOURNAL', 'True').lower() == 'true'
+    run_journal_path: str = str(Path(__file__).parent / "run_journal.jsonl")
+    run_journal_max_age: float = float(os.getenv('RUN_JOURNAL_MAX_AGE', '3600'))
+    run_journal_flush_interval: float = 0.5  # seconds
+    run_journal_batch_size: int = 20
+    resume_run: bool = True  # set from the --fresh command line option
+    
+    # Watch mode (--watch): SKUs and keywords ("sku[:target price]", "keyword[:target price]")
+    # re-checked with per-item intervals between watch_min_interval and watch_max_interval
+    # seconds, within a global request budget; a search page load counts as watch_search_cost
+    watch_items: List[str] = [item for item in os.getenv('WATCH_ITEMS', '').split(',') if item.strip()]
+    watch_interval: float = 60
+    watch_min_interval: float = 15
+    watch_max_interval: float = 600
+    watch_requests_per_minute: float = float(os.getenv('WATCH_REQUESTS_PER_MINUTE', '20'))
+    watch_search_cost: float = 10
+    watch_max_purchases: int = 1  # stop watching after this many items were added to the cart
+    watch_duration: float = float(os.getenv('WATCH_DURATION', '0'))  # seconds, 0 = until stopped
+    
+    # Scheduled purchase (--at/--sku): seconds before the target time to prepare the
+    # session, product and cart pages, and to refresh the product page once more
+    schedule_prepare_before: float = float(os.getenv('SCHEDULE_PREPARE_BEFORE', '120'))
+    schedule_refresh_before: float = 15
+    
+    # Price history of every search result, used by the historical_low strategy
+    price_history: bool = os.getenv('PRICE_HISTORY', 'True').lower() == 'true'
+    price_history_path: str = str(Path(__file__).parent / "price_history.db")
+    price_history_days: int = int(os.getenv('PRICE_HISTORY_DAYS', '30'))
     
     # URLs
     login_url: str = "https://passport.jd.com/login.aspx"
     homepage_url: str = "https://www.jd.com/"
     cart_url: str = "https://cart.jd.com/cart.action"
     
+    item_url: str = "https://item.jd.com/{sku}.html"
+    # Where the homepage search box submits to (reached by a click, not a navigation)
+    search_url: str = "https://search.jd.com/Search?keyword={keyword}"
+    
+    # Site mode: "desktop", or "mobile" to search, open products and use the cart through
+    # JD's much lighter mobile pages (login stays on the desktop site)
+    site_mode: str = os.getenv('SITE_MODE', 'desktop')
+    mobile_search_url: str = "https://so.m.jd.com/ware/search.action?keyword={keyword}"
+    mobile_item_url: str = "https://item.m.jd.com/product/{sku}.html"
+    mobile_cart_url: str = "https://p.m.jd.com/cart/cart.action"
+    
+    # Batch price/stock endpoints used by lookup_skus ({skus} is a comma separated list)
+    price_api_url: str = "https://p.3.cn/prices/mgets?type=1&skuIds={skus}"
+    stock_api_url: str = "https://c0.3.cn/stocks?type=getstocks&skuIds={skus}&area={area}"
+    stock_area: str = os.getenv('STOCK_AREA', '1_72_2799_0')  # province_city_district_town, default Beijing
+    sku_lookup_chunk_size: int = 50
+    sku_lookup_concurrency: int = 4
+    
+    # Checkout fast path: select all cart items through the cart API and open the
+    # settlement page directly after a confirmed add to cart (cart page flow as fallback)
+    checkout_fast_path: bool = os.getenv('CHECKOUT_FAST_PATH', 'True').lower() == 'true'
+    cart_select_api_url: str = "https://api.m.jd.com/api"
+    cart_select_function: str = "pcCart_jc_cartCheckAll"
+    order_url: str = "https://trade.jd.com/shopping/order/getOrderInfo.action"
+    
     # Alternative URLs to try if main ones fail
     alternative_urls: Dict[str, List[str]] = {
         "homepage": [
@@ -80,20 +146,117 @@ class JDConfig(BaseModel):
     
     # File paths
     cookies_path: str = str(Path(__file__).parent / "cookies.json")
+    cookie_save_debounce: float = 2.0  # seconds to coalesce cookie updates before writing
     screenshots_dir: str = str(Path(__file__).parent / "screenshots")
+    reports_dir: str = str(Path(__file__).parent / "reports")
     
     # Retry settings
     max_retries: int = 5  # Increased from 3
     retry_delay: int = 2  # seconds
     wait_after_navigation: int = 2  # seconds
     
+    # Per-host token buckets (requests/s, burst) every navigation and API request waits
+    # on; hosts entries apply to the host and its subdomains, a rate of 0 is unlimited
+    rate_limit: bool = os.getenv('RATE_LIMIT', 'True').lower() == 'true'
+    rate_limit_per_second: float = float(os.getenv('RATE_LIMIT_PER_SECOND', '1.0'))
+    rate_limit_burst: int = int(os.getenv('RATE_LIMIT_BURST', '3'))
+    rate_limit_hosts: Dict[str, List[float]] = {
+        "search.jd.com": [0.5, 2],
+        "p.3.cn": [4.0, 8],
+        "c0.3.cn": [4.0, 8],
+        "api.m.jd.com": [2.0, 4],
+    }
+    
     # Timeouts (in milliseconds)
     navigation_timeout: int = 30000
     action_timeout: int = 15000
+    search_results_timeout: int = 30000
+    
+    # Adaptive timeouts: p99 of observed latency per URL class x factor, clamped to floor/ceiling (ms)
+    adaptive_timeouts: bool = os.getenv('ADAPTIVE_TIMEOUTS', 'True').lower() == 'true'
+    adaptive_timeout_factor: float = 3.0
+    adaptive_timeout_floor: int = 2000
+    adaptive_timeout_ceiling: int = 60000
+    adaptive_timeout_min_samples: int = 5
+    latency_stats_path: str = str(Path(__file__).parent / "latency_stats.json")
+    
+    # Persistent cache for static JS/CSS bundles, shared across contexts and runs.
+    # Note that request interception disables Chromium's own HTTP cache. Entries are
+    # fresh for as long as their Cache-Control/Expires allow, at most asset_cache_max_age
+    # seconds, and revalidated with the server after that
+    asset_cache: bool = os.getenv('ASSET_CACHE', 'False').lower() == 'true'
+    asset_cache_dir: str = str(Path(__file__).parent / "cache" / "assets")
+    asset_cache_max_mb: int = int(os.getenv('ASSET_CACHE_MAX_MB', '200'))
+    asset_cache_max_age: int = int(os.getenv('ASSET_CACHE_MAX_AGE', '86400'))
+    
+    # Time budgets (in seconds) for a whole run and for each operation, 0 disables
+    run_budget: float = float(os.getenv('RUN_BUDGET', '900'))
+    operation_budgets: Dict[str, float] = {
+        "login": 200,
+        "search_product": 90,
+        "add_to_cart": 150,
+        "navigate_to_cart": 180,
+        "checkout": 240
+    }
+    
+    # Warm-up after setup: preconnect to the hosts the flow needs and prime the HTTP
+    # cache with the most used bundles of previous runs, within warmup_budget seconds
+    warmup: bool = os.getenv('WARMUP', 'False').lower() == 'true'
+    warmup_budget: float = float(os.getenv('WARMUP_BUDGET', '5'))
+    warmup_page_url: str = "https://www.jd.com/robots.txt"  # lightweight page on the main site
+    warmup_hosts: List[str] = [
+        "https://search.jd.com",
+        "https://item.jd.com",
+        "https://cart.jd.com",
+        "https://trade.jd.com",
+        "https://passport.jd.com",
+        "https://misc.360buyimg.com",
+        "https://img10.360buyimg.com",
+        "https://img14.360buyimg.com",
+        "https://storage.360buyimg.com",
+    ]
+    warmup_max_bundles: int = 20
+    warmup_stats_path: str = str(Path(__file__).parent / "warmup_stats.json")
     
     # When True, will attempt to use mobile version of site if desktop fails
     try_mobile_fallback: bool = True
     
+    # Browser resource limits: open pages, and watermarks that trigger recycling the
+    # main context (browser RSS in MB, navigations since the last recycle; 0 disables)
+    max_open_pages: int = 8
+    recycle_rss_mb: int = int(os.getenv('RECYCLE_RSS_MB', '1500'))
+    recycle_after_navigations: int = int(os.getenv('RECYCLE_AFTER_NAVIGATIONS', '300'))
+    rss_sample_interval: float = 15.0  # seconds
+    
+    # HAR record/replay (set from the --record / --replay command line options)
+    har_record_path: Optional[str] = None
+    har_replay_path: Optional[str] = None
+    
+    # Verification challenges are pushed from an in-page MutationObserver instead of polled
+    verification_watcher: bool = os.getenv('VERIFICATION_WATCHER', 'True').lower() == 'true'
+    verification_timeout: int = 60000  # milliseconds the user has to solve a challenge
+    
+    # Logging: structured mode writes JSON lines through an enqueued (background) sink
+    log_level: str = os.getenv('LOG_LEVEL', 'INFO')
+    structured_logging: bool = os.getenv('STRUCTURED_LOGGING', 'False').lower() == 'true'
+    
+    # Browser console messages: types that are logged, rate limit (messages/s, burst)
+    # and how often the same text may repeat; the rest is only counted
+    console_log_types: List[str] = os.getenv('CONSOLE_LOG_TYPES', 'error,warning').split(',')
+    console_log_rate: float = 2.0
+    console_log_burst: int = 10
+    console_repeat_limit: int = 3
+    
+    # Instrumentation: count and time every Playwright call per JDAutoBuyer method
+    profile_playwright_calls: bool = os.getenv('PROFILE_PLAYWRIGHT_CALLS', 'False').lower() == 'true'
+    # Chromium performance metrics and navigation timing after every page load
+    navigation_metrics: bool = os.getenv('NAVIGATION_METRICS', 'False').lower() == 'true'
+    navigation_metrics_max_entries: int = 500  # individual navigations kept for the report
+    # Python-side profiling (--profile): stack sampling interval, and how long a callback
+    # may hold the event loop before it is reported as blocking (asyncio debug mode)
+    profile_sample_interval: float = 0.005  # seconds
+    slow_callback_duration: float = float(os.getenv('SLOW_CALLBACK_DURATION', '0.1'))  # seconds
+    
     def get_random_delay(self, delay_type: str) -> float:
         """Get a random delay within the specified range for more human-like behavior"""
         delay_range = self.delay_ranges.get(delay_type, [0.5, 1.5])
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+def _digest(cookies: List[Dict]) -> str:
+    """Order-independent fingerprint of a cookie list"""
+    ordered = sorted(cookies, key=lambda c: (c.get('domain', ''), c.get('path', ''), c.get('name', '')))
+    return hashlib.sha1(json.dumps(ordered, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class CookieStore:
+    """In-memory cookie jar shared by every context, persisted only when it changes
+
+    The file is read once; afterwards all contexts are fed from memory. Updates are
+    written with a debounce, atomically (temp file + rename), and skipped entirely
+    when the jar did not change.
+    """
+
+    def __init__(self, path: str, debounce: float = 2.0, persist: bool = True):
+        self.path = path
+        self.debounce = debounce
+        # When False the jar is read from disk but never written back (e.g. HAR replay)
+        self.persist = persist
+        self._cookies: Optional[List[Dict]] = None
+        self._digest: Optional[str] = None
+        self._persisted_digest: Optional[str] = None
+        self._save_task: Optional[asyncio.Task] = None
+        # Serializes writes, a cancelled flush may still be writing in its thread
+        self._write_lock = threading.Lock()
+        self.writes = 0
+        self.skipped = 0
+
+    @property
+    def cookies(self) -> List[Dict]:
+        """Current jar, loaded from disk on first use"""
+        if self._cookies is None:
+            self._cookies = self._read()
+            self._digest = self._persisted_digest = _digest(self._cookies)
+        return self._cookies
+
+    def _read(self) -> List[Dict]:
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading cookies file: {str(e)}")
+            return []
+
+    def update(self, cookies: List[Dict]) -> bool:
+        """Replace the jar, scheduling a write if it changed; returns whether it changed"""
+        digest = _digest(cookies)
+        if self._cookies is not None and digest == self._digest:
+            self.skipped += 1
+            return False
+        self._cookies = cookies
+        self._digest = digest
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.ensure_future(self._save_later())
+        return True
+
+    async def _save_later(self):
+        await asyncio.sleep(self.debounce)
+        await self.flush()
+
+    async def flush(self):
+        """Write pending changes now"""
+        if not self.persist or self._cookies is None or self._digest == self._persisted_digest:
+            return
+        digest, cookies = self._digest, list(self._cookies)
+        try:
+            await asyncio.to_thread(self._write, cookies)
+            self._persisted_digest = digest
+            self.writes += 1
+        except Exception as e:
+            logger.error(f"Error writing cookies file: {str(e)}")
+
+    def _write(self, cookies: List[Dict]):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._write_lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(cookies, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    async def close(self):
+        """Cancel the debounce timer and write whatever is pending"""
+        if self._save_task and not self._save_task.done():
+            self._save_task.cancel()
+        await self.flush()
+
+    def stats(self) -> Dict:
+        """Write counts for the run report"""
+        return {
+            "writes": self.writes,
+            "skipped": self.skipped,
+            "pending": self._cookies is not None and self._digest != self._persisted_digest,
+        }
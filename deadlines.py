@@ -0,0 +1,159 @@
+import asyncio
+import functools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+
+from config import config
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a phase runs out of its time budget"""
+
+    def __init__(self, phase: str, budget: float, active: str):
+        self.phase = phase
+        self.budget = budget
+        self.active = active
+        super().__init__(f"{phase} exceeded its {budget:.0f}s budget while in {active}")
+
+
+class Deadline:
+    """A named phase with an absolute expiry time on the event loop clock"""
+
+    def __init__(self, phase: str, budget: float, expires_at: Optional[float], parent: Optional["Deadline"]):
+        self.phase = phase
+        self.budget = budget
+        self.expires_at = expires_at
+        self.parent = parent
+        # Innermost phase currently running under this one, used for reporting
+        self.active_child: Optional["Deadline"] = None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when unbounded"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - asyncio.get_running_loop().time())
+
+    def active_path(self) -> str:
+        """Path from this phase down to the innermost running phase"""
+        names = [self.phase]
+        child = self.active_child
+        while child:
+            names.append(child.phase)
+            child = child.active_child
+        return " > ".join(names)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def current_phase() -> Optional[str]:
+    scope = _current.get()
+    return scope.phase if scope else None
+
+
+@asynccontextmanager
+async def deadline(phase: str, seconds: Optional[float]) -> AsyncIterator[Deadline]:
+    """Run a block under a time budget
+
+    The budget is clamped to whatever is left of the enclosing deadline, so nested
+    phases can never outlive their parent. On expiry the block is cancelled and
+    DeadlineExceeded names the phase whose budget ran out and where it was.
+    """
+    parent = _current.get()
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + seconds if seconds else None
+    own_timeout = expires_at is not None
+    if parent and parent.expires_at is not None and (expires_at is None or parent.expires_at <= expires_at):
+        # The parent expires first, it will cancel us
+        expires_at = parent.expires_at
+        own_timeout = False
+
+    scope = Deadline(phase, seconds or 0, expires_at, parent)
+    if parent:
+        parent.active_child = scope
+    token = _current.set(scope)
+    try:
+        if own_timeout:
+            timeout = asyncio.timeout_at(expires_at)
+            try:
+                async with timeout:
+                    yield scope
+            except TimeoutError:
+                if not timeout.expired():
+                    raise
+                error = DeadlineExceeded(phase, scope.budget, scope.active_path())
+                logger.error(f"Deadline exceeded: {error}")
+                raise error from None
+        else:
+            yield scope
+    finally:
+        _current.reset(token)
+        if parent:
+            parent.active_child = None
+
+
+def operation_deadline(phase: str):
+    """Decorate a JDAutoBuyer coroutine method with the budget configured for phase
+
+    The wall time of every call is added to the operation.<phase> timing.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                async with deadline(phase, config.operation_budgets.get(phase)):
+                    return await method(self, *args, **kwargs)
+            except DeadlineExceeded as e:
+                self.metrics.incr(f"deadline_exceeded.{e.phase}")
+                raise
+            finally:
+                self.metrics.observe(f"operation.{phase}", time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def remaining_ms(default: float) -> float:
+    """Clamp a Playwright timeout (ms, 0 = unbounded) to the current deadline"""
+    scope = _current.get()
+    remaining = scope.remaining() if scope else None
+    if remaining is None:
+        return default
+    remaining_ms = max(1.0, remaining * 1000)
+    return remaining_ms if not default else min(default, remaining_ms)
+
+
+def _exceeded(scope: Deadline) -> DeadlineExceeded:
+    """The error for scope's expiry, naming the outermost phase that shares its expiry time"""
+    root = scope
+    while root.parent and root.parent.expires_at == scope.expires_at:
+        root = root.parent
+    return DeadlineExceeded(root.phase, root.budget, root.active_path())
+
+
+def check_deadline():
+    """Raise DeadlineExceeded when the current deadline has passed
+
+    Called where a Playwright timeout was clamped by remaining_ms, so that running
+    out of budget is not mistaken for a slow page.
+    """
+    scope = _current.get()
+    if scope and scope.remaining() == 0:
+        raise _exceeded(scope)
+
+
+async def deadline_sleep(seconds: float):
+    """Sleep before a retry, failing fast when the deadline would pass first"""
+    scope = _current.get()
+    remaining = scope.remaining() if scope else None
+    if remaining is not None and remaining < seconds:
+        raise _exceeded(scope)
+    await asyncio.sleep(seconds)
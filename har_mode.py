@@ -0,0 +1,72 @@
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from playwright.async_api import BrowserContext, Route
+from loguru import logger
+
+
+def _numbered_path(path: Path, index: int) -> Path:
+    """session.har, session.1.har, session.2.har, ..."""
+    return path if index == 0 else path.with_name(f"{path.stem}.{index}{path.suffix}")
+
+
+class HarRecorder:
+    """Records every context's traffic to HAR; written when the context closes
+
+    The first context records to the given path, later ones (recreated during 403
+    recovery, recycling, the mobile cart) to numbered siblings of it.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.files: List[str] = []
+
+    def context_options(self) -> Dict:
+        """new_context options for the next context"""
+        path = _numbered_path(self.path, len(self.files))
+        self.files.append(str(path))
+        return {"record_har_path": str(path), "record_har_content": "embed"}
+
+    def report(self) -> Dict:
+        return {"mode": "record", "files": self.files}
+
+
+class HarReplay:
+    """Serves every request from recorded HAR files and reports requests missing from them"""
+
+    def __init__(self, path: str):
+        base = Path(path)
+        if not base.exists():
+            raise FileNotFoundError(f"HAR file not found: {path}")
+        self.files: List[Path] = [base]
+        index = 1
+        while _numbered_path(base, index).exists():
+            self.files.append(_numbered_path(base, index))
+            index += 1
+        self.misses: Counter = Counter()
+
+    async def install(self, context: BrowserContext):
+        """Route context through the HAR files; call after any other routes are registered"""
+        # Routes registered later are tried first, so this catches what no HAR file has
+        await context.route("**/*", self._on_miss)
+        for path in self.files:
+            await context.route_from_har(path, not_found="fallback")
+
+    async def _on_miss(self, route: Route):
+        request = route.request
+        key = f"{request.method} {request.url}"
+        if key not in self.misses:
+            logger.warning("Request missing from HAR: {}", key)
+        self.misses[key] += 1
+        await route.abort()
+
+    def report(self) -> Dict:
+        return {
+            "mode": "replay",
+            "files": [str(path) for path in self.files],
+            "missed_requests": sum(self.misses.values()),
+            "missed_urls": len(self.misses),
+            "misses": [{"request": key, "count": count} for key, count in self.misses.most_common(100)],
+        }
@@ -1,67 +1,44 @@
 #!/usr/bin/env python3
+import argparse
 import asyncio
 import json
 import os
 import random
 import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from pathlib import Path
 from typing import Dict, List, Optional, Union
+from urllib.parse import quote
 
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page, TimeoutError
 from loguru import logger
 
 from config import config
+from asset_cache import StaticAssetCache
+from browser_lifecycle import BrowserResources
+from cookie_store import CookieStore
+from deadlines import DeadlineExceeded, check_deadline, current_phase, deadline, deadline_sleep, operation_deadline, remaining_ms
+from har_mode import HarRecorder, HarReplay
+from latency import LatencyTracker, url_class
+from log_setup import ConsoleMessageFilter, configure_logging
+from metrics import RunMetrics
+from navigation_metrics import NavigationMetrics
+from pipeline import PurchasePipeline
+from price_history import PriceHistory
+from profiler import CallProfiler, run_profiled
+from rate_limit import HostRateLimiter
+from run_journal import RunJournal
+from scheduled_purchase import ScheduledPurchase, parse_target_time
+from sharding import ShardCoordinator
+from search_diff import SearchDelta, SearchIndex
+from sku_lookup import SkuLookup
+from verification_watcher import VerificationWatcher
+from warmup import WarmUp
+from watchlist import Watchlist, parse_watch_entries
 
-
-class JDAutoBuyer:
-    def __init__(self):
-        self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
-        self.page: Optional[Page] = None
-        
-        # Create screenshots directory if it doesn't exist
-        Path(config.screenshots_dir).mkdir(exist_ok=True)
-
-    async def setup(self):
-        """Initialize browser with enhanced anti-bot configurations"""
-        logger.info("Setting up browser with anti-bot evasion...")
-        playwright = await async_playwright().start()
-        
-        # Enhanced browser arguments to avoid detection
-        browser_args = [
-            '--disable-blink-features=AutomationControlled',
-            '--disable-features=IsolateOrigins,site-per-process',
-            '--disable-web-security',
-            '--disable-site-isolation-trials',
-            '--no-sandbox',
-            '--mute-audio',  # Prevent AudioContext errors
-            '--disable-extensions',
-            '--autoplay-policy=no-user-gesture-required',  # Allow audio autoplay without user gesture
-            f'--window-size=1280,{random.randint(800, 900)}',  # Randomize window size slightly
-        ]
-        
-        # Create a more human-like browser instance
-        self.browser = await playwright.chromium.launch(
-            headless=config.headless,
-            slow_mo=config.slow_mo,
-            args=browser_args
-        )
-        
-        # Create context with enhanced privacy settings and fingerprinting evasion
-        self.context = await self.browser.new_context(
-            viewport={'width': 1280, 'height': random.randint(800, 900)},
-            user_agent=config.user_agent,
-            locale='zh-CN',
-            timezone_id='Asia/Shanghai',
-            has_touch=random.choice([True, False]),  # Randomize touch capability
-            device_scale_factor=random.choice([1, 2]),  # Randomize device scale factor
-            is_mobile=False,
-            color_scheme='light',
-            permissions=["geolocation", "notifications", "microphone", "camera"]  # Pre-grant permissions
-        )
-        
-        # Modify JavaScript environment to prevent detection with specific focus on fixing AudioContext issues
-        await self.context.add_init_script("""
+# Modify JavaScript environment to prevent detection with specific focus on fixing AudioContext issues
+STEALTH_INIT_SCRIPT = """
         () => {
             // Override properties that automation detection checks for
             Object.defineProperty(navigator, 'webdriver', {
@@ -165,10 +142,10 @@ class JDAutoBuyer:
                 }
             }
         }
-        """)
-        
-        # Add an event listener to handle all potential AudioContext issues during navigation
-        await self.context.add_init_script("""
+        """
+
+# Event listener to handle all potential AudioContext issues during navigation
+AUDIO_ERROR_INIT_SCRIPT = """
         window.addEventListener('error', function(e) {
             // Check if error is related to AudioContext
             if (e && e.message && e.message.includes('AudioContext')) {
@@ -190,50 +167,492 @@ class JDAutoBuyer:
                 }
             }
         }, true);
-        """)
+        """
+
+# Human-like headers sent with every page of the main context
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Cache-Control': 'max-age=0',
+    'Connection': 'keep-alive',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Upgrade-Insecure-Requests': '1',
+    'Pragma': 'no-cache',
+    'DNT': '1'
+}
+
+# Product records from a desktop search results page; benchmarks/extraction.py times
+# this against alternative implementations on synthetic pages
+SEARCH_EXTRACTION_SCRIPT = """
+    () => {
+        const items = Array.from(document.querySelectorAll('.gl-item'));
+        return items.map(item => {
+            const priceElement = item.querySelector('.p-price strong');
+            const nameElement = item.querySelector('.p-name em');
+            const linkElement = item.querySelector('.p-img a');
+            const commentElement = item.querySelector('.p-commit strong');
+            const shopElement = item.querySelector('.p-shop a');
+
+            return {
+                id: item.getAttribute('data-sku') || '',
+                name: nameElement ? nameElement.innerText.trim() : '',
+                price: priceElement ? parseFloat(priceElement.innerText.replace('¥', '')) : 0,
+                link: linkElement ? linkElement.getAttribute('href') : '',
+                comments: commentElement ? commentElement.innerText.trim() : '0',
+                shop: shopElement ? shopElement.innerText.trim() : '',
+            };
+        });
+    }
+"""
+
+# Product records from JD's mobile search page (site_mode=mobile), same fields as the desktop ones
+MOBILE_SEARCH_EXTRACTION_SCRIPT = """
+    () => {
+        const pick = (item, selectors) => {
+            for (const selector of selectors) {
+                const element = item.querySelector(selector);
+                if (element && element.innerText.trim()) return element.innerText.trim();
+            }
+            return '';
+        };
+        const items = Array.from(document.querySelectorAll('.search_prolist_item'));
+        return items.map(item => {
+            const linkElement = item.querySelector('a[href*="/product/"]') || item.querySelector('a');
+            const link = linkElement ? linkElement.href : '';
+            const skuMatch = link.match(/\\/product\\/(\\d+)/);
+            const price = pick(item, ['.search_prolist_price', '.price']).replace(/[^0-9.]/g, '');
+            return {
+                id: item.getAttribute('skuid') || item.getAttribute('data-sku') || (skuMatch ? skuMatch[1] : ''),
+                name: pick(item, ['.search_prolist_title', '.title']),
+                price: price ? parseFloat(price) : 0,
+                link: link,
+                comments: pick(item, ['.search_prolist_other .comment', '.search_prolist_other span']) || '0',
+                shop: pick(item, ['.search_prolist_shop', '.shop_name']),
+            };
+        });
+    }
+"""
+
+# Mobile pages (site_mode=mobile); CSS selector lists cover the page variants JD serves
+MOBILE_SEARCH_RESULT_SELECTOR = '.search_prolist_item'
+MOBILE_ADD_TO_CART_SELECTOR = '#addCart2, #addCart1, .btn-addcart, a:has-text("加入购物车")'
+MOBILE_ADDED_SELECTOR = '.addcart-success, .toast:has-text("成功"), div:has-text("加入购物车成功")'
+MOBILE_CART_SELECTOR = '.cart-list, .shop-list, .cart-item, .empty-cart, .cart-empty'
+MOBILE_EMPTY_CART_SELECTOR = '.empty-cart, .cart-empty'
+MOBILE_CHECKOUT_SELECTOR = '#submit, .btn-settle, a:has-text("去结算")'
+MOBILE_ORDER_SELECTOR = '.order-submit, #pay-btn, .btn-pay, a:has-text("提交订单")'
+
+# Page owned by the current task (pipeline workers), overriding the buyer's main page
+_task_page: ContextVar[Optional[Page]] = ContextVar("task_page", default=None)
+
+
+class JDAutoBuyer:
+    def __init__(self):
+        self.playwright = None
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        # Phone-profile context and page used for search, product and cart in site_mode=mobile
+        self.mobile_context: Optional[BrowserContext] = None
+        self._mobile_page: Optional[Page] = None
+        # Set once add_to_cart got a confirmation, which allows the checkout fast path
+        self._cart_confirmed = False
+        # Options of the main context, reused when it is recycled
+        self._context_options: Dict = {}
+        # HAR record/replay of the whole session's traffic
+        self.har_recorder: Optional[HarRecorder] = None
+        self.har_replay: Optional[HarReplay] = None
+        if config.har_replay_path:
+            self.har_replay = HarReplay(config.har_replay_path)
+        elif config.har_record_path:
+            self.har_recorder = HarRecorder(config.har_record_path)
+        
+        # One in-memory cookie jar feeds every context; disk writes are atomic and debounced.
+        # Replayed sessions must not overwrite the real session's cookies.
+        self.cookie_store = CookieStore(
+            config.cookies_path,
+            debounce=config.cookie_save_debounce,
+            persist=self.har_replay is None
+        )
+        self.verification_watcher: Optional[VerificationWatcher] = None
+        if config.verification_watcher:
+            self.verification_watcher = VerificationWatcher(config.screenshots_dir)
+        
+        # Per-run measurements, written to a JSON report on close
+        self.metrics = RunMetrics()
+        if self.har_recorder or self.har_replay:
+            self.metrics.add_section('har', (self.har_recorder or self.har_replay).report)
+        self.metrics.add_section('cookie_store', self.cookie_store.stats)
+        
+        # Every context and page goes through here for limits and memory watermarks
+        self.resources = BrowserResources(
+            max_pages=config.max_open_pages,
+            rss_limit_mb=config.recycle_rss_mb,
+            max_navigations=config.recycle_after_navigations,
+            rss_sample_interval=config.rss_sample_interval
+        )
+        self.metrics.add_section('browser_resources', self.resources.stats)
+        
+        # Browser console messages are filtered and rate limited instead of logged one by one
+        self.console_filter = ConsoleMessageFilter(
+            config.console_log_types,
+            rate=config.console_log_rate,
+            burst=config.console_log_burst,
+            repeat_limit=config.console_repeat_limit
+        )
+        self.metrics.add_section('browser_console', self.console_filter.summary)
+        
+        # Timeouts learned from observed latency per URL class
+        # (not learned from replayed traffic, which is far faster than the live site)
+        self.latency: Optional[LatencyTracker] = None
+        if config.adaptive_timeouts and not self.har_replay:
+            self.latency = LatencyTracker(
+                config.latency_stats_path,
+                factor=config.adaptive_timeout_factor,
+                floor=config.adaptive_timeout_floor,
+                ceiling=config.adaptive_timeout_ceiling,
+                min_samples=config.adaptive_timeout_min_samples
+            )
+            self.metrics.add_section('adaptive_timeouts', self.latency.estimates)
+        
+        # Static JS/CSS bundles served from disk across contexts and runs
+        self.asset_cache: Optional[StaticAssetCache] = None
+        if config.asset_cache and not (self.har_recorder or self.har_replay):
+            self.asset_cache = StaticAssetCache(config.asset_cache_dir, config.asset_cache_max_mb * 1024 * 1024,
+                                                config.asset_cache_max_age)
+            self.metrics.add_section('asset_cache', self.asset_cache.stats)
+        
+        # Every search result price is kept for historical-low lookups
+        self.price_history: Optional[PriceHistory] = None
+        if config.price_history and not self.har_replay:
+            self.price_history = PriceHistory(config.price_history_path)
+        
+        # Shared per-host request budget for navigations and API requests
+        # (replayed traffic never reaches the site)
+        self.rate_limiter: Optional[HostRateLimiter] = None
+        if config.rate_limit and not self.har_replay:
+            self.rate_limiter = HostRateLimiter(
+                config.rate_limit_per_second,
+                config.rate_limit_burst,
+                hosts=config.rate_limit_hosts
+            )
+            self.metrics.add_section('rate_limit', self.rate_limiter.stats)
+        
+        # Price and stock of many SKUs in a few batched API calls instead of page loads
+        self.sku_lookup = SkuLookup(
+            config.price_api_url,
+            config.stock_api_url,
+            area=config.stock_area,
+            chunk_size=config.sku_lookup_chunk_size,
+            concurrency=config.sku_lookup_concurrency,
+            headers={'Referer': 'https://item.jd.com/', 'User-Agent': config.user_agent},
+            limiter=self.rate_limiter
+        )
+        self.metrics.add_section('sku_lookup', self.sku_lookup.stats)
+        
+        # Last seen results per keyword, so repeated searches only surface what changed
+        self.search_index = SearchIndex()
+        
+        # Completed stages of the purchase run, set up by run() when auto_purchase is on
+        self.journal: Optional[RunJournal] = None
+        
+        self.profiler: Optional[CallProfiler] = None
+        if config.profile_playwright_calls:
+            # Helpers are transparent so their calls count towards the calling method
+            self.profiler = CallProfiler(passthrough={'_goto', '_wait_for_selector'})
+            self.profiler.attach(self)
+            self.metrics.add_section('playwright_calls', self.profiler.summary)
+        
+        # Per-navigation Chromium metrics, attributed to the operation that navigated
+        self.navigation_metrics: Optional[NavigationMetrics] = None
+        if config.navigation_metrics:
+            self.navigation_metrics = NavigationMetrics(config.navigation_metrics_max_entries)
+            self.metrics.add_section('navigation', lambda: self.navigation_metrics.summary(self.metrics.timings))
+        
+        # Learns the shared bundles and compares first-operation latency of warm and cold runs
+        # (nothing to warm up when replaying)
+        self.warmup: Optional[WarmUp] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        if not self.har_replay:
+            self.warmup = WarmUp(
+                config.warmup_stats_path,
+                page_url=config.warmup_page_url,
+                hosts=config.warmup_hosts,
+                budget=config.warmup_budget,
+                max_bundles=config.warmup_max_bundles,
+                rate_limiter=self.rate_limiter
+            )
+            self.metrics.add_section('warmup', lambda: self.warmup.report(self.metrics.first_timings))
         
-        self.page = await self.context.new_page()
+        # Create screenshots directory if it doesn't exist
+        Path(config.screenshots_dir).mkdir(exist_ok=True)
+
+    @property
+    def page(self) -> Optional[Page]:
+        """The page operations act on: the current task's own page if it has one, else the main page"""
+        return _task_page.get() or self._page
+
+    @page.setter
+    def page(self, value: Optional[Page]):
+        if _task_page.get() is not None:
+            _task_page.set(value)
+        else:
+            self._page = value
+
+    async def _create_context(self, stealth: bool = False, watch_verification: bool = True, **options) -> BrowserContext:
+        """Create a tracked context with the shared hooks, optionally with the stealth init scripts"""
+        if self.har_recorder:
+            options.update(self.har_recorder.context_options())
+        context = await self.resources.new_context(self.browser, **options)
+        try:
+            if stealth:
+                await context.add_init_script(STEALTH_INIT_SCRIPT)
+                await context.add_init_script(AUDIO_ERROR_INIT_SCRIPT)
+            await self._prepare_context(context, watch_verification=watch_verification)
+            # Registered last so the HAR is consulted before any other route
+            if self.har_replay:
+                await self.har_replay.install(context)
+        except Exception:
+            await context.close()
+            raise
+        return context
+
+    async def _maybe_recycle_context(self):
+        """Replace the main context once a memory or navigation watermark is crossed
+        
+        Only done between operations while no worker pages are open; cookies and
+        local storage carry over to the new context.
+        """
+        if _task_page.get() is not None or self.resources.pages - {self._page, self._mobile_page}:
+            return
+        reason = await self.resources.recycle_reason()
+        if not reason:
+            return
+        
+        logger.info(f"Recycling browser context ({reason})")
+        old_context = self.context
+        storage_state = await old_context.storage_state()
+        self.cookie_store.update(storage_state['cookies'])
+        
+        self.context = await self._create_context(stealth=True, storage_state=storage_state, **self._context_options)
+        self.page = await self._new_page()
+        await self.page.set_extra_http_headers(DEFAULT_HEADERS)
+        try:
+            await old_context.close()
+        except Exception as e:
+            logger.warning(f"Error closing recycled context: {str(e)}")
+        self.resources.recycled()
+
+    async def _fresh_context(self, **options):
+        """Move the current page to a new context (403 recovery), fed from the shared cookie jar
+        
+        Outside the pipeline the main context is replaced. A pipeline worker only moves
+        its own page, to a context of its own that worker_page closes with it; the
+        shared context and the other workers' pages in it stay open.
+        """
+        context = await self._create_context(**options)
+        if self.cookie_store.cookies:
+            await context.add_cookies(self.cookie_store.cookies)
+        if _task_page.get() is None:
+            old_context, self.context = self.context, context
+            if old_context:
+                try:
+                    await old_context.close()
+                except Exception as e:
+                    logger.warning(f"Error closing replaced context: {str(e)}")
+        else:
+            old_page = self.page
+            if old_page.context is not self.context and old_page.context is not self.mobile_context:
+                # Replacing a context this worker already had to itself
+                await old_page.context.close()
+            elif not old_page.is_closed():
+                await old_page.close()
+        self.page = await self._new_page(context)
+        await self.page.set_extra_http_headers(DEFAULT_HEADERS)
+
+    async def _new_page(self, context: Optional[BrowserContext] = None) -> Page:
+        """Open a page with the default timeouts and event listeners"""
+        page = await self.resources.new_page(context or self.context)
+        page.set_default_navigation_timeout(config.navigation_timeout)
+        page.set_default_timeout(config.action_timeout)
+        
+        # Console messages go through the filter, which only counts most of them
+        page.on("console", self.console_filter)
+        
+        # Listen for page errors
+        page.on("pageerror", lambda err: logger.error(f"Page error: {err}"))
+        return page
+
+    async def _mobile_site_context(self) -> BrowserContext:
+        """Context with a phone profile for site_mode=mobile, fed from the shared cookie jar"""
+        if self.mobile_context is None or self.mobile_context not in self.resources.contexts:
+            self.mobile_context = await self._create_context(
+                viewport={'width': 375, 'height': 812},
+                user_agent=config.get_random_user_agent(mobile=True),
+                locale='zh-CN',
+                timezone_id='Asia/Shanghai',
+                device_scale_factor=3,
+                is_mobile=True,
+                has_touch=True
+            )
+            if self.cookie_store.cookies:
+                await self.mobile_context.add_cookies(self.cookie_store.cookies)
+            self._mobile_page = None
+        return self.mobile_context
+
+    async def _site_page(self) -> Page:
+        """The page operations act on for the configured site mode"""
+        if config.site_mode != 'mobile':
+            return self.page
+        page = _task_page.get()
+        if page and not page.is_closed():
+            return page
+        if self._mobile_page is None or self._mobile_page.is_closed():
+            self._mobile_page = await self._new_page(await self._mobile_site_context())
+        return self._mobile_page
+
+    @asynccontextmanager
+    async def worker_page(self):
+        """Give the current task its own page of the shared context while the block runs"""
+        if config.site_mode == 'mobile':
+            page = await self._new_page(await self._mobile_site_context())
+        else:
+            page = await self._new_page()
+            await page.set_extra_http_headers(DEFAULT_HEADERS)
+        token = _task_page.set(page)
+        try:
+            yield page
+        finally:
+            # The task may have replaced its page (e.g. after it was closed)
+            pages = {page, _task_page.get()}
+            _task_page.reset(token)
+            for task_page in pages:
+                try:
+                    if not task_page:
+                        continue
+                    if task_page.context is not self.context and task_page.context is not self.mobile_context:
+                        # Opened by 403 recovery for this task alone
+                        await task_page.context.close()
+                    elif not task_page.is_closed():
+                        await task_page.close()
+                except Exception:
+                    pass
+
+    async def setup(self):
+        """Initialize browser with enhanced anti-bot configurations"""
+        logger.info("Setting up browser with anti-bot evasion...")
+        self.playwright = await async_playwright().start()
+        
+        # Enhanced browser arguments to avoid detection
+        browser_args = [
+            '--disable-blink-features=AutomationControlled',
+            '--disable-features=IsolateOrigins,site-per-process',
+            '--disable-web-security',
+            '--disable-site-isolation-trials',
+            '--no-sandbox',
+            '--mute-audio',  # Prevent AudioContext errors
+            '--disable-extensions',
+            '--autoplay-policy=no-user-gesture-required',  # Allow audio autoplay without user gesture
+            f'--window-size=1280,{random.randint(800, 900)}',  # Randomize window size slightly
+        ]
+        
+        # Create a more human-like browser instance
+        self.browser = await self.playwright.chromium.launch(
+            headless=config.headless,
+            slow_mo=config.slow_mo,
+            args=browser_args
+        )
+        
+        # Create context with enhanced privacy settings and fingerprinting evasion
+        self._context_options = dict(
+            viewport={'width': 1280, 'height': random.randint(800, 900)},
+            user_agent=config.user_agent,
+            locale='zh-CN',
+            timezone_id='Asia/Shanghai',
+            has_touch=random.choice([True, False]),  # Randomize touch capability
+            device_scale_factor=random.choice([1, 2]),  # Randomize device scale factor
+            is_mobile=False,
+            color_scheme='light',
+            permissions=["geolocation", "notifications", "microphone", "camera"]  # Pre-grant permissions
+        )
+        self.context = await self._create_context(stealth=True, **self._context_options)
+        
+        self.page = await self._new_page()
         
         # Enable all permissions
         context_permissions = ["geolocation", "notifications", "microphone", "camera"]
         for permission in context_permissions:
             await self.context.grant_permissions([permission])
         
-        # Set navigation timeout
-        self.page.set_default_navigation_timeout(config.navigation_timeout)
-        self.page.set_default_timeout(config.action_timeout)
-        
         # Add human-like headers 
-        await self.page.set_extra_http_headers({
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Cache-Control': 'max-age=0',
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Upgrade-Insecure-Requests': '1',
-            'Pragma': 'no-cache',
-            'DNT': '1'
-        })
+        await self.page.set_extra_http_headers(DEFAULT_HEADERS)
         
-        # Listen for all console messages to debug
-        self.page.on("console", lambda msg: logger.debug(f"Browser console: {msg.text}"))
-        
-        # Listen for page errors
-        self.page.on("pageerror", lambda err: logger.error(f"Page error: {err}"))
+        # Runs alongside login, in a page of its own
+        if config.warmup and self.warmup and not self.warmup.started:
+            self._warmup_task = asyncio.ensure_future(self.warmup.run(await self._new_page()))
         
         logger.info("Enhanced browser setup completed")
 
+    async def _prepare_context(self, context: BrowserContext, watch_verification: bool = True):
+        """Install the shared per-context hooks; call before the context opens pages"""
+        # Push verification challenges to Python instead of polling for them
+        if watch_verification and self.verification_watcher:
+            await self.verification_watcher.install(context)
+        if self.asset_cache:
+            await self.asset_cache.install(context)
+        if self.warmup:
+            self.warmup.observe(context)
+
     async def close(self):
         """Close browser and clean up"""
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        await self.cookie_store.close()
+        if self.journal:
+            await self.journal.close()
         if self.browser:
+            await self.resources.close_all()
             await self.browser.close()
             logger.info("Browser closed")
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+        
+        if self.profiler:
+            self.profiler.log_table()
+            self.profiler.detach()
+        
+        if self.latency:
+            self.latency.save()
+        if self.asset_cache:
+            self.asset_cache.save()
+        if self.warmup:
+            self.warmup.save(self.metrics.first_timings)
+        if self.price_history:
+            self.price_history.close()
+        
+        try:
+            report_path = self.metrics.write(config.reports_dir)
+            logger.info(f"Run report written to {report_path}")
+        except Exception as e:
+            logger.warning(f"Could not write run report: {str(e)}")
 
-    async def _handle_verification(self, timeout=60000) -> bool:
+    async def _handle_verification(self, timeout=None) -> bool:
         """Handle various verification challenges that may appear"""
+        timeout = timeout or config.verification_timeout
+        if self.verification_watcher:
+            # Challenges are pushed by the watcher, so there is nothing to poll here
+            if not self.verification_watcher.challenge_active:
+                return False
+            logger.info("Verification challenge pending, waiting for manual completion...")
+            if await self.verification_watcher.wait_until_clear(timeout):
+                return True
+            logger.error("Verification timeout. User did not complete verification in time.")
+            return False
+        
         try:
             logger.info("Checking for verification challenges...")
             
@@ -295,10 +714,82 @@ class JDAutoBuyer:
         except TimeoutError:
             logger.error("Verification timeout. User did not complete verification in time.")
             return False
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error handling verification: {str(e)}")
             return False
 
+    async def _goto(self, url: str, page: Optional[Page] = None, **kwargs):
+        """Navigate within the remaining time budget of the current operation"""
+        page = page or self.page
+        timeout = kwargs.get('timeout', config.navigation_timeout)
+        key = None
+        if self.latency and 'timeout' not in kwargs:
+            key = f"goto {url_class(url)}"
+            timeout = self.latency.timeout_for(key, timeout)
+        if self.rate_limiter:
+            # Queue wait is not page latency, but it does use up the operation's budget
+            await self.rate_limiter.acquire(url)
+        kwargs['timeout'] = remaining_ms(timeout)
+        
+        self.resources.count_navigation()
+        start = time.perf_counter()
+        try:
+            response = await page.goto(url, **kwargs)
+        except TimeoutError:
+            # A timeout cut short by the operation's budget says nothing about the page
+            check_deadline()
+            self.metrics.incr('timeouts.goto')
+            if key:
+                self.latency.record_timeout(key, (time.perf_counter() - start) * 1000)
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if self.rate_limiter and response:
+            self.rate_limiter.record_status(url, response.status)
+        if key:
+            self.latency.record(key, elapsed_ms)
+        if self.navigation_metrics:
+            await self.navigation_metrics.collect(page, url, current_phase(), elapsed_ms)
+        return response
+
+    async def _wait_for_selector(self, selector: str, timeout: Optional[float] = None, page: Optional[Page] = None,
+                                 adaptive: bool = True):
+        """Wait for a selector, pausing while a verification challenge is pending
+        
+        Pass adaptive=False for waits on the user (QR scans) so they keep their full timeout.
+        """
+        page = page or self.page
+        timeout = config.action_timeout if timeout is None else timeout
+        key = None
+        if self.latency and adaptive:
+            key = f"wait {url_class(page.url)} {selector}"
+            timeout = self.latency.timeout_for(key, timeout)
+        timeout = remaining_ms(timeout)
+        
+        detections = self.verification_watcher.detections if self.verification_watcher else 0
+        start = time.perf_counter()
+        try:
+            if not self.verification_watcher:
+                result = await page.wait_for_selector(selector, timeout=timeout)
+            else:
+                result = await self.verification_watcher.guard(
+                    lambda: page.wait_for_selector(selector, timeout=timeout),
+                    config.verification_timeout
+                )
+        except TimeoutError:
+            # A timeout cut short by the operation's budget says nothing about the page
+            check_deadline()
+            self.metrics.incr('timeouts.wait_for_selector')
+            if key:
+                self.latency.record_timeout(key, (time.perf_counter() - start) * 1000)
+            raise
+        # Time spent paused on a verification challenge is not page latency
+        if key and (not self.verification_watcher or self.verification_watcher.detections == detections):
+            self.latency.record(key, (time.perf_counter() - start) * 1000)
+        return result
+
+    @operation_deadline('login')
     async def login(self) -> bool:
         """Login to JD.com via username/password or QR code or saved cookies"""
         if await self._load_cookies():
@@ -308,7 +799,7 @@ class JDAutoBuyer:
         logger.info("No valid cookies found, attempting login...")
         
         try:
-            await self.page.goto(config.login_url)
+            await self._goto(config.login_url)
             
             # Try username/password login if credentials are available
             if config.username and config.password:
@@ -333,13 +824,10 @@ class JDAutoBuyer:
                     # Wait for login success or failure
                     try:
                         # Handle any verification challenges
-                        if await self._handle_verification(timeout=60000):
-                            # Verification successful, save cookies
-                            await self._save_cookies()
-                            return True
+                        await self._handle_verification()
                             
-                        # Check for login success
-                        await self.page.wait_for_selector('.nickname', timeout=10000)
+                        # Check for login success (a timeout here means the login failed)
+                        await self._wait_for_selector('.nickname', timeout=10000, adaptive=False)
                         logger.info("Login successful with username/password!")
                         
                         # Save cookies
@@ -373,7 +861,7 @@ class JDAutoBuyer:
                 logger.info("Please scan the QR code with your JD app to login")
             
             # Wait for login success
-            await self.page.wait_for_selector('.nickname', timeout=120000)  # 2 minutes to scan
+            await self._wait_for_selector('.nickname', timeout=120000, adaptive=False)  # 2 minutes to scan
             logger.info("Login successful!")
             
             # Save cookies
@@ -383,93 +871,139 @@ class JDAutoBuyer:
         except TimeoutError:
             logger.error("Login timeout. Please try again.")
             return False
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Login failed: {str(e)}")
             return False
 
     async def _save_cookies(self):
-        """Save cookies to file"""
+        """Update the shared cookie jar; it is written to disk only if it changed"""
         cookies = await self.context.cookies()
-        with open(config.cookies_path, 'w') as f:
-            json.dump(cookies, f)
-        logger.info("Cookies saved")
+        if self.cookie_store.update(cookies):
+            logger.info("Cookies saved")
+        else:
+            logger.debug("Cookies unchanged, nothing to save")
 
     async def _load_cookies(self) -> bool:
-        """Load cookies from file and verify if still valid"""
+        """Load cookies from the shared jar and verify if still valid"""
         try:
-            if not os.path.exists(config.cookies_path):
+            cookies = self.cookie_store.cookies
+            if not cookies:
                 return False
                 
-            with open(config.cookies_path, 'r') as f:
-                cookies = json.load(f)
-                
             await self.context.add_cookies(cookies)
             
             # Verify cookies by visiting homepage
-            await self.page.goto(config.homepage_url)
+            await self._goto(config.homepage_url)
             
             # Check if logged in by looking for nickname
             nickname = await self.page.query_selector('.nickname')
             return nickname is not None
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error loading cookies: {str(e)}")
             return False
 
+    @operation_deadline('search_product')
     async def search_product(self, keyword: str) -> List[Dict]:
         """Search for products based on keyword"""
+        products = await self._search_listings(keyword)
+        if products is None:
+            return []
+        if config.max_price:
+            products = [p for p in products if p['price'] <= config.max_price]
+        logger.info(f"Found {len(products)} products matching {keyword}")
+        return products
+    
+    @operation_deadline('search_product')
+    async def search_changes(self, keyword: str) -> Optional[SearchDelta]:
+        """Search keyword again and return what changed since its previous search
+        
+        New and re-priced products are limited to max_price; the comparison is made
+        before that filter, so products crossing the limit show up as changes.
+        Returns None when the search failed or came back empty, which says nothing
+        about the listings: the previous results stay the basis for the next diff,
+        so a transient error does not make every product look new afterwards.
+        """
+        products = await self._search_listings(keyword)
+        if not products:
+            return None
+        delta = self.search_index.diff(keyword, products)
+        if not delta.first:
+            logger.info(f"Search results for {keyword}: {delta.summary()}")
+            for p in delta.changed:
+                logger.info(f"Price change: {p['name']} ¥{p['previous_price']} -> ¥{p['price']}")
+            for p in delta.removed:
+                logger.info(f"No longer listed: {p['name']} (¥{p['price']})")
+        if config.max_price:
+            delta.new = [p for p in delta.new if p['price'] <= config.max_price]
+            delta.changed = [p for p in delta.changed if p['price'] <= config.max_price]
+        return delta
+    
+    async def _search_listings(self, keyword: str) -> Optional[List[Dict]]:
+        """Every product on keyword's search results, recorded in the price history; None if the search failed"""
         logger.info(f"Searching for: {keyword}")
         
         try:
             # Ensure page is available
             if not await self._ensure_page_available():
-                return []
+                return None
                 
-            # Navigate to homepage
-            await self.page.goto(config.homepage_url)
-            
-            # Input search keyword
-            await self.page.fill('#key', keyword)
-            await self.page.click('.button')
-            
-            # Wait for search results without timeout
-            await self.page.wait_for_selector('.gl-item', timeout=0)  # timeout=0 means no timeout
-            
-            # Take screenshot
-            await self.page.screenshot(path=f"{config.screenshots_dir}/search_results_{keyword.replace(' ', '_')}.png")
-            
-            # Extract product information
-            products = await self.page.evaluate('''
-                () => {
-                    const items = Array.from(document.querySelectorAll('.gl-item'));
-                    return items.map(item => {
-                        const priceElement = item.querySelector('.p-price strong');
-                        const nameElement = item.querySelector('.p-name em');
-                        const linkElement = item.querySelector('.p-img a');
-                        const commentElement = item.querySelector('.p-commit strong');
-                        const shopElement = item.querySelector('.p-shop a');
-                        
-                        return {
-                            id: item.getAttribute('data-sku') || '',
-                            name: nameElement ? nameElement.innerText.trim() : '',
-                            price: priceElement ? parseFloat(priceElement.innerText.replace('¥', '')) : 0,
-                            link: linkElement ? linkElement.getAttribute('href') : '',
-                            comments: commentElement ? commentElement.innerText.trim() : '0',
-                            shop: shopElement ? shopElement.innerText.trim() : '',
-                        };
-                    });
-                }
-            ''')
-            
-            if config.max_price:
-                products = [p for p in products if p['price'] <= config.max_price]
+            if config.site_mode == 'mobile':
+                products = await self._search_results_mobile(keyword)
+            else:
+                # Navigate to homepage
+                await self._goto(config.homepage_url)
+                
+                # Input search keyword
+                await self.page.fill('#key', keyword)
+                if self.rate_limiter:
+                    # The click navigates to the search host, which has a budget of its own
+                    await self.rate_limiter.acquire(config.search_url.format(keyword=quote(keyword)))
+                await self.page.click('.button')
                 
-            logger.info(f"Found {len(products)} products matching {keyword}")
+                # Wait for search results, bounded by the operation deadline
+                await self._wait_for_selector('.gl-item', timeout=config.search_results_timeout)
+                
+                # Take screenshot
+                await self.page.screenshot(path=f"{config.screenshots_dir}/search_results_{keyword.replace(' ', '_')}.png")
+                
+                # Extract product information
+                products = await self.page.evaluate(SEARCH_EXTRACTION_SCRIPT)
+            
+            if self.price_history:
+                # Attach the previous low before this observation becomes part of the history
+                lows = self.price_history.lowest_prices([p['id'] for p in products], config.price_history_days)
+                for p in products:
+                    p['history_low'] = lows.get(p['id'])
+                self.price_history.record(keyword, products)
             return products
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error searching for {keyword}: {str(e)}")
-            return []
+            return None
+
+    async def _search_results_mobile(self, keyword: str) -> List[Dict]:
+        """Search results from the mobile search page, which is opened directly by URL"""
+        page = await self._site_page()
+        await self._goto(config.mobile_search_url.format(keyword=quote(keyword)), page=page, wait_until="domcontentloaded")
+        await self._wait_for_selector(MOBILE_SEARCH_RESULT_SELECTOR, timeout=config.search_results_timeout, page=page)
+        await page.screenshot(path=f"{config.screenshots_dir}/mobile_search_results_{keyword.replace(' ', '_')}.png")
+        products = await page.evaluate(MOBILE_SEARCH_EXTRACTION_SCRIPT)
+        # Products without a SKU cannot be added to the cart
+        return [p for p in products if p['id']]
+
+    async def lookup_skus(self, skus: List[str]) -> Dict[str, Dict]:
+        """Current price and stock of SKUs through the logged-in session, without opening pages
+        
+        Returns {sku: {'price': float or None, 'in_stock': bool or None, 'stock_state': ...}}.
+        """
+        return await self.sku_lookup.lookup(self.context.request, skus, timeout=config.action_timeout)
 
     def select_product_by_strategy(self, products: List[Dict], strategy: str = 'price_low') -> Optional[Dict]:
         """Select a product based on a strategy
@@ -480,6 +1014,7 @@ class JDAutoBuyer:
         - first: Select the first product in the list (default JD ranking)
         - most_comments: Select the product with the most comments
         - random: Select a random product
+        - historical_low: Select the product furthest below its recorded price history
         """
         if not products:
             return None
@@ -506,6 +1041,16 @@ class JDAutoBuyer:
             selected = sorted_products[0]
             logger.info(f"Selected most reviewed product: {selected['name']} ({selected['comments']} reviews)")
             
+        elif strategy == 'historical_low':
+            # Uses the history attached by search_product, no extra page loads needed
+            at_low = [p for p in products if p.get('history_low') and p['price'] <= p['history_low']]
+            if at_low:
+                selected = max(at_low, key=lambda p: ((p['history_low'] - p['price']) / p['history_low'], -p['price']))
+                logger.info(f"Selected historical low product: {selected['name']} (¥{selected['price']}, previous low ¥{selected['history_low']})")
+            else:
+                selected = min(products, key=lambda p: p['price'])
+                logger.info(f"No product at its historical low, selected lowest price product: {selected['name']} (¥{selected['price']})")
+            
         elif strategy == 'random':
             selected = random.choice(products)
             logger.info(f"Selected random product: {selected['name']} (¥{selected['price']})")
@@ -516,12 +1061,16 @@ class JDAutoBuyer:
             
         return selected
 
+    @operation_deadline('add_to_cart')
     async def add_to_cart(self, product: Dict) -> bool:
         """Add a product to shopping cart"""
         try:
             # Ensure page is available
             if not await self._ensure_page_available():
                 return False
+            
+            if config.site_mode == 'mobile':
+                return await self._add_to_cart_mobile(product)
                 
             product_url = product['link']
             if not product_url.startswith('http'):
@@ -546,12 +1095,15 @@ class JDAutoBuyer:
             for attempt in range(config.max_retries):
                 try:
                     # Navigate to product page
-                    await self.page.goto(product_url)
+                    await self._goto(product_url)
                     break  # Break the loop if navigation successful
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
                     if attempt < config.max_retries - 1:
                         logger.warning(f"Navigation failed (attempt {attempt+1}/{config.max_retries}): {str(e)}")
-                        await asyncio.sleep(config.retry_delay * (attempt + 1))
+                        self.metrics.incr('retries.add_to_cart.navigation')
+                        await deadline_sleep(config.retry_delay * (attempt + 1))
                     else:
                         logger.error(f"Failed to navigate to product page after {config.max_retries} attempts")
                         return False
@@ -579,19 +1131,7 @@ class JDAutoBuyer:
             # Click add to cart button with retry logic
             for attempt in range(config.max_retries):
                 try:
-                    # Find add to cart button
-                    add_to_cart_btn = await self.page.query_selector('#InitCartUrl')
-                    if not add_to_cart_btn:
-                        add_to_cart_btn = await self.page.query_selector('.btn-addtocart')
-                    
-                    if not add_to_cart_btn:
-                        # Try the second type of add-to-cart button
-                        add_to_cart_btn = await self.page.query_selector('.btn-add')
-                    
-                    if not add_to_cart_btn:
-                        # Try to find by text content
-                        add_to_cart_btn = await self.page.query_selector("//a[contains(text(), '加入购物车')]")
-                    
+                    add_to_cart_btn = await self._find_add_to_cart_button()
                     if not add_to_cart_btn:
                         logger.error("Add to cart button not found")
                         return False
@@ -600,30 +1140,21 @@ class JDAutoBuyer:
                     await add_to_cart_btn.click()
                     
                     # Wait for success dialog or success indication
-                    success = False
-                    try:
-                        # Check for dialog
-                        await self.page.wait_for_selector('.dialog-wrap', timeout=5000)
-                        success = True
-                    except TimeoutError:
-                        # If no dialog, check if added to cart message appears
-                        try:
-                            added_msg = await self.page.wait_for_selector("//div[contains(text(), '已成功加入购物车')]", timeout=2000)
-                            if added_msg:
-                                success = True
-                        except TimeoutError:
-                            # If still no success, maybe it's already added (some items skip the confirmation)
-                            if attempt == config.max_retries - 1:
-                                logger.info("No confirmation dialog, assuming product was added")
-                                success = True
-                    
-                    if success:
+                    if await self._wait_for_add_confirmation():
                         logger.info("Product added to cart successfully")
+                        self._cart_confirmed = True
+                        return True
+                    
+                    if attempt == config.max_retries - 1:
+                        # Maybe it's already added (some items skip the confirmation); an
+                        # unconfirmed add does not qualify for the checkout fast path
+                        logger.info("No confirmation dialog, assuming product was added")
                         return True
                     
                     if attempt < config.max_retries - 1:
                         logger.warning(f"Add to cart may have failed (attempt {attempt+1}/{config.max_retries}), retrying...")
-                        await asyncio.sleep(config.retry_delay * (attempt + 1))
+                        self.metrics.incr('retries.add_to_cart.click')
+                        await deadline_sleep(config.retry_delay * (attempt + 1))
                     else:
                         logger.warning("No confirmation after adding to cart, checking cart directly...")
                         # Try navigating to cart to verify
@@ -631,20 +1162,85 @@ class JDAutoBuyer:
                             logger.info("Successfully navigated to cart, assuming product was added")
                             return True
                 
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
                     if attempt < config.max_retries - 1:
                         logger.warning(f"Error adding to cart (attempt {attempt+1}/{config.max_retries}): {str(e)}")
-                        await asyncio.sleep(config.retry_delay * (attempt + 1))
+                        self.metrics.incr('retries.add_to_cart.click')
+                        await deadline_sleep(config.retry_delay * (attempt + 1))
                     else:
                         logger.error(f"Failed to add to cart after {config.max_retries} attempts: {str(e)}")
                         return False
             
             return False  # If we reached here, all attempts failed
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error adding to cart: {str(e)}")
             return False
 
+    async def _find_add_to_cart_button(self, page: Optional[Page] = None):
+        """The add-to-cart control of a desktop product page, or None"""
+        page = page or self.page
+        selectors = [
+            '#InitCartUrl',
+            '.btn-addtocart',
+            '.btn-add',  # second type of add-to-cart button
+            "//a[contains(text(), '加入购物车')]"  # by text content
+        ]
+        for selector in selectors:
+            button = await page.query_selector(selector)
+            if button:
+                return button
+        return None
+
+    async def _wait_for_add_confirmation(self, page: Optional[Page] = None) -> bool:
+        """Wait for the added-to-cart dialog or message after clicking add to cart
+        
+        Either may legitimately be missing, so these waits keep their fixed timeouts.
+        """
+        try:
+            await self._wait_for_selector('.dialog-wrap', timeout=5000, page=page, adaptive=False)
+            return True
+        except TimeoutError:
+            # If no dialog, check if added to cart message appears
+            try:
+                return bool(await self._wait_for_selector("//div[contains(text(), '已成功加入购物车')]", timeout=2000,
+                                                          page=page, adaptive=False))
+            except TimeoutError:
+                return False
+
+    async def _add_to_cart_mobile(self, product: Dict) -> bool:
+        """Add a product to the cart from its mobile product page"""
+        page = await self._site_page()
+        product_url = config.mobile_item_url.format(sku=product['id'])
+        logger.info(f"Adding to cart (mobile): {product['name']} (¥{product['price']})")
+        
+        for attempt in range(config.max_retries):
+            try:
+                await self._goto(product_url, page=page, wait_until="domcontentloaded")
+                add_to_cart_btn = await self._wait_for_selector(MOBILE_ADD_TO_CART_SELECTOR, page=page)
+                await asyncio.sleep(random.uniform(0.5, 1.5))
+                await add_to_cart_btn.click()
+                await self._wait_for_selector(MOBILE_ADDED_SELECTOR, timeout=5000, page=page, adaptive=False)
+                logger.info("Product added to cart successfully")
+                self._cart_confirmed = True
+                return True
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if attempt < config.max_retries - 1:
+                    logger.warning(f"Error adding to cart on mobile page (attempt {attempt+1}/{config.max_retries}): {str(e)}")
+                    self.metrics.incr('retries.add_to_cart.mobile')
+                    await deadline_sleep(config.retry_delay * (attempt + 1))
+                else:
+                    logger.error(f"Failed to add to cart on mobile page after {config.max_retries} attempts: {str(e)}")
+        
+        await page.screenshot(path=f"{config.screenshots_dir}/mobile_product_{product['id']}.png")
+        return False
+
     async def _ensure_page_available(self) -> bool:
         """Ensure that page and context are available, recreate them if necessary"""
         try:
@@ -657,14 +1253,17 @@ class JDAutoBuyer:
                         logger.error("Failed to login after reopening browser")
                         return False
                 else:
-                    self.page = await self.context.new_page()
-                    self.page.set_default_navigation_timeout(config.navigation_timeout)
-                    self.page.set_default_timeout(config.action_timeout)
+                    self.page = await self._new_page()
+            else:
+                await self._maybe_recycle_context()
             return True
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error ensuring page availability: {str(e)}")
             return False
 
+    @operation_deadline('navigate_to_cart')
     async def navigate_to_cart(self) -> bool:
         """Navigate to the shopping cart page with enhanced anti-detection"""
         try:
@@ -674,6 +1273,9 @@ class JDAutoBuyer:
             if not await self._ensure_page_available():
                 return False
             
+            if config.site_mode == 'mobile':
+                return await self._navigate_to_cart_mobile()
+            
             # First go to homepage to establish session using a better approach
             for attempt in range(3):
                 try:
@@ -688,9 +1290,10 @@ class JDAutoBuyer:
                         })
                     
                     # Navigate with retries for 403 errors
-                    response = await self.page.goto(config.homepage_url, wait_until="domcontentloaded")
+                    response = await self._goto(config.homepage_url, wait_until="domcontentloaded")
                     if response.status == 403:
                         logger.warning(f"Got 403 on attempt {attempt+1}, retrying with different approach...")
+                        self.metrics.incr('retries.navigate_to_cart.homepage')
                         await asyncio.sleep(random.uniform(3.0, 5.0))
                         # Clear cookies and try again with different settings
                         if attempt == 1:
@@ -699,18 +1302,18 @@ class JDAutoBuyer:
                             await self._load_cookies()
                         continue
                     break
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
                     logger.warning(f"Navigation error on attempt {attempt+1}: {str(e)}")
+                    self.metrics.incr('retries.navigate_to_cart.homepage')
                     await asyncio.sleep(random.uniform(2.0, 4.0))
                     if attempt == 2:
                         # Last attempt, try with a fresh context
-                        await self.context.close()
-                        self.context = await self.browser.new_context(
+                        await self._fresh_context(
                             viewport={'width': 1280, 'height': random.randint(800, 900)},
                             user_agent=config.user_agent
                         )
-                        await self._load_cookies()
-                        self.page = await self.context.new_page()
             
             await asyncio.sleep(config.wait_after_navigation)
             
@@ -736,7 +1339,7 @@ class JDAutoBuyer:
                 # Add randomized delay between attempts (more human-like)
                 await asyncio.sleep(random.uniform(1.5, 3.0))
                 
-                logger.info(f"Trying cart access method {method_index + 1}/{len(cart_access_methods)}")
+                logger.debug("Trying cart access method {}/{}", method_index + 1, len(cart_access_methods))
                 
                 # Try each method up to 2 times
                 for retry in range(2):
@@ -745,16 +1348,19 @@ class JDAutoBuyer:
                         return True
                     
                     if retry < 1:
-                        logger.info(f"Retrying method {method_index + 1}")
+                        logger.debug("Retrying method {}", method_index + 1)
+                        self.metrics.incr('retries.navigate_to_cart.method')
                         await asyncio.sleep(random.uniform(1.0, 2.0))
                 
                 # If method failed, go back to homepage and try next method
                 if method_index < len(cart_access_methods) - 1:
                     logger.info("Returning to homepage before trying next method")
                     try:
-                        await self.page.goto(config.homepage_url)
+                        await self._goto(config.homepage_url)
                         await asyncio.sleep(random.uniform(1.0, 2.0))
                         await self._perform_human_like_interaction()
+                    except DeadlineExceeded:
+                        raise
                     except Exception as e:
                         logger.warning(f"Error returning to homepage: {str(e)}")
             
@@ -762,10 +1368,31 @@ class JDAutoBuyer:
             logger.error("All cart access methods failed")
             return False
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error navigating to cart: {str(e)}")
             return False
 
+    async def _navigate_to_cart_mobile(self) -> bool:
+        """Open the mobile cart page"""
+        page = await self._site_page()
+        for attempt in range(2):
+            try:
+                await self._goto(config.mobile_cart_url, page=page, wait_until="domcontentloaded")
+                await self._wait_for_selector(MOBILE_CART_SELECTOR, page=page)
+                await page.screenshot(path=f"{config.screenshots_dir}/mobile_cart.png")
+                logger.info("Successfully navigated to mobile cart")
+                return True
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.warning(f"Mobile cart access failed (attempt {attempt+1}/2): {str(e)}")
+                if attempt == 0:
+                    self.metrics.incr('retries.navigate_to_cart.mobile')
+                    await deadline_sleep(config.retry_delay)
+        return False
+
     async def _perform_human_like_interaction(self):
         """Perform realistic human-like interactions to avoid bot detection"""
         try:
@@ -807,6 +1434,8 @@ class JDAutoBuyer:
                     except Exception:
                         pass
         
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"Error in human-like interactions: {str(e)}")
 
@@ -828,7 +1457,8 @@ class JDAutoBuyer:
         
         # Try each recovery technique in sequence until one works
         for i, technique in enumerate(recovery_techniques):
-            logger.info(f"Trying 403 recovery technique {i+1}/{len(recovery_techniques)}")
+            logger.debug("Trying 403 recovery technique {}/{}", i+1, len(recovery_techniques))
+            self.metrics.incr('recovery_403.attempts')
             if await technique(url):
                 logger.info(f"Successfully recovered from 403 error using technique {i+1}")
                 return True
@@ -845,8 +1475,10 @@ class JDAutoBuyer:
                 'User-Agent': new_user_agent
             })
             
-            response = await self.page.goto(url, wait_until="domcontentloaded")
+            response = await self._goto(url, wait_until="domcontentloaded")
             return response.status != 403
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"Error retrying with new user agent: {str(e)}")
             return False
@@ -857,15 +1489,15 @@ class JDAutoBuyer:
             logger.info("Clearing cookies and retrying")
             await self.context.clear_cookies()
             # Try to load saved cookies again
-            if os.path.exists(config.cookies_path):
-                with open(config.cookies_path, 'r') as f:
-                    cookies = json.load(f)
-                    await self.context.add_cookies(cookies)
+            if self.cookie_store.cookies:
+                await self.context.add_cookies(self.cookie_store.cookies)
             
             # Add a short delay to avoid immediate retry
             await asyncio.sleep(random.uniform(2.0, 4.0))
-            response = await self.page.goto(url, wait_until="domcontentloaded")
+            response = await self._goto(url, wait_until="domcontentloaded")
             return response.status != 403
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"Error retrying with new cookies: {str(e)}")
             return False
@@ -885,8 +1517,10 @@ class JDAutoBuyer:
                 'Referer': random.choice(referrers)
             })
             
-            response = await self.page.goto(url, wait_until="domcontentloaded")
+            response = await self._goto(url, wait_until="domcontentloaded")
             return response.status != 403
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"Error retrying with referrer: {str(e)}")
             return False
@@ -901,8 +1535,10 @@ class JDAutoBuyer:
             # Clear navigation history
             await self.page.evaluate("window.history.pushState({}, '', 'about:blank')")
             
-            response = await self.page.goto(url, wait_until="domcontentloaded")
+            response = await self._goto(url, wait_until="domcontentloaded")
             return response.status != 403
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"Error retrying with delay: {str(e)}")
             return False
@@ -912,12 +1548,8 @@ class JDAutoBuyer:
         try:
             logger.info("Creating new browser context")
             
-            # Close current context
-            if self.context and not self.context.is_closed():
-                await self.context.close()
-            
-            # Create new context with different settings
-            self.context = await self.browser.new_context(
+            # Replace the context (only this worker's, inside the pipeline) with different settings
+            await self._fresh_context(
                 viewport={'width': random.randint(1200, 1400), 'height': random.randint(800, 900)},
                 user_agent=config.get_random_user_agent(),
                 locale='zh-CN',
@@ -925,14 +1557,6 @@ class JDAutoBuyer:
                 has_touch=random.choice([True, False])
             )
             
-            # Load cookies
-            await self._load_cookies()
-            
-            # Create new page
-            self.page = await self.context.new_page()
-            self.page.set_default_navigation_timeout(config.navigation_timeout)
-            self.page.set_default_timeout(config.action_timeout)
-            
             # Add simulated user gesture
             await self.page.evaluate("""
             () => {
@@ -947,8 +1571,10 @@ class JDAutoBuyer:
             """)
             
             # Try accessing the URL
-            response = await self.page.goto(url, wait_until="domcontentloaded")
+            response = await self._goto(url, wait_until="domcontentloaded")
             return response.status != 403
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"Error creating new context: {str(e)}")
             return False
@@ -974,8 +1600,10 @@ class JDAutoBuyer:
             })
             
             # Try accessing with mobile configuration
-            response = await self.page.goto(mobile_url, wait_until="domcontentloaded")
+            response = await self._goto(mobile_url, wait_until="domcontentloaded")
             return response.status != 403
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"Error retrying with mobile agent: {str(e)}")
             return False
@@ -983,10 +1611,10 @@ class JDAutoBuyer:
     async def _try_direct_cart_access(self) -> bool:
         """Try direct access to cart URL with 403 handling"""
         try:
-            logger.info(f"Trying direct cart access: {config.cart_url}")
+            logger.debug("Trying direct cart access: {}", config.cart_url)
             
             # Use response object to check for status codes
-            response = await self.page.goto(config.cart_url, wait_until="domcontentloaded")
+            response = await self._goto(config.cart_url, wait_until="domcontentloaded")
             
             # Check for 403 error by status code
             if response.status == 403:
@@ -1034,6 +1662,8 @@ class JDAutoBuyer:
             logger.warning("Direct cart access failed - unknown page structure")
             return False
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error in direct cart access: {str(e)}")
             return False
@@ -1058,7 +1688,7 @@ class JDAutoBuyer:
                 try:
                     cart_element = await self.page.query_selector(selector)
                     if cart_element:
-                        logger.info(f"Found cart element with selector: {selector}")
+                        logger.debug("Found cart element with selector: {}", selector)
                         # Hover first (more human-like)
                         await cart_element.hover()
                         await asyncio.sleep(random.uniform(0.3, 0.8))
@@ -1078,6 +1708,8 @@ class JDAutoBuyer:
                             logger.info("Successfully navigated to cart via homepage link (empty cart)")
                             await self.page.screenshot(path=f"{config.screenshots_dir}/cart_empty_via_link.png")
                             return True
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
                     logger.warning(f"Error with cart selector {selector}: {str(e)}")
                     continue
@@ -1085,6 +1717,8 @@ class JDAutoBuyer:
             logger.warning("No working cart link found on homepage")
             return False
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error accessing cart via homepage: {str(e)}")
             return False
@@ -1106,7 +1740,7 @@ class JDAutoBuyer:
                 try:
                     mini_cart = await self.page.query_selector(trigger)
                     if mini_cart:
-                        logger.info(f"Found mini cart trigger with selector: {trigger}")
+                        logger.debug("Found mini cart trigger with selector: {}", trigger)
                         # Hover to trigger the dropdown
                         await mini_cart.hover()
                         await asyncio.sleep(random.uniform(1.0, 2.0))
@@ -1123,7 +1757,7 @@ class JDAutoBuyer:
                             try:
                                 cart_link = await self.page.query_selector(link_selector)
                                 if cart_link:
-                                    logger.info(f"Found cart link in dropdown: {link_selector}")
+                                    logger.debug("Found cart link in dropdown: {}", link_selector)
                                     await cart_link.click()
                                     await asyncio.sleep(config.wait_after_navigation)
                                     
@@ -1140,14 +1774,20 @@ class JDAutoBuyer:
                                         logger.info("Successfully navigated to cart via mini cart popup (empty cart)")
                                         await self.page.screenshot(path=f"{config.screenshots_dir}/cart_empty_via_popup.png")
                                         return True
+                            except DeadlineExceeded:
+                                raise
                             except Exception:
                                 continue
+                except DeadlineExceeded:
+                    raise
                 except Exception:
                     continue
             
             logger.warning("Mini cart popup access failed")
             return False
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error accessing cart via mini cart: {str(e)}")
             return False
@@ -1164,8 +1804,8 @@ class JDAutoBuyer:
             ]
             
             for url in alternate_urls:
-                logger.info(f"Trying alternative cart URL: {url}")
-                await self.page.goto(url)
+                logger.debug("Trying alternative cart URL: {}", url)
+                await self._goto(url)
                 await asyncio.sleep(config.wait_after_navigation)
                 
                 # Check for 403 error
@@ -1196,6 +1836,8 @@ class JDAutoBuyer:
             logger.warning("All alternative cart URLs failed")
             return False
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error trying alternative cart URLs: {str(e)}")
             return False
@@ -1216,8 +1858,9 @@ class JDAutoBuyer:
             original_user_agent = await self.page.evaluate('() => navigator.userAgent')
             await self.context.clear_cookies()  # Clear cookies to avoid detection
             
-            # Create a new mobile context
-            mobile_context = await self.browser.new_context(
+            # Create a new mobile context (the mobile page runs its own verification check below)
+            mobile_context = await self._create_context(
+                watch_verification=False,
                 viewport={'width': 375, 'height': 812},
                 user_agent=random.choice(mobile_agents),
                 is_mobile=True,
@@ -1226,11 +1869,11 @@ class JDAutoBuyer:
             
             try:
                 # Load cookies into the mobile context
-                with open(config.cookies_path, 'r') as f:
-                    cookies = json.load(f)
-                    await mobile_context.add_cookies(cookies)
+                if self.cookie_store.cookies:
+                    await mobile_context.add_cookies(self.cookie_store.cookies)
                 
-                mobile_page = await mobile_context.new_page()
+                # Through the page-slot limit like every other page
+                mobile_page = await self._new_page(mobile_context)
                 
                 # Try several mobile cart URLs
                 mobile_urls = [
@@ -1241,8 +1884,8 @@ class JDAutoBuyer:
                 ]
                 
                 for url in mobile_urls:
-                    logger.info(f"Trying mobile cart URL: {url}")
-                    await mobile_page.goto(url, wait_until="domcontentloaded")
+                    logger.debug("Trying mobile cart URL: {}", url)
+                    await self._goto(url, page=mobile_page, wait_until="domcontentloaded")
                     await asyncio.sleep(random.uniform(2.0, 3.0))
                     
                     # Check if we need verification
@@ -1272,7 +1915,7 @@ class JDAutoBuyer:
                                 await mobile_context.close()
                                 
                                 # Try to use the same URL in our main desktop browser
-                                await self.page.goto(mobile_cart_url)
+                                await self._goto(mobile_cart_url)
                                 await asyncio.sleep(config.wait_after_navigation)
                                 
                                 # If desktop version automatically redirects to cart, great!
@@ -1285,8 +1928,10 @@ class JDAutoBuyer:
                                 logger.info(f"Found working mobile cart URL: {mobile_cart_url}")
                                 await self.page.screenshot(path=f"{config.screenshots_dir}/mobile_cart_to_desktop.png")
                                 return True
+                        except DeadlineExceeded:
+                            raise
                         except Exception as e:
-                            logger.debug(f"Error checking mobile indicator {indicator}: {str(e)}")
+                            logger.debug("Error checking mobile indicator {}: {}", indicator, e)
                 
                 await mobile_context.close()
                 return False
@@ -1305,93 +1950,336 @@ class JDAutoBuyer:
                 except Exception:
                     pass
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error trying mobile cart access: {str(e)}")
             return False
 
+    @operation_deadline('checkout')
     async def checkout(self) -> bool:
-        """Process checkout from cart"""
+        """Process checkout from cart
+        
+        After a confirmed add to cart the fast path (cart API + settlement URL) is tried
+        first; the cart page flow is the fallback. Both paths are timed in the run report.
+        """
         try:
             # Ensure page is available
             if not await self._ensure_page_available():
                 return False
-
-            # Navigate to cart using our improved method
-            if not await self.navigate_to_cart():
-                logger.error("Failed to navigate to cart for checkout")
-                return False
             
-            # Check if cart has items
-            empty_cart = await self.page.query_selector('.empty-cart')
-            if empty_cart:
-                logger.error("Cart is empty, nothing to checkout")
-                return False
-                
-            # Add random human-like delay
-            random_delay = random.uniform(0.5, 2.0)
-            await asyncio.sleep(random_delay)
-            
-            # Select all items
-            select_all = await self.page.query_selector('.jdcheckbox')
-            if select_all:
-                await select_all.click()
-                await asyncio.sleep(0.5)
-                
-            # Click checkout button
-            checkout_btn = await self.page.query_selector('.common-submit-btn')
-            if not checkout_btn:
-                logger.error("Checkout button not found")
+            if config.checkout_fast_path and self._cart_confirmed and config.site_mode != 'mobile':
+                start = time.perf_counter()
+                if await self._checkout_fast_path():
+                    self.metrics.incr('checkout.fast_path')
+                    self.metrics.observe('checkout.fast_path', time.perf_counter() - start)
+                    return True
+                self.metrics.incr('checkout.fast_path_fallback')
+                logger.info("Checkout fast path failed, falling back to the cart page")
+            
+            start = time.perf_counter()
+            result = await self._checkout_via_cart()
+            if result:
+                self.metrics.incr('checkout.cart_page')
+                self.metrics.observe('checkout.cart_page', time.perf_counter() - start)
+            return result
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error during checkout: {str(e)}")
+            return False
+
+    async def _checkout_via_cart(self) -> bool:
+        """Full checkout through the cart page"""
+        # Navigate to cart using our improved method
+        if not await self.navigate_to_cart():
+            logger.error("Failed to navigate to cart for checkout")
+            return False
+        
+        if config.site_mode == 'mobile':
+            return await self._checkout_mobile()
+        
+        return await self._checkout_from_cart_page()
+
+    async def _checkout_fast_path(self, page: Optional[Page] = None) -> bool:
+        """Select every cart item through the cart API and open the settlement page directly"""
+        page = page or self.page
+        try:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(config.cart_select_api_url)
+            response = await self.context.request.post(
+                config.cart_select_api_url,
+                form={
+                    'functionId': config.cart_select_function,
+                    'appid': 'JDC_mall_cart',
+                    'loginType': '3',
+                    'body': json.dumps({'serInfo': {'area': config.stock_area}})
+                },
+                headers={'Referer': 'https://cart.jd.com/', 'Origin': 'https://cart.jd.com'},
+                timeout=remaining_ms(config.action_timeout)
+            )
+            if self.rate_limiter:
+                self.rate_limiter.record_status(config.cart_select_api_url, response.status)
+            data = await response.json() if response.ok else {}
+            if not data.get('success'):
+                logger.warning(f"Cart select API did not succeed (HTTP {response.status})")
                 return False
-                
-            await checkout_btn.click()
-            
-            # Wait for checkout page
-            await self.page.wait_for_selector('.order-submit')
             
-            # Take screenshot of order page
-            await self.page.screenshot(path=f"{config.screenshots_dir}/checkout.png")
-            
-            # Submit order (commented out for safety - uncomment to enable actual ordering)
-            # submit_btn = await self.page.query_selector('.order-submit .btn-submit')
-            # if submit_btn:
-            #     await submit_btn.click()
-            #     await self.page.wait_for_selector('.pay-info')
-            #     await self.page.screenshot(path=f"{config.screenshots_dir}/order_placed.png")
-            
-            logger.info("Checkout process completed. Ready for order submission.")
+            await self._goto(config.order_url, page=page, wait_until="domcontentloaded")
+            await self._wait_for_selector('.order-submit', page=page)
+            await page.screenshot(path=f"{config.screenshots_dir}/checkout.png")
+            logger.info("Checkout process completed via fast path. Ready for order submission.")
             logger.warning("Order submission is disabled by default for safety. Edit the code to enable.")
             return True
-            
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.error(f"Error during checkout: {str(e)}")
+            logger.warning(f"Checkout fast path failed: {str(e)}")
             return False
 
-    async def run(self):
-        """Run the complete shopping process"""
+    async def _checkout_from_cart_page(self, page: Optional[Page] = None) -> bool:
+        """Select all items on a loaded desktop cart page and continue to the order page"""
+        page = page or self.page
+        
+        # Check if cart has items
+        empty_cart = await page.query_selector('.empty-cart')
+        if empty_cart:
+            logger.error("Cart is empty, nothing to checkout")
+            return False
+            
+        # Add random human-like delay
+        random_delay = random.uniform(0.5, 2.0)
+        await asyncio.sleep(random_delay)
+        
+        # Select all items
+        select_all = await page.query_selector('.jdcheckbox')
+        if select_all:
+            await select_all.click()
+            await asyncio.sleep(0.5)
+            
+        # Click checkout button
+        checkout_btn = await page.query_selector('.common-submit-btn')
+        if not checkout_btn:
+            logger.error("Checkout button not found")
+            return False
+            
+        await checkout_btn.click()
+        
+        # Wait for checkout page
+        await self._wait_for_selector('.order-submit', page=page)
+        
+        # Take screenshot of order page
+        await page.screenshot(path=f"{config.screenshots_dir}/checkout.png")
+        
+        # Submit order (commented out for safety - uncomment to enable actual ordering)
+        # submit_btn = await page.query_selector('.order-submit .btn-submit')
+        # if submit_btn:
+        #     await submit_btn.click()
+        #     await page.wait_for_selector('.pay-info')
+        #     await page.screenshot(path=f"{config.screenshots_dir}/order_placed.png")
+        
+        logger.info("Checkout process completed. Ready for order submission.")
+        logger.warning("Order submission is disabled by default for safety. Edit the code to enable.")
+        return True
+
+    async def _checkout_mobile(self) -> bool:
+        """Continue from the mobile cart to the mobile order page, without submitting"""
+        page = await self._site_page()
+        if await page.query_selector(MOBILE_EMPTY_CART_SELECTOR):
+            logger.error("Cart is empty, nothing to checkout")
+            return False
+        
+        checkout_btn = await page.query_selector(MOBILE_CHECKOUT_SELECTOR)
+        if not checkout_btn:
+            logger.error("Checkout button not found on mobile cart")
+            return False
+        await asyncio.sleep(random.uniform(0.5, 2.0))
+        await checkout_btn.click()
+        
+        await self._wait_for_selector(MOBILE_ORDER_SELECTOR, page=page)
+        await page.screenshot(path=f"{config.screenshots_dir}/mobile_checkout.png")
+        logger.info("Checkout process completed. Ready for order submission.")
+        logger.warning("Order submission is disabled by default for safety. Edit the code to enable.")
+        return True
+
+    async def run_pipeline(self, keywords: List[str], shards: int = 1) -> List[Dict]:
+        """Search, select, add to cart and prepare checkout for keywords as a staged pipeline
+        
+        With shards > 1 the searches run in that many worker processes and their results
+        stream into the pipeline as they arrive.
+        """
+        pipeline = PurchasePipeline(
+            self,
+            config.product_selection_strategy,
+            search_workers=config.pipeline_search_workers,
+            cart_workers=config.pipeline_cart_workers,
+            queue_size=config.pipeline_queue_size,
+            prepare_checkout=config.prepare_checkout,
+            journal=self.journal
+        )
+        self.metrics.add_section('pipeline', pipeline.report)
+        # Keywords the journal already has results for are not searched again anywhere
+        sharded = [keyword for keyword in keywords if not (self.journal and self.journal.done('search', keyword))]
+        if shards > 1 and sharded:
+            # The shards start from this session's cookies
+            await self.cookie_store.flush()
+            coordinator = ShardCoordinator(sharded, shards)
+            self.metrics.add_section('shards', coordinator.stats)
+            return await pipeline.run(keywords, self._shard_results(coordinator), streamed=sharded)
+        return await pipeline.run(keywords)
+
+    async def _shard_results(self, coordinator: ShardCoordinator):
+        """The coordinator's results, with this process on one share of the host budget while the shards run"""
+        if self.rate_limiter:
+            self.rate_limiter.split(coordinator.shards + 1)
+        try:
+            async for result in coordinator.stream():
+                yield result
+        finally:
+            if self.rate_limiter:
+                self.rate_limiter.split(1)
+
+    async def run_watch(self, entries: List[str]):
+        """Log in, then watch SKUs and keywords and add to the cart when the watch rule fires"""
         try:
             await self.setup()
-            
             if not await self.login():
                 logger.error("Login failed, exiting")
                 return
+            
+            watchlist = Watchlist(
+                self,
+                parse_watch_entries(entries),
+                strategy=config.product_selection_strategy,
+                item_url=config.item_url,
+                interval=config.watch_interval,
+                min_interval=config.watch_min_interval,
+                max_interval=config.watch_max_interval,
+                requests_per_minute=config.watch_requests_per_minute,
+                search_cost=config.watch_search_cost,
+                max_price=config.max_price,
+                max_purchases=config.watch_max_purchases
+            )
+            self.metrics.add_section('watchlist', watchlist.stats)
+            await watchlist.run(config.watch_duration)
+            
+        except DeadlineExceeded as e:
+            logger.error(f"Watch aborted, {e.phase} ran out of time (in {e.active})")
+        except Exception as e:
+            logger.error(f"Error in watch mode: {str(e)}")
+        finally:
+            await self.close()
+
+    # Steps of a purchase on caller-owned pages, for ScheduledPurchase to stage ahead of time
+
+    async def open_page(self) -> Page:
+        """Open a page of the main context that the caller keeps and closes"""
+        return await self._new_page()
+
+    async def open_item_page(self, sku: str, page: Page):
+        """Load the desktop product page of sku; returns its add-to-cart control, or None"""
+        await self._goto(config.item_url.format(sku=sku), page=page)
+        return await self._find_add_to_cart_button(page)
+
+    async def open_cart_page(self, page: Page):
+        """Load the desktop cart page"""
+        await self._goto(config.cart_url, page=page)
+
+    async def click_add_to_cart(self, button, page: Page) -> bool:
+        """Click an add-to-cart control from open_item_page; returns whether the add was confirmed"""
+        await button.click()
+        confirmed = await self._wait_for_add_confirmation(page)
+        if confirmed:
+            self._cart_confirmed = True
+        return confirmed
+
+    async def checkout_prepared(self, page: Page) -> bool:
+        """Continue to the order page after click_add_to_cart, on a page opened beforehand"""
+        if config.checkout_fast_path and await self._checkout_fast_path(page):
+            return True
+        # The page may hold a cart loaded before the item was added, so it is reloaded
+        await self.open_cart_page(page)
+        return await self._checkout_from_cart_page(page)
+
+    async def run_scheduled(self, sku: str, at: str, cold: bool = False):
+        """Add sku to the cart at the given local time and continue to the order page"""
+        try:
+            purchase = ScheduledPurchase(
+                self,
+                sku,
+                parse_target_time(at),
+                prepare_before=config.schedule_prepare_before,
+                refresh_before=config.schedule_refresh_before,
+                cold=cold
+            )
+            self.metrics.add_section('scheduled_purchase', purchase.report)
+            await self.setup()
+            await purchase.run()
+            
+            # Keep the browser open on the order page
+            input("Press Enter to close the browser and exit: ")
+            
+        except DeadlineExceeded as e:
+            logger.error(f"Scheduled purchase aborted, {e.phase} ran out of time (in {e.active})")
+        except Exception as e:
+            logger.error(f"Error in scheduled purchase: {str(e)}")
+        finally:
+            await self.close()
+
+    async def run(self, shards: int = 1):
+        """Run the complete shopping process, searching in shards processes when more than one"""
+        try:
+            # Everything up to handing the session over to the user shares one budget
+            async with deadline('run', config.run_budget):
+                await self.setup()
+                
+                if config.run_journal and config.auto_purchase:
+                    self.journal = RunJournal(
+                        config.run_journal_path,
+                        flush_interval=config.run_journal_flush_interval,
+                        batch_size=config.run_journal_batch_size,
+                        max_age=config.run_journal_max_age
+                    )
+                    self.metrics.add_section('journal', self.journal.stats)
+                    await self.journal.start(config.search_keywords, resume=config.resume_run)
+                
+                if not await self.login():
+                    logger.error("Login failed, exiting")
+                    return
+                
+                if self.journal and self.journal.done('login'):
+                    logger.info("Logged in again, continuing the interrupted run")
+                else:
+                    # Navigate to homepage
+                    logger.info("Successfully logged in, navigating to homepage")
+                    await self._goto(config.homepage_url)
+                    await self.page.screenshot(path=f"{config.screenshots_dir}/homepage.png")
+                    logger.info("Now on homepage. Session is active.")
+                    if self.journal:
+                        await self.journal.record('login')
                 
-            # Navigate to homepage
-            logger.info("Successfully logged in, navigating to homepage")
-            await self.page.goto(config.homepage_url)
-            await self.page.screenshot(path=f"{config.screenshots_dir}/homepage.png")
-            logger.info("Now on homepage. Session is active.")
+                if config.auto_purchase and config.search_keywords:
+                    await self.run_pipeline(config.search_keywords, shards=shards)
+                    # Only a run whose pipeline finished is complete; anything earlier is resumed next time
+                    if self.journal:
+                        await self.journal.finish()
             
             # Keep the browser open
             user_input = input("Press Enter to close the browser and exit: ")
             
+        except DeadlineExceeded as e:
+            logger.error(f"Run aborted, {e.phase} ran out of time (in {e.active})")
         except Exception as e:
             logger.error(f"Error in process: {str(e)}")
         finally:
             await self.close()
 
 
-async def main():
-    """Main entry point"""
+async def main(watch: Optional[List[str]] = None, schedule: Optional[Dict] = None, shards: int = 1):
+    """Main entry point; watch is the list of items to watch in watch mode,
+    schedule the sku/at/cold options of a scheduled purchase, shards the number of
+    search processes"""
     logger.info("Starting JD Auto Buyer")
     
     # Validate credentials
@@ -1400,6 +2288,13 @@ async def main():
     else:
         logger.warning("Username or password not set in environment variables. QR code login will be required.")
     
+    if watch is not None:
+        await JDAutoBuyer().run_watch(watch or config.watch_items)
+        return
+    if schedule:
+        await JDAutoBuyer().run_scheduled(**schedule)
+        return
+    
     # Check if there are food keywords to search
     if not config.search_keywords:
         logger.warning("No search keywords defined in config. Please add keywords to search.")
@@ -1410,19 +2305,46 @@ async def main():
             logger.error("No keywords provided. Exiting.")
             return
     
+    if shards > 1 and not config.auto_purchase:
+        logger.warning("--shards only applies to the purchase pipeline, set AUTO_PURCHASE=True to use it")
+    
     # Create and run the auto buyer
     buyer = JDAutoBuyer()
-    await buyer.run()
+    await buyer.run(shards=shards)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JD Auto Buyer")
+    har_group = parser.add_mutually_exclusive_group()
+    har_group.add_argument("--record", metavar="HAR", help="record the session's network traffic to a HAR file")
+    har_group.add_argument("--replay", metavar="HAR", help="serve all network traffic from a recorded HAR file (offline run)")
+    parser.add_argument("--watch", nargs="*", metavar="ITEM",
+                        help="watch SKUs/keywords (sku[:price] or keyword[:price], default WATCH_ITEMS) and add to cart when the price rule fires")
+    parser.add_argument("--at", metavar="TIME", help="scheduled purchase time (HH:MM[:SS] or YYYY-mm-dd HH:MM:SS, local clock), requires --sku")
+    parser.add_argument("--sku", help="SKU to buy at --at")
+    parser.add_argument("--cold", action="store_true", help="do not prepare before --at (baseline for comparison)")
+    parser.add_argument("--shards", type=int, default=1, metavar="N",
+                        help="search the keywords in N processes, each with its own browser (requires AUTO_PURCHASE)")
+    parser.add_argument("--fresh", action="store_true", help="ignore the journal of an interrupted run and start over")
+    parser.add_argument("--profile", action="store_true",
+                        help="sample the Python stack into a flamegraph file and report event loop blocking calls")
+    args = parser.parse_args()
+    if bool(args.at) != bool(args.sku):
+        parser.error("--at and --sku must be used together")
+    if args.shards > 1 and (args.record or args.replay or args.watch is not None or args.at):
+        parser.error("--shards cannot be combined with --record, --replay, --watch or --at")
+    config.har_record_path = args.record
+    config.har_replay_path = args.replay
+    config.resume_run = not args.fresh
+    
     # Configure logger
-    logger.add(
-        "jd_auto_buyer.log",
-        rotation="10 MB",
-        retention="1 week",
-        level="INFO"
-    )
+    configure_logging("jd_auto_buyer.log", level=config.log_level, structured=config.structured_logging)
     
     # Run the main function
-    asyncio.run(main())
\ No newline at end of file
+    schedule = {"sku": args.sku, "at": args.at, "cold": args.cold} if args.at else None
+    if args.profile:
+        run_profiled(main(watch=args.watch, schedule=schedule, shards=args.shards), config.reports_dir,
+                     interval=config.profile_sample_interval, slow_callback_duration=config.slow_callback_duration,
+                     log_level=config.log_level)
+    else:
+        asyncio.run(main(watch=args.watch, schedule=schedule, shards=args.shards))
\ No newline at end of file
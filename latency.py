@@ -0,0 +1,137 @@
+import json
+import os
+import re
+from collections import deque
+from typing import Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+_NUMBER = re.compile(r"\d+")
+
+
+def url_class(url: str) -> str:
+    """Collapse a URL into a class: host plus path with numbers replaced, no query
+
+    e.g. https://item.jd.com/100012043978.html -> item.jd.com/{n}.html
+    """
+    parts = urlsplit(url)
+    return f"{parts.netloc}{_NUMBER.sub('{n}', parts.path) or '/'}"
+
+
+class LatencyStats:
+    """Latency history of one URL class"""
+
+    def __init__(self, window: int, samples=(), ewma: Optional[float] = None, timeouts: int = 0):
+        self.samples: Deque[float] = deque(samples, maxlen=window)
+        self.ewma = ewma
+        self.timeouts = timeouts
+        # Timeouts since the last success in this run
+        self.streak = 0
+
+    def add(self, ms: float, alpha: float):
+        self.samples.append(ms)
+        self.ewma = ms if self.ewma is None else alpha * ms + (1 - alpha) * self.ewma
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile of the recorded samples"""
+        ordered = sorted(self.samples)
+        index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+
+class LatencyTracker:
+    """Learns per-URL-class latencies and derives timeouts from them
+
+    timeout = p99 x factor, clamped between floor and ceiling and never above the
+    caller's default, so learning only ever shortens a wait. Until a class has
+    min_samples observations the default is used. A timed out step is recorded as a
+    censored sample at the time it waited (the real latency was at least that), and
+    every timeout since the class's last success in this run doubles its timeout (up
+    to the default), so a slow class is not cut short again and again by a stale
+    estimate. Histories are persisted between runs, timeout streaks are not.
+    """
+
+    def __init__(self, path: str, factor: float = 3.0, floor: float = 2000, ceiling: float = 60000,
+                 min_samples: int = 5, window: int = 200, alpha: float = 0.2):
+        self.path = path
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.window = window
+        self.alpha = alpha
+        self.stats: Dict[str, LatencyStats] = {}
+        self.load()
+
+    def _get(self, key: str) -> LatencyStats:
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = LatencyStats(self.window)
+        return stats
+
+    def record(self, key: str, ms: float):
+        """Record the latency of a successful step"""
+        stats = self._get(key)
+        stats.add(ms, self.alpha)
+        stats.streak = 0
+
+    def record_timeout(self, key: str, ms: float):
+        """Record a step that timed out after waiting ms"""
+        stats = self._get(key)
+        stats.add(ms, self.alpha)
+        stats.timeouts += 1
+        stats.streak += 1
+
+    def timeout_for(self, key: str, default: float) -> float:
+        """Adaptive timeout in milliseconds for key, or default while history is too short"""
+        stats = self.stats.get(key)
+        if not stats or len(stats.samples) < self.min_samples:
+            return default
+        learned = max(self.floor, stats.percentile(99) * self.factor * 2 ** stats.streak)
+        return min(self.ceiling, default, learned)
+
+    def estimates(self) -> Dict[str, Dict]:
+        """Current per-class estimates for the run report"""
+        result = {}
+        for key, stats in sorted(self.stats.items()):
+            if not stats.samples:
+                result[key] = {"samples": 0, "timeouts": stats.timeouts}
+                continue
+            result[key] = {
+                "samples": len(stats.samples),
+                "timeouts": stats.timeouts,
+                "ewma_ms": round(stats.ewma, 1),
+                "p50_ms": round(stats.percentile(50), 1),
+                "p99_ms": round(stats.percentile(99), 1),
+                # Before the cap at each caller's default
+                "timeout_ms": round(self.timeout_for(key, self.ceiling)) if len(stats.samples) >= self.min_samples else None,
+            }
+        return result
+
+    def load(self):
+        """Load persisted histories, ignoring a missing or unreadable file"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, item in data.items():
+                self.stats[key] = LatencyStats(self.window, item.get("samples", []), item.get("ewma"), item.get("timeouts", 0))
+        except Exception as e:
+            logger.warning(f"Could not load latency history: {str(e)}")
+
+    def save(self):
+        """Persist histories for the next run"""
+        data = {
+            key: {"samples": list(stats.samples), "ewma": stats.ewma, "timeouts": stats.timeouts}
+            for key, stats in self.stats.items()
+        }
+        # Written aside and renamed, so an interrupted save leaves the previous history intact
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save latency history: {str(e)}")
@@ -0,0 +1,118 @@
+import logging
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable
+
+from loguru import logger
+
+# Console message types logged at warning level, everything else goes to debug
+_WARNING_TYPES = {"error", "warning", "assert"}
+
+# Distinct console texts tracked for repeat counting, bounds memory on chatty pages
+_MAX_TRACKED_TEXTS = 2000
+
+
+def configure_logging(log_path: str, level: str = "INFO", structured: bool = False):
+    """Configure loguru sinks
+
+    Structured mode replaces the default sinks with enqueued ones (formatting and I/O
+    happen on loguru's writer thread, not the event loop) and writes the file as JSON
+    lines.
+    """
+    if structured:
+        logger.remove()
+        logger.add(sys.stderr, level=level, enqueue=True)
+        logger.add(log_path, level=level, serialize=True, enqueue=True, rotation="10 MB", retention="1 week")
+    else:
+        logger.add(log_path, rotation="10 MB", retention="1 week", level=level)
+
+
+def intercept_stdlib_logging(level: str = "INFO"):
+    """Route records of stdlib logging users (asyncio) at level and above into loguru's sinks"""
+    # loguru's standard levels share the stdlib's numbers
+    logging.basicConfig(handlers=[InterceptHandler()], level=logger.level(level).no, force=True)
+
+
+class InterceptHandler(logging.Handler):
+    """Forwards stdlib logging records (asyncio's slow callback and debug reports) to loguru"""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        # Report the caller of the logging call, not the logging module itself
+        frame, depth = logging.currentframe(), 2
+        while frame and frame.f_code.co_filename == logging.__file__:
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+class ConsoleMessageFilter:
+    """Decides which browser console messages reach the log and counts the rest
+
+    Registered as the page "console" listener. Messages are filtered by type, each
+    distinct text is logged at most repeat_limit times, and a token bucket caps the
+    overall rate. Everything dropped is only counted, for the run report.
+    """
+
+    def __init__(self, types: Iterable[str], rate: float, burst: int, repeat_limit: int):
+        self.types = set(types)
+        self.rate = rate
+        self.burst = burst
+        self.repeat_limit = repeat_limit
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self.total = 0
+        self.logged = 0
+        self.rate_limited = 0
+        self.repeats_suppressed = 0
+        self.by_type: Counter = Counter()
+        self.repeats: Counter = Counter()
+
+    def __call__(self, message):
+        self.total += 1
+        message_type = message.type
+        self.by_type[message_type] += 1
+        if message_type not in self.types:
+            return
+
+        text = message.text
+        if text in self.repeats or len(self.repeats) < _MAX_TRACKED_TEXTS:
+            self.repeats[text] += 1
+            if self.repeats[text] > self.repeat_limit:
+                self.repeats_suppressed += 1
+                return
+
+        if not self._take_token():
+            self.rate_limited += 1
+            return
+
+        self.logged += 1
+        level = "WARNING" if message_type in _WARNING_TYPES else "DEBUG"
+        logger.log(level, "Browser console [{}]: {}", message_type, text)
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def summary(self) -> Dict:
+        """Per-run counters for the run report"""
+        return {
+            "total": self.total,
+            "logged": self.logged,
+            "rate_limited": self.rate_limited,
+            "repeats_suppressed": self.repeats_suppressed,
+            "by_type": dict(self.by_type),
+            "most_repeated": [
+                {"text": text[:200], "count": count}
+                for text, count in self.repeats.most_common(10) if count > 1
+            ],
+        }
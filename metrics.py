@@ -0,0 +1,58 @@
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from loguru import logger
+
+
+class RunMetrics:
+    """Collects measurements for a single run and writes them to a JSON report
+
+    Components register a section provider; providers are only evaluated when the
+    report is built, so registering one costs nothing on the hot path.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters: Counter = Counter()
+        self.timings: Counter = Counter()  # name -> total seconds
+        self.first_timings: Dict[str, float] = {}  # name -> seconds of the first observation
+        self._sections: Dict[str, Callable[[], Any]] = {}
+
+    def incr(self, name: str, amount: int = 1):
+        """Increment a named counter"""
+        self.counters[name] += amount
+
+    def observe(self, name: str, seconds: float):
+        """Add a duration to a named total"""
+        self.timings[name] += seconds
+        self.first_timings.setdefault(name, seconds)
+
+    def add_section(self, name: str, provider: Callable[[], Any]):
+        """Register a callable returning JSON-serializable data for the report"""
+        self._sections[name] = provider
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Build the report dictionary"""
+        report = {
+            "started_at": self.started_at,
+            "duration": round(time.time() - self.started_at, 3),
+            "counters": dict(self.counters),
+            "timings": {name: round(seconds, 3) for name, seconds in self.timings.items()},
+        }
+        for name, provider in self._sections.items():
+            try:
+                report[name] = provider()
+            except Exception as e:
+                logger.warning(f"Could not collect metrics section {name}: {str(e)}")
+        return report
+
+    def write(self, directory: str) -> Path:
+        """Write the report as JSON into directory and return its path"""
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        path = Path(directory) / f"run_{time.strftime('%Y%m%d_%H%M%S', time.localtime(self.started_at))}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2, default=str)
+        return path
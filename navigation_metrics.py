@@ -0,0 +1,135 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from playwright.async_api import CDPSession, Page
+from loguru import logger
+
+from latency import url_class
+
+# Read in the page through CDP rather than page.evaluate so the collection itself
+# does not show up in the per-method Playwright call profile
+NAVIGATION_TIMING_SCRIPT = """
+(() => {
+    const n = performance.getEntriesByType('navigation')[0];
+    if (!n) return null;
+    const span = (start, end) => (start > 0 && end >= start) ? end - start : null;
+    return {
+        dns_ms: span(n.domainLookupStart, n.domainLookupEnd),
+        connect_ms: span(n.connectStart, n.connectEnd),
+        ttfb_ms: span(n.requestStart, n.responseStart),
+        download_ms: span(n.responseStart, n.responseEnd),
+        dom_content_loaded_ms: n.domContentLoadedEventEnd > 0 ? n.domContentLoadedEventEnd - n.startTime : null,
+        load_ms: n.loadEventEnd > 0 ? n.loadEventEnd - n.startTime : null,
+        transfer_bytes: n.transferSize,
+    };
+})()
+"""
+
+# Performance.getMetrics counters reported per navigation; cumulative ones are
+# turned into deltas since the previous navigation of the same page
+_GAUGES = {"JSHeapUsedSize": "js_heap_used_bytes", "Nodes": "dom_nodes"}
+_CUMULATIVE = {
+    "LayoutCount": "layout_count",
+    "RecalcStyleCount": "recalc_style_count",
+    "ScriptDuration": "script_ms",
+    "LayoutDuration": "layout_ms",
+    "RecalcStyleDuration": "recalc_style_ms",
+    "TaskDuration": "task_ms",
+}
+# Reported by Chromium in seconds
+_SECONDS = {"ScriptDuration", "LayoutDuration", "RecalcStyleDuration", "TaskDuration"}
+
+# Summed per operation in the report
+_TOTALS = ["goto_ms", "ttfb_ms", "download_ms", "script_ms", "layout_ms", "task_ms", "layout_count"]
+
+
+class NavigationMetrics:
+    """Chromium-side metrics for every navigation, attributed to the running operation
+
+    After each goto the page's CDP session is asked for Performance.getMetrics and the
+    navigation timing entry. Entries are grouped by operation (the current deadline
+    phase) so a slow operation can be split into network, script and everything else,
+    which is mostly our own sleeps.
+    """
+
+    def __init__(self, max_entries: int = 500):
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.failures = 0
+        self._sessions: Dict[Page, CDPSession] = {}
+        self._previous: Dict[Page, Dict[str, float]] = {}
+
+    async def _session(self, page: Page) -> CDPSession:
+        session = self._sessions.get(page)
+        if session is None:
+            session = await page.context.new_cdp_session(page)
+            await session.send("Performance.enable")
+            self._sessions[page] = session
+            page.on("close", self._forget)
+        return session
+
+    def _forget(self, page: Page):
+        self._sessions.pop(page, None)
+        self._previous.pop(page, None)
+
+    async def collect(self, page: Page, url: str, operation: Optional[str], goto_ms: float):
+        """Record the metrics of the navigation that just finished on page"""
+        try:
+            session = await self._session(page)
+            result = await session.send("Performance.getMetrics")
+            timing = await session.send("Runtime.evaluate", {
+                "expression": NAVIGATION_TIMING_SCRIPT,
+                "returnByValue": True,
+            })
+        except Exception as e:
+            self.failures += 1
+            logger.debug(f"Could not collect navigation metrics for {url}: {str(e)}")
+            return
+
+        raw = {metric["name"]: metric["value"] for metric in result.get("metrics", [])}
+        previous = self._previous.get(page, {})
+        self._previous[page] = raw
+
+        entry: Dict[str, Any] = {
+            "at": round(time.time(), 3),
+            "operation": operation or "none",
+            "url_class": url_class(url),
+            "goto_ms": round(goto_ms, 1),
+        }
+        entry.update((timing.get("result") or {}).get("value") or {})
+        for name, key in _GAUGES.items():
+            if name in raw:
+                entry[key] = raw[name]
+        for name, key in _CUMULATIVE.items():
+            if name in raw:
+                value = raw[name] - previous.get(name, 0)
+                entry[key] = round(value * 1000, 1) if name in _SECONDS else value
+        self.entries.append(entry)
+
+        totals = self.totals.setdefault(entry["operation"], {"navigations": 0})
+        totals["navigations"] += 1
+        for key in _TOTALS:
+            if entry.get(key) is not None:
+                totals[key] = totals.get(key, 0) + entry[key]
+
+    def summary(self, timings: Optional[Dict[str, float]] = None) -> Dict:
+        """Per-operation totals and the most recent navigations for the run report
+
+        Given the run's timings (operation.<phase> wall seconds), the part of each
+        operation not spent navigating is reported as other_ms: waits for selectors,
+        clicks and our own sleeps.
+        """
+        operations = {}
+        for operation, totals in self.totals.items():
+            row = {key: round(value, 1) for key, value in totals.items()}
+            wall = (timings or {}).get(f"operation.{operation}")
+            if wall is not None:
+                row["operation_ms"] = round(wall * 1000, 1)
+                row["other_ms"] = round(max(0.0, wall * 1000 - totals.get("goto_ms", 0)), 1)
+            operations[operation] = row
+        return {
+            "operations": operations,
+            "failures": self.failures,
+            "navigations": list(self.entries),
+        }
@@ -0,0 +1,242 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from run_journal import RunJournal
+
+# End-of-stream marker passed between stages
+_DONE = object()
+
+
+class StageStats:
+    """Throughput and queue depth of one pipeline stage"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Depth of the stage's input queue, sampled whenever an item is queued for it
+        self.max_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+
+    def sample_depth(self, depth: int):
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_minute": round(self.processed / elapsed * 60, 2) if elapsed > 0 else None,
+            "max_queue_depth": self.max_depth,
+            "mean_queue_depth": round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0,
+        }
+
+
+class PurchasePipeline:
+    """search -> select -> add to cart -> checkout preparation, connected by bounded queues
+
+    Each stage has its own worker count, and the bounded queues apply backpressure
+    so a fast stage cannot run arbitrarily far ahead of a slow one. Stages that drive
+    the browser run every worker on its own page of the shared context, so the next
+    keyword's search runs while the previous product is being added to the cart.
+
+    With a run journal, each stage's output is recorded as it completes and stages
+    recorded by an interrupted attempt are reused instead of repeated. Checkout
+    preparation always runs again, since it leaves the browser on the order page.
+    Results searched elsewhere (sharded search) can be streamed in: each keyword
+    enters the pipeline as its results arrive and goes straight to selection. A
+    product selected for one keyword is not selected again for another.
+    """
+
+    def __init__(self, buyer, strategy: str, search_workers: int = 2, cart_workers: int = 1, queue_size: int = 4,
+                 prepare_checkout: bool = True, journal: Optional[RunJournal] = None):
+        self.buyer = buyer
+        self.journal = journal
+        # Results streamed in from elsewhere, by keyword
+        self.prefetched: Dict[str, List[Dict]] = {}
+        self._selected_ids: set = set()
+        self.strategy = strategy
+        self.queue_size = queue_size
+        self.prepare_checkout = prepare_checkout
+        self.stats = {
+            "search": StageStats("search", search_workers),
+            "select": StageStats("select", 1),
+            "cart": StageStats("cart", cart_workers),
+            "checkout": StageStats("checkout", 1),
+        }
+        self.carted: List[Dict] = []
+        self.checkout_ready = False
+
+    def report(self) -> Dict[str, Any]:
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    async def run(self, keywords: List[str], search_results: Optional[AsyncIterator[Tuple[str, List[Dict]]]] = None,
+                  streamed: Iterable[str] = ()) -> List[Dict]:
+        """Run every keyword through the pipeline and return the products added to the cart
+
+        search_results yields (keyword, products) for the keywords in streamed as they
+        are found; those keywords are fed in on arrival instead of being searched here.
+        """
+        search_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        select_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        cart_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        checkout_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        logger.info(f"Starting purchase pipeline for {len(keywords)} keywords")
+        feed = self._feed(keywords, search_queue) if search_results is None \
+            else self._feed_streamed(keywords, search_results, set(streamed), search_queue)
+        await asyncio.gather(
+            feed,
+            self._stage("search", search_queue, select_queue, self._search, own_page=True),
+            self._stage("select", select_queue, cart_queue, self._select),
+            self._stage("cart", cart_queue, checkout_queue, self._add_to_cart, own_page=True),
+            self._checkout_stage(checkout_queue),
+        )
+        logger.info(f"Pipeline finished: {len(self.carted)} products added to cart, checkout ready: {self.checkout_ready}")
+        return self.carted
+
+    async def _feed(self, keywords: List[str], outbox: asyncio.Queue, done: bool = True):
+        for keyword in keywords:
+            await outbox.put(keyword)
+            self.stats["search"].sample_depth(outbox.qsize())
+        if done:
+            await outbox.put(_DONE)
+
+    async def _feed_streamed(self, keywords: List[str], search_results: AsyncIterator[Tuple[str, List[Dict]]],
+                             streamed: set, outbox: asyncio.Queue):
+        await self._feed([keyword for keyword in keywords if keyword not in streamed], outbox, done=False)
+        arrived = set()
+        try:
+            async for keyword, products in search_results:
+                self.prefetched[keyword] = products
+                arrived.add(keyword)
+                await self._feed([keyword], outbox, done=False)
+        except Exception as e:
+            logger.error(f"Streamed search failed: {str(e)}")
+        # Keywords whose results never arrived (a failed shard) are searched here
+        await self._feed([keyword for keyword in keywords if keyword in streamed and keyword not in arrived], outbox)
+
+    async def _stage(self, name: str, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                     handler: Callable[[Any], Awaitable[Optional[Any]]], own_page: bool = False):
+        """Run the stage's workers until the input is exhausted, then close the output"""
+        stats = self.stats[name]
+        stats.started_at = time.perf_counter()
+        await asyncio.gather(*(
+            self._worker(stats, inbox, outbox, handler, own_page) for _ in range(stats.workers)
+        ))
+        stats.finished_at = time.perf_counter()
+        await outbox.put(_DONE)
+
+    async def _worker(self, stats: StageStats, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                      handler: Callable[[Any], Awaitable[Optional[Any]]], own_page: bool):
+        if own_page:
+            async with self.buyer.worker_page():
+                await self._work(stats, inbox, outbox, handler)
+        else:
+            await self._work(stats, inbox, outbox, handler)
+
+    async def _work(self, stats: StageStats, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                    handler: Callable[[Any], Awaitable[Optional[Any]]]):
+        downstream = self._downstream_stats(stats.name)
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                # Let sibling workers see the end of the stream too
+                inbox.put_nowait(_DONE)
+                return
+
+            start = time.perf_counter()
+            try:
+                result = await handler(item)
+            except Exception as e:
+                logger.error(f"Pipeline stage {stats.name} failed for {item}: {str(e)}")
+                result = None
+            stats.busy_seconds += time.perf_counter() - start
+
+            if result is None:
+                stats.failed += 1
+                continue
+            stats.processed += 1
+            await outbox.put(result)
+            downstream.sample_depth(outbox.qsize())
+
+    def _downstream_stats(self, name: str) -> StageStats:
+        order = ["search", "select", "cart", "checkout"]
+        return self.stats[order[order.index(name) + 1]]
+
+    async def _search(self, keyword: str) -> Optional[Dict]:
+        products = self.journal and self.journal.get("search", keyword)
+        if products:
+            logger.info(f"Reusing search results for {keyword} from the run journal")
+        else:
+            if keyword in self.prefetched:
+                products = self.prefetched.pop(keyword)
+            else:
+                products = await self.buyer.search_product(keyword)
+            if not products:
+                logger.warning(f"No products found for {keyword}")
+                return None
+            if self.journal:
+                await self.journal.record("search", keyword, products)
+        return {"keyword": keyword, "products": products}
+
+    async def _select(self, result: Dict) -> Optional[Dict]:
+        keyword = result["keyword"]
+        product = self.journal and self.journal.get("select", keyword)
+        if not product:
+            candidates = [p for p in result["products"] if p["id"] not in self._selected_ids]
+            product = self.buyer.select_product_by_strategy(candidates, self.strategy)
+            if not product:
+                return None
+            if self.journal:
+                await self.journal.record("select", keyword, product)
+        self._selected_ids.add(product["id"])
+        return {"keyword": keyword, "product": product}
+
+    async def _add_to_cart(self, selection: Dict) -> Optional[Dict]:
+        keyword, product = selection["keyword"], selection["product"]
+        if self.journal and self.journal.get("cart", keyword) == product["id"]:
+            logger.info(f"{product['name']} was already added to the cart in an earlier attempt")
+            return selection
+        if not await self.buyer.add_to_cart(product):
+            return None
+        if self.journal:
+            # Synced before moving on, re-adding after a crash is what the journal prevents
+            await self.journal.record("cart", keyword, product["id"], durable=True)
+        return selection
+
+    async def _checkout_stage(self, inbox: asyncio.Queue):
+        """Collect cart confirmations, then prepare checkout once for all of them"""
+        stats = self.stats["checkout"]
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                break
+            self.carted.append(item["product"])
+            if stats.started_at is None:
+                stats.started_at = time.perf_counter()
+
+        if self.carted and self.prepare_checkout:
+            start = time.perf_counter()
+            self.checkout_ready = await self.buyer.checkout()
+            stats.busy_seconds += time.perf_counter() - start
+            if self.journal:
+                await self.journal.record("checkout", value=self.checkout_ready)
+            if self.checkout_ready:
+                stats.processed += 1
+            else:
+                stats.failed += 1
+        stats.finished_at = time.perf_counter()
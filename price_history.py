@@ -0,0 +1,78 @@
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    sku TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    price REAL NOT NULL,
+    comments TEXT,
+    shop TEXT,
+    keyword TEXT
+);
+-- Covering index: every query below is answered from the index alone
+CREATE INDEX IF NOT EXISTS idx_observations_sku_time_price ON observations (sku, observed_at, price);
+"""
+
+
+class PriceHistory:
+    """Append-only, SKU-indexed store of every price observed in search results"""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _since(days: Optional[float]) -> float:
+        return time.time() - days * 86400 if days else 0.0
+
+    def record(self, keyword: str, products: Iterable[Dict], observed_at: Optional[float] = None) -> int:
+        """Append one observation per product with a SKU and a price, returns the number stored"""
+        observed_at = observed_at or time.time()
+        rows = [
+            (p['id'], observed_at, p['price'], p.get('comments'), p.get('shop'), keyword)
+            for p in products
+            if p.get('id') and p.get('price')
+        ]
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO observations (sku, observed_at, price, comments, shop, keyword) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not record price history: {str(e)}")
+            return 0
+        return len(rows)
+
+    def lowest_price(self, sku: str, days: Optional[float] = None) -> Optional[float]:
+        """Lowest price observed for sku in the last days (all time when days is None)"""
+        row = self.conn.execute(
+            "SELECT MIN(price) FROM observations WHERE sku = ? AND observed_at >= ?",
+            (sku, self._since(days))
+        ).fetchone()
+        return row[0]
+
+    def is_historical_low(self, sku: str, price: float, days: Optional[float] = None) -> bool:
+        """True when price is at or below everything observed for sku in the window"""
+        low = self.lowest_price(sku, days)
+        return low is not None and price <= low
+
+    def lowest_prices(self, skus: List[str], days: Optional[float] = None) -> Dict[str, float]:
+        """Lowest price per SKU for many SKUs in a single query"""
+        if not skus:
+            return {}
+        placeholders = ",".join("?" * len(skus))
+        rows = self.conn.execute(
+            f"SELECT sku, MIN(price) FROM observations WHERE sku IN ({placeholders}) AND observed_at >= ? GROUP BY sku",
+            (*skus, self._since(days))
+        ).fetchall()
+        return dict(rows)
@@ -0,0 +1,310 @@
+import asyncio
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Coroutine, Dict, Iterable, List, Optional, Tuple
+
+from playwright.async_api import BrowserContext, ElementHandle, Mouse, Page
+from loguru import logger
+
+from log_setup import intercept_stdlib_logging
+
+# Playwright calls that are counted, per class
+TRACKED_CALLS = {
+    Page: [
+        "goto", "query_selector", "query_selector_all", "wait_for_selector", "evaluate",
+        "click", "fill", "hover", "screenshot", "content", "set_extra_http_headers",
+        "set_viewport_size",
+    ],
+    ElementHandle: ["click", "fill", "hover", "screenshot", "text_content"],
+    Mouse: ["move", "click"],
+    BrowserContext: ["new_page", "cookies", "add_cookies", "clear_cookies", "close"],
+}
+
+# (profiler, method name) of the innermost profiled method running in the current task
+_current: ContextVar[Optional[Tuple["CallProfiler", str]]] = ContextVar("profiled_method", default=None)
+
+_patched: Dict[Tuple[type, str], Any] = {}
+_install_count = 0
+
+# (file name, function) of the frames the event loop sits in while it waits for I/O
+_IDLE_FRAMES = {("selectors.py", "select"), ("windows_events.py", "select"), ("windows_events.py", "_poll")}
+
+_PROJECT_ROOT = Path(__file__).parent.resolve()
+
+# Frames kept per blocking report, innermost first
+_MAX_BLOCK_FRAMES = 12
+
+
+def _wrap_playwright_call(call_name: str, original):
+    @functools.wraps(original)
+    async def wrapper(*args, **kwargs):
+        current = _current.get()
+        if current is None:
+            return await original(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            profiler, method = current
+            profiler.record(method, call_name, time.perf_counter() - start)
+    return wrapper
+
+
+def _install_playwright_hooks():
+    """Patch the tracked Playwright methods once per process"""
+    global _install_count
+    if _install_count == 0:
+        for cls, names in TRACKED_CALLS.items():
+            for name in names:
+                original = getattr(cls, name)
+                _patched[(cls, name)] = original
+                setattr(cls, name, _wrap_playwright_call(name, original))
+    _install_count += 1
+
+
+def _uninstall_playwright_hooks():
+    global _install_count
+    _install_count -= 1
+    if _install_count == 0:
+        for (cls, name), original in _patched.items():
+            setattr(cls, name, original)
+        _patched.clear()
+
+
+class CallProfiler:
+    """Counts and times Playwright round-trips per JDAutoBuyer method
+
+    Every coroutine method of the profiled object is wrapped so that Playwright
+    calls made while it runs (including from tasks it spawns) are attributed to it.
+    Helpers listed in passthrough are not wrapped, so their calls are attributed
+    to the method that called the helper.
+    """
+
+    def __init__(self, passthrough: Iterable[str] = ()):
+        self.passthrough = set(passthrough)
+        # method -> call name -> [count, seconds]
+        self.calls: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+        self._attached = False
+
+    def attach(self, target: Any):
+        """Start profiling the coroutine methods of target"""
+        for name, member in inspect.getmembers(type(target), inspect.iscoroutinefunction):
+            if name.startswith("__") or name in self.passthrough:
+                continue
+            setattr(target, name, self._wrap_method(name, getattr(target, name)))
+        _install_playwright_hooks()
+        self._attached = True
+
+    def detach(self):
+        """Remove the Playwright hooks installed by attach"""
+        if self._attached:
+            _uninstall_playwright_hooks()
+            self._attached = False
+
+    def _wrap_method(self, name: str, bound):
+        @functools.wraps(bound)
+        async def wrapper(*args, **kwargs):
+            token = _current.set((self, name))
+            try:
+                return await bound(*args, **kwargs)
+            finally:
+                _current.reset(token)
+        return wrapper
+
+    def record(self, method: str, call_name: str, seconds: float):
+        entry = self.calls[method][call_name]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Round-trips and time per method, most expensive first"""
+        result = {}
+        for method, calls in self.calls.items():
+            result[method] = {
+                "round_trips": int(sum(c[0] for c in calls.values())),
+                "seconds": round(sum(c[1] for c in calls.values()), 4),
+                "calls": {
+                    name: {"count": int(count), "seconds": round(seconds, 4)}
+                    for name, (count, seconds) in sorted(calls.items(), key=lambda kv: -kv[1][0])
+                },
+            }
+        return dict(sorted(result.items(), key=lambda kv: -kv[1]["seconds"]))
+
+    def format_table(self) -> str:
+        """Render the summary as a plain-text table"""
+        lines = [f"{'method':<34}{'round-trips':>12}{'time (s)':>11}  breakdown"]
+        for method, data in self.summary().items():
+            breakdown = ", ".join(
+                f"{name}x{call['count']} ({call['seconds']:.2f}s)" for name, call in data["calls"].items()
+            )
+            lines.append(f"{method:<34}{data['round_trips']:>12}{data['seconds']:>11.2f}  {breakdown}")
+        return "\n".join(lines)
+
+    def log_table(self):
+        if self.calls:
+            logger.info("Playwright round-trips per method:\n{}", self.format_table())
+
+
+@functools.lru_cache(maxsize=None)
+def _short_path(filename: str) -> str:
+    path = Path(filename)
+    try:
+        return str(path.resolve().relative_to(_PROJECT_ROOT))
+    except ValueError:
+        return "/".join(path.parts[-2:])
+
+
+def _frame_label(filename: str, function: str, lineno: int) -> str:
+    return f"{function} ({_short_path(filename)}:{lineno})"
+
+
+@functools.lru_cache(maxsize=None)
+def _is_project_file(filename: str) -> bool:
+    path = Path(filename).resolve()
+    return _PROJECT_ROOT in path.parents and "site-packages" not in path.parts
+
+
+class StackSampler:
+    """Samples the event loop thread's Python stack from a background thread
+
+    Each sample is folded into "outer;...;inner" form and counted, the input format
+    of flamegraph.pl, speedscope and similar tools. Samples whose innermost frame is
+    the event loop's selector are waiting for I/O (the browser), everything else is
+    Python work. When the loop does not get back to its selector for longer than
+    block_threshold, the stack at the moment the threshold was crossed is reported
+    with the innermost project frame as its location.
+    """
+
+    def __init__(self, interval: float = 0.005, block_threshold: float = 0.1, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.stacks: Counter = Counter()
+        self.busy_frames: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.blocks: List[Dict] = []
+        self.seconds = 0.0
+        self._busy_since: Optional[float] = None
+        self._blocked_stack: Optional[List[Tuple[str, str]]] = None
+        self._started_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.seconds = time.perf_counter() - self._started_at
+        self._end_busy(time.perf_counter())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self._sample(frame, time.perf_counter())
+
+    def _sample(self, frame, now: float):
+        # (label, filename) from the innermost frame outwards
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((_frame_label(code.co_filename, code.co_name, frame.f_lineno), code.co_filename))
+            frame = frame.f_back
+        if not stack:
+            return
+        self.samples += 1
+        self.stacks[";".join(label for label, _ in reversed(stack))] += 1
+
+        leaf_label, leaf_file = stack[0]
+        if (os.path.basename(leaf_file), leaf_label.split(" ", 1)[0]) in _IDLE_FRAMES:
+            self.idle_samples += 1
+            self._end_busy(now)
+            return
+        self.busy_frames[leaf_label] += 1
+        if self._busy_since is None:
+            self._busy_since = now
+        elif self._blocked_stack is None and now - self._busy_since >= self.block_threshold:
+            self._blocked_stack = stack[:_MAX_BLOCK_FRAMES]
+
+    def _end_busy(self, now: float):
+        if self._blocked_stack is not None:
+            stack = self._blocked_stack
+            location = next((label for label, filename in stack if _is_project_file(filename)), stack[0][0])
+            block = {
+                "ms": round((now - self._busy_since) * 1000, 1),
+                "location": location,
+                "stack": [label for label, _ in stack],
+            }
+            self.blocks.append(block)
+            logger.warning("Event loop blocked for {:.0f} ms at {}\n  {}", block["ms"], location,
+                           "\n  ".join(block["stack"]))
+        self._busy_since = None
+        self._blocked_stack = None
+
+    def write_folded(self, path: Path):
+        """Folded stacks, one "frames count" line per distinct stack"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        busy = self.samples - self.idle_samples
+        return {
+            "seconds": round(self.seconds, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "busy_ratio": round(busy / self.samples, 3) if self.samples else None,
+            "top_busy_frames": [
+                {"frame": frame, "samples": count, "share": round(count / busy, 3)}
+                for frame, count in self.busy_frames.most_common(top)
+            ],
+            "blocks": sorted(self.blocks, key=lambda block: -block["ms"]),
+        }
+
+
+def run_profiled(main: Coroutine, directory: str, interval: float, slow_callback_duration: float,
+                 log_level: str = "INFO"):
+    """Run main under the stack sampler with asyncio debug mode on
+
+    Debug mode makes asyncio log every callback that runs longer than
+    slow_callback_duration through the stdlib logging, which is routed into the
+    log at log_level; the sampler adds where it was blocked. Writes
+    profile_<time>.folded and profile_<time>.json into directory.
+    """
+    intercept_stdlib_logging(log_level)
+
+    async def debug_main():
+        asyncio.get_running_loop().slow_callback_duration = slow_callback_duration
+        return await main
+
+    sampler = StackSampler(interval, slow_callback_duration).start()
+    try:
+        return asyncio.run(debug_main(), debug=True)
+    finally:
+        sampler.stop()
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        stem = Path(directory) / f"profile_{time.strftime('%Y%m%d_%H%M%S')}"
+        sampler.write_folded(stem.with_suffix(".folded"))
+        summary = sampler.summary()
+        with open(stem.with_suffix(".json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        logger.info(
+            "Profile: {} samples over {:.1f}s, event loop busy {:.0%}, {} blocking calls; written to {}.folded/.json",
+            summary["samples"], summary["seconds"], summary["busy_ratio"] or 0, len(summary["blocks"]), stem
+        )
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from deadlines import deadline_sleep
+
+
+def burst_share(burst: float, parts: int, index: int) -> int:
+    """Part index's whole share of burst, the remainder going to the first parts
+
+    The shares add up to burst; a bucket needs room for at least one request, so
+    with more parts than burst each part still gets one.
+    """
+    return max(1, int(burst) // parts + (1 if index < int(burst) % parts else 0))
+
+
+class _HostBucket:
+    """Token bucket of one host; the lock makes waiters take their turn in arrival order"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.requests = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.statuses: Counter = Counter()
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self):
+        start = time.monotonic()
+        async with self._lock:
+            self._refill()
+            # A rate of 0 leaves the host unlimited
+            while self.rate > 0 and self._tokens < 1:
+                await deadline_sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+        now = time.monotonic()
+        wait = now - start
+        self.requests += 1
+        if wait > 0.001:
+            self.waited += 1
+        self.wait_seconds += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.first_at = self.first_at or now
+        self.last_at = now
+
+    def to_dict(self) -> Dict:
+        span = (self.last_at or 0) - (self.first_at or 0)
+        errors = sum(count for status, count in self.statuses.items() if status >= 400)
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "requests": self.requests,
+            "requests_per_second": round((self.requests - 1) / span, 2) if span > 0 else None,
+            "waited": self.waited,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "mean_wait_ms": round(self.wait_seconds / self.requests * 1000, 1) if self.requests else 0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "error_responses": errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+
+
+class HostRateLimiter:
+    """Per-host token buckets shared by every navigation and API request
+
+    Each host gets rate requests per second with bursts of up to burst, taken from
+    the most specific entry of hosts (exact host, then parent domains) or the
+    defaults. Waiting for a token counts against the current operation's deadline.
+    While other processes use the same budget (sharded search), split() limits
+    this one to its share. The report pairs each host's queue wait with the error
+    responses it got, to find the highest rate that does not draw 403s.
+    """
+
+    def __init__(self, rate: float, burst: float, hosts: Optional[Dict[str, Sequence[float]]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.hosts = hosts or {}
+        self._buckets: Dict[str, _HostBucket] = {}
+        self._parts = 1
+        self._part = 0
+
+    def split(self, parts: int, index: int = 0):
+        """Use share index of parts equal shares of the budget from now on (split(1) restores it)"""
+        self._parts, self._part = parts, index
+        for host, bucket in self._buckets.items():
+            bucket.rate, bucket.burst = self._limits(host)
+            bucket._tokens = min(bucket._tokens, bucket.burst)
+
+    def _limits(self, host: str) -> Tuple[float, float]:
+        rate, burst = self.rate, self.burst
+        labels = host.split('.')
+        for index in range(len(labels)):
+            limits = self.hosts.get('.'.join(labels[index:]))
+            if limits:
+                rate, burst = limits[0], limits[1]
+                break
+        if self._parts == 1:
+            return rate, burst
+        return rate / self._parts, burst_share(burst, self._parts, self._part)
+
+    def _bucket(self, url: str) -> Optional[_HostBucket]:
+        host = urlsplit(url).hostname
+        if not host:
+            # about:, data: and similar URLs never reach the network
+            return None
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _HostBucket(*self._limits(host))
+        return bucket
+
+    async def acquire(self, url: str):
+        """Wait for the URL's host to have a request available"""
+        bucket = self._bucket(url)
+        if bucket:
+            await bucket.acquire()
+
+    def record_status(self, url: str, status: int):
+        """Count a response status for the URL's host"""
+        bucket = self._bucket(url)
+        if bucket:
+            bucket.statuses[status] += 1
+
+    def stats(self) -> Dict:
+        return {host: bucket.to_dict() for host, bucket in sorted(self._buckets.items())}
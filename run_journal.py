@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+def _encode(record: Dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+class RunJournal:
+    """Append-only journal of completed run stages, so a restarted run can resume
+
+    Every record is one compact JSON line, {"t": time, "s": stage, "k": key, "v": output}.
+    A run starts with a "run" record holding its keywords and ends with "end"; a
+    journal that has a start but no end, for the same keywords, and was started
+    less than max_age seconds ago is resumed: the stages it records are looked up
+    instead of repeated. Records are buffered and written with a single fsync per
+    batch (after flush_interval or batch_size records); durable records, such as
+    cart confirmations, are synced before record() returns. A torn last line from
+    a crash is ignored on load.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5, batch_size: int = 20, max_age: float = 3600):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.resumed = False
+        self._torn = False
+        self._done: Dict[Tuple[str, str], Any] = {}
+        self._pending: List[str] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # Serializes writes, a cancelled flush may still be writing in its thread
+        self._write_lock = threading.Lock()
+        self.records = 0
+        self.syncs = 0
+        self.hits = 0
+
+    def _load(self) -> List[Dict]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"Ignoring torn record in run journal {self.path}")
+                        self._torn = True
+                        break
+        except Exception as e:
+            logger.error(f"Error reading run journal: {str(e)}")
+            return []
+        return records
+
+    async def start(self, keywords: List[str], resume: bool = True):
+        """Resume the unfinished run for the same keywords, or start a new journal"""
+        records = self._load() if resume else []
+        if records and records[0].get('s') == 'run' and time.time() - records[0].get('t', 0) > self.max_age:
+            logger.info(f"Not resuming the run journal, it was started more than {self.max_age:.0f}s ago")
+            records = []
+        if records and records[0].get('s') == 'run' and records[0].get('v') == {'keywords': keywords} \
+                and records[-1].get('s') != 'end':
+            self._done = {(record['s'], record.get('k', '')): record.get('v') for record in records[1:]}
+            self.resumed = True
+            if self._torn:
+                # Appending after a partial line would corrupt the next record
+                await asyncio.to_thread(self._rewrite, [_encode(record) for record in records])
+            logger.info(f"Resuming run from journal: {len(self._done)} completed stages")
+            return
+        await asyncio.to_thread(self._rewrite, [])
+        await self.record('run', value={'keywords': keywords}, durable=True)
+
+    def get(self, stage: str, key: str = '') -> Optional[Any]:
+        """Output of a stage completed in a previous attempt of this run, or None"""
+        value = self._done.get((stage, key))
+        if value is not None:
+            self.hits += 1
+        return value
+
+    def done(self, stage: str, key: str = '') -> bool:
+        return (stage, key) in self._done
+
+    async def record(self, stage: str, key: str = '', value: Any = True, durable: bool = False):
+        """Record a completed stage; durable records are on disk when this returns"""
+        self._done[(stage, key)] = value
+        self._pending.append(_encode({'t': round(time.time(), 3), 's': stage, 'k': key, 'v': value}))
+        self.records += 1
+        if durable or len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        """Write and fsync the buffered records"""
+        if not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self._append, lines)
+            self.syncs += 1
+        except Exception as e:
+            logger.error(f"Error writing run journal: {str(e)}")
+
+    def _append(self, lines: List[str]):
+        with self._write_lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _rewrite(self, lines: List[str]):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._write_lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("".join(line + "\n" for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    async def finish(self):
+        """Mark the run complete, so the next one starts a new journal"""
+        await self.record('end', durable=True)
+
+    async def close(self):
+        """Cancel the flush timer and write whatever is pending"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "resumed": self.resumed,
+            "stages_reused": self.hits,
+            "records": self.records,
+            "syncs": self.syncs,
+        }
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from playwright.async_api import Page
+from loguru import logger
+
+
+def parse_target_time(value: str, now: Optional[datetime] = None) -> datetime:
+    """Parse YYYY-mm-dd HH:MM[:SS[.ffffff]], or HH:MM[:SS[.ffffff]] for the next such time today or tomorrow"""
+    now = now or datetime.now()
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    for fmt in ("%H:%M:%S.%f", "%H:%M:%S", "%H:%M"):
+        try:
+            parsed = datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+        target = datetime.combine(now.date(), parsed)
+        return target if target > now else target + timedelta(days=1)
+    raise ValueError(f"Unrecognized time: {value}")
+
+
+async def sleep_until(target: datetime, spin: float = 0.002):
+    """Sleep until the wall-clock target, in short steps for the last second"""
+    while True:
+        remaining = (target - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(remaining - 1 if remaining > 1.5 else min(spin, remaining))
+
+
+class ScheduledPurchase:
+    """Buys one SKU at a target time with everything but the final click done ahead
+
+    Readiness is staged: validate the session, open the product page and resolve its
+    add-to-cart control, pre-load the cart page; shortly before the time the product
+    page is refreshed and the control resolved again. At the target time only the
+    click and its confirmation remain; checkout then continues on the pre-loaded cart
+    page. A control that is not on the page yet (many items only show it once the sale
+    opens) is resolved at the target time instead. With cold=True nothing is
+    prepared, which gives the baseline to compare with.
+    """
+
+    def __init__(self, buyer, sku: str, target: datetime, prepare_before: float, refresh_before: float,
+                 cold: bool = False):
+        self.buyer = buyer
+        self.sku = sku
+        self.target = target
+        self.prepare_before = prepare_before
+        self.refresh_before = refresh_before
+        self.cold = cold
+        self.stages: Dict[str, float] = {}  # stage -> milliseconds
+        self.lateness_ms: Optional[float] = None
+        self.added = False
+        self.checked_out = False
+        self._product_page: Optional[Page] = None
+        self._cart_page: Optional[Page] = None
+        self._button = None
+
+    async def _stage(self, name: str, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.stages[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def _open_product(self, required: bool = False):
+        self._button = await self.buyer.open_item_page(self.sku, self._product_page)
+        if not self._button:
+            if required:
+                raise RuntimeError(f"Add to cart button not found for SKU {self.sku}")
+            logger.warning(f"Add to cart button for SKU {self.sku} not there yet, resolving it at the target time")
+
+    async def _prepare(self):
+        if not await self._stage('session', self.buyer.login()):
+            raise RuntimeError("Session could not be validated")
+        self._product_page = await self.buyer.open_page()
+        self._cart_page = await self.buyer.open_page()
+        await asyncio.gather(
+            self._stage('product_page', self._open_product()),
+            self._stage('cart_page', self.buyer.open_cart_page(self._cart_page))
+        )
+        logger.info(f"Scheduled purchase of SKU {self.sku} is ready, waiting for {self.target}")
+
+    async def _refresh(self):
+        """Reload the product page so the control reflects the state right before the time"""
+        await self._stage('refresh', self._open_product())
+
+    async def _final_step(self) -> bool:
+        if not self._button:
+            await self._stage('resolve_button', self._open_product(required=True))
+        return await self.buyer.click_add_to_cart(self._button, self._product_page)
+
+    async def run(self) -> bool:
+        """Prepare, wait for the target time and buy; returns whether the item was added"""
+        logger.info(f"Scheduled purchase of SKU {self.sku} at {self.target} ({'cold' if self.cold else 'prepared'})")
+        if not self.cold:
+            await sleep_until(self.target - timedelta(seconds=self.prepare_before))
+            await self._prepare()
+            if self.refresh_before:
+                await sleep_until(self.target - timedelta(seconds=self.refresh_before))
+                await self._refresh()
+        else:
+            # The session is part of the cold start, so only the browser is ready
+            self._product_page = await self.buyer.open_page()
+            self._cart_page = await self.buyer.open_page()
+
+        await sleep_until(self.target)
+        start = time.perf_counter()
+        self.lateness_ms = round((datetime.now() - self.target).total_seconds() * 1000, 1)
+        if self.cold:
+            if not await self._stage('session', self.buyer.login()):
+                raise RuntimeError("Session could not be validated")
+            await self._stage('product_page', self._open_product(required=True))
+        self.added = await self._stage('final_step', self._final_step())
+        self.stages['time_to_added'] = round((time.perf_counter() - start) * 1000, 1)
+        if not self.added:
+            logger.error(f"No add-to-cart confirmation for SKU {self.sku}")
+            return False
+        logger.info(f"SKU {self.sku} added to cart {self.stages['time_to_added']:.0f} ms after the target time")
+
+        self.checked_out = await self._stage('checkout', self.buyer.checkout_prepared(self._cart_page))
+        return True
+
+    def report(self) -> Dict:
+        report = {
+            "sku": self.sku,
+            "target": self.target.isoformat(),
+            "mode": "cold" if self.cold else "prepared",
+            "lateness_ms": self.lateness_ms,
+            "stages_ms": self.stages,
+            "added": self.added,
+            "checked_out": self.checked_out,
+        }
+        if not self.cold and 'final_step' in self.stages:
+            # What the same run would have needed after the target time without preparation
+            report["cold_start_estimate_ms"] = round(sum(
+                self.stages.get(stage, 0) for stage in ('session', 'product_page', 'final_step')
+            ), 1)
+        return report
@@ -0,0 +1,52 @@
+from typing import Dict, List
+
+
+class SearchDelta:
+    """What changed in one keyword's search results since the previous search"""
+
+    def __init__(self, keyword: str, new: List[Dict], changed: List[Dict], removed: List[Dict], first: bool):
+        self.keyword = keyword
+        self.new = new
+        self.changed = changed
+        self.removed = removed
+        # True when there was no previous search to compare against
+        self.first = first
+
+    def __bool__(self) -> bool:
+        return bool(self.new or self.changed or self.removed)
+
+    @property
+    def candidates(self) -> List[Dict]:
+        """Products worth re-evaluating: new ones and ones whose price moved"""
+        return self.new + self.changed
+
+    def summary(self) -> str:
+        return f"{len(self.new)} new, {len(self.changed)} price changes, {len(self.removed)} disappeared"
+
+
+class SearchIndex:
+    """Last seen search results per keyword, keyed by SKU (data-sku)"""
+
+    def __init__(self):
+        self._results: Dict[str, Dict[str, Dict]] = {}
+
+    def diff(self, keyword: str, products: List[Dict]) -> SearchDelta:
+        """Compare products with the previous results for keyword and remember them"""
+        current = {p['id']: p for p in products if p.get('id')}
+        previous = self._results.get(keyword)
+        self._results[keyword] = current
+
+        if previous is None:
+            return SearchDelta(keyword, list(current.values()), [], [], first=True)
+
+        new = []
+        changed = []
+        for sku, product in current.items():
+            before = previous.get(sku)
+            if before is None:
+                new.append(product)
+            elif before['price'] != product['price']:
+                product['previous_price'] = before['price']
+                changed.append(product)
+        removed = [product for sku, product in previous.items() if sku not in current]
+        return SearchDelta(keyword, new, changed, removed, first=False)
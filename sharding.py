@@ -0,0 +1,268 @@
+import asyncio
+import multiprocessing
+import queue
+import shutil
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from config import config
+from log_setup import configure_logging
+from rate_limit import burst_share
+
+# Seconds between checks for shards that died without reporting
+_POLL_INTERVAL = 1.0
+
+# Seconds the other shards wait for shard 0's login (room for a QR code scan)
+_SESSION_READY_TIMEOUT = 300
+
+
+class CandidateSet:
+    """Search results merged as the shards report them
+
+    Every keyword is one entry of the shopping list, and the pipeline selects one
+    product per keyword from that keyword's own results (so it can start before
+    the other keywords are searched). The merged SKU view is not a selection input:
+    it measures how much the keywords overlap (distinct products, duplicates) for
+    the run report, and the pipeline keeps a SKU picked for one keyword from being
+    picked again for another.
+    """
+
+    def __init__(self):
+        self.by_keyword: Dict[str, List[Dict]] = {}
+        # SKU -> cheapest listing seen under any keyword
+        self.products: Dict[str, Dict] = {}
+        self.duplicates = 0
+
+    def add(self, keyword: str, products: List[Dict]):
+        self.by_keyword[keyword] = products
+        for product in products:
+            known = self.products.get(product['id'])
+            if known is not None:
+                self.duplicates += 1
+            if known is None or product['price'] < known['price']:
+                self.products[product['id']] = {**product, 'keyword': keyword}
+
+    def stats(self) -> Dict:
+        return {
+            "keywords": len(self.by_keyword),
+            "keywords_without_results": sorted(k for k, products in self.by_keyword.items() if not products),
+            "products": len(self.products),
+            "duplicates": self.duplicates,
+        }
+
+
+def split_rate_budget(parts: int, index: int):
+    """Give this process share index of parts equal shares of the global per-host request budget
+
+    Bursts are split in whole requests (see burst_share) so that together they add
+    up to the global burst.
+    """
+    config.rate_limit_per_second /= parts
+    config.rate_limit_burst = burst_share(config.rate_limit_burst, parts, index)
+    config.rate_limit_hosts = {
+        host: [rate / parts, burst_share(burst, parts, index)]
+        for host, (rate, burst) in config.rate_limit_hosts.items()
+    }
+
+
+async def _run_shard(index: int, keywords: List[str], results, session_ready, session_ok):
+    # Imported here because jd_buyer imports this module
+    from jd_buyer import JDAutoBuyer
+
+    if index > 0:
+        # Wait for shard 0 to validate (or create) the session, then reuse its cookies
+        if not await asyncio.to_thread(session_ready.wait, _SESSION_READY_TIMEOUT):
+            results.put(("failed", index, "shard 0 did not finish logging in"))
+            results.put(("done", index, None))
+            return
+        if not session_ok.value:
+            # Logging in again would only repeat shard 0's failure, once per shard
+            results.put(("failed", index, "shard 0 could not log in"))
+            results.put(("done", index, None))
+            return
+    buyer = JDAutoBuyer()
+    rate_limit = None
+    try:
+        await buyer.setup()
+        logged_in = await buyer.login()
+        if index == 0:
+            await buyer.cookie_store.flush()
+            session_ok.value = int(logged_in)
+            session_ready.set()
+        if not logged_in:
+            results.put(("failed", index, "login failed"))
+            return
+        for keyword in keywords:
+            start = time.perf_counter()
+            products = await buyer.search_product(keyword)
+            results.put(("result", index, keyword, products, time.perf_counter() - start))
+        rate_limit = buyer.rate_limiter.stats() if buyer.rate_limiter else None
+    except Exception as e:
+        results.put(("failed", index, str(e)))
+    finally:
+        if index == 0:
+            session_ready.set()
+        try:
+            await buyer.close()
+        finally:
+            results.put(("done", index, rate_limit))
+
+
+def _shard_main(index: int, keywords: List[str], settings: Dict[str, Any], shards: int, parent_share: bool, results,
+                session_ready, session_ok):
+    """Process entry point: apply the coordinator's config, then search this shard's keywords"""
+    for name, value in settings.items():
+        setattr(config, name, value)
+    if parent_share:
+        # Share 0 is the coordinating process's, it keeps navigating meanwhile
+        split_rate_budget(shards + 1, index + 1)
+    else:
+        split_rate_budget(shards, index)
+    # Files written per run stay apart; the cookie jar and the price history (SQLite) are shared
+    shard_dir = Path(config.reports_dir) / f"shard_{index}"
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    config.reports_dir = str(shard_dir)
+    # Learned latencies and warm-up bundles start from the shared files, but each shard
+    # saves its own copy, so the shards never overwrite each other's (or the main run's)
+    for name in ("latency_stats_path", "warmup_stats_path"):
+        source = Path(getattr(config, name))
+        target = shard_dir / source.name
+        if source.exists():
+            shutil.copyfile(source, target)
+        setattr(config, name, str(target))
+    # The asset cache is one directory and index, rewritten by whichever process exits last
+    config.asset_cache = False
+    configure_logging(str(Path(config.reports_dir) / "jd_auto_buyer.log"), level=config.log_level,
+                      structured=config.structured_logging)
+    asyncio.run(_run_shard(index, keywords, results, session_ready, session_ok))
+
+
+class ShardCoordinator:
+    """Searches keywords across worker processes, each driving its own browser
+
+    Keywords are dealt round-robin to the shards. Every shard is a separate process
+    with its own JDAutoBuyer and the shared cookie file: shard 0 validates the
+    session first, the others start from its cookies (or give up if it could not
+    log in). Each shard gets an equal part of the per-host rate budget, so all of
+    them together stay within it; with parent_share the calling process keeps one
+    part as well (it has to limit itself to it, see HostRateLimiter.split).
+    Results are merged into a CandidateSet and handed on (stream()) as they arrive,
+    so the calling process can select and add to the cart while other keywords are
+    still being searched.
+    """
+
+    def __init__(self, keywords: List[str], shards: int, parent_share: bool = True):
+        self.keywords = list(keywords)
+        self.shards = max(1, min(shards, len(self.keywords)))
+        self.parent_share = parent_share
+        self.assignments = [self.keywords[index::self.shards] for index in range(self.shards)]
+        self.candidates = CandidateSet()
+        self.shard_stats: List[Dict] = [
+            {"keywords": len(assigned), "searched": 0, "search_seconds": 0.0, "error": None, "rate_limit": None}
+            for assigned in self.assignments
+        ]
+        self.seconds = 0.0
+        self.first_result_seconds: Optional[float] = None
+
+    def run(self, on_result: Optional[Callable[[str, List[Dict]], None]] = None) -> CandidateSet:
+        """Run every shard to completion and return the merged results
+
+        on_result is called with each keyword's products as they arrive (in this thread).
+        """
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        session_ready = context.Event()
+        # Set by shard 0 before session_ready: whether the others can start from its session
+        session_ok = context.Value('b', 0)
+        settings = config.model_dump()
+        processes = [
+            context.Process(
+                target=_shard_main,
+                args=(index, assigned, settings, self.shards, self.parent_share, results, session_ready, session_ok),
+                name=f"shard-{index}"
+            )
+            for index, assigned in enumerate(self.assignments)
+        ]
+        logger.info(f"Searching {len(self.keywords)} keywords in {self.shards} shards")
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        running = set(range(self.shards))
+        try:
+            while running:
+                try:
+                    message = results.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    for index in [i for i in running if not processes[i].is_alive()]:
+                        logger.error(f"Shard {index} exited without reporting (exit code {processes[index].exitcode})")
+                        self.shard_stats[index]["error"] = f"exit code {processes[index].exitcode}"
+                        running.discard(index)
+                        if index == 0 and not session_ready.is_set():
+                            # It died before releasing the others; session_ok is still unset, so they give up
+                            session_ready.set()
+                    continue
+                self._receive(message, time.perf_counter() - start, running, on_result)
+        finally:
+            for process in processes:
+                process.join(timeout=30)
+                if process.is_alive():
+                    process.terminate()
+        self.seconds = time.perf_counter() - start
+        logger.info(
+            f"Sharded search finished in {self.seconds:.1f}s: {len(self.candidates.by_keyword)}/{len(self.keywords)} "
+            f"keywords, {len(self.candidates.products)} distinct products"
+        )
+        return self.candidates
+
+    async def stream(self) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """Run the shards in a worker thread and yield (keyword, products) as each search completes"""
+        loop = asyncio.get_running_loop()
+        arrivals: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        def on_result(keyword: str, products: List[Dict]):
+            loop.call_soon_threadsafe(arrivals.put_nowait, (keyword, products))
+
+        runner = asyncio.ensure_future(asyncio.to_thread(self.run, on_result))
+        # Queued after every result, since both are scheduled from the same thread in order
+        runner.add_done_callback(lambda _: arrivals.put_nowait(finished))
+        while True:
+            item = await arrivals.get()
+            if item is finished:
+                break
+            yield item
+        await runner
+
+    def _receive(self, message, elapsed: float, running: set, on_result: Optional[Callable]):
+        kind, index = message[0], message[1]
+        stats = self.shard_stats[index]
+        if kind == "result":
+            keyword, products, seconds = message[2:]
+            self.candidates.add(keyword, products)
+            stats["searched"] += 1
+            stats["search_seconds"] += seconds
+            if self.first_result_seconds is None:
+                self.first_result_seconds = elapsed
+            logger.info(f"Shard {index}: {len(products)} products for {keyword} "
+                        f"({len(self.candidates.by_keyword)}/{len(self.keywords)} keywords done)")
+            if on_result:
+                on_result(keyword, products)
+        elif kind == "failed":
+            stats["error"] = message[2]
+            logger.error(f"Shard {index} failed: {message[2]}")
+        elif kind == "done":
+            stats["rate_limit"] = message[2]
+            running.discard(index)
+
+    def stats(self) -> Dict:
+        return {
+            "shards": self.shards,
+            "seconds": round(self.seconds, 3),
+            "first_result_seconds": round(self.first_result_seconds, 3) if self.first_result_seconds else None,
+            "keywords_per_minute": round(len(self.candidates.by_keyword) / self.seconds * 60, 2) if self.seconds else None,
+            "candidates": self.candidates.stats(),
+            "per_shard": [{**stats, "search_seconds": round(stats["search_seconds"], 3)} for stats in self.shard_stats],
+        }
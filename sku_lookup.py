@@ -0,0 +1,116 @@
+import asyncio
+import json
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+from playwright.async_api import APIRequestContext
+from loguru import logger
+
+from deadlines import remaining_ms
+from rate_limit import HostRateLimiter
+
+# Some endpoints wrap their JSON in a callback even without one being asked for
+_JSONP = re.compile(r"^\s*[\w.$]+\s*\((.*)\)\s*;?\s*$", re.S)
+
+# StockState values meaning the item can be ordered now (33 现货, 39/40 有货 with delivery info)
+IN_STOCK_STATES = {33, 39, 40}
+
+
+def _parse_json(text: str):
+    match = _JSONP.match(text)
+    return json.loads(match.group(1) if match else text)
+
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class SkuLookup:
+    """Current price and stock state of many SKUs through JD's batch endpoints
+
+    Requests go through the logged-in context's request API (cookies included), a
+    chunk of SKUs per call, with a bounded number of calls in flight. Price and stock
+    chunks run concurrently, so up to chunk_size SKUs cost a single round-trip. With a
+    limiter, every call first waits for its host's request budget.
+    """
+
+    def __init__(self, price_url: str, stock_url: str, area: str, chunk_size: int = 50, concurrency: int = 4,
+                 headers: Optional[Dict[str, str]] = None, limiter: Optional[HostRateLimiter] = None):
+        self.price_url = price_url
+        self.stock_url = stock_url
+        self.area = area
+        self.chunk_size = chunk_size
+        self.headers = headers or {}
+        self.limiter = limiter
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.lookups = 0
+        self.skus = 0
+        self.requests = 0
+        self.failed_requests = 0
+        self.seconds = 0.0
+
+    async def lookup(self, request: APIRequestContext, skus: Iterable[str], timeout: float = 15000) -> Dict[str, Dict]:
+        """{sku: {price, in_stock, stock_state}}; values are None where a chunk failed"""
+        skus = list(dict.fromkeys(str(sku) for sku in skus if sku))
+        if not skus:
+            return {}
+        start = time.perf_counter()
+        results = {sku: {"price": None, "in_stock": None, "stock_state": None} for sku in skus}
+        chunks = _chunks(skus, self.chunk_size)
+        await asyncio.gather(
+            *(self._prices(request, chunk, results, timeout) for chunk in chunks),
+            *(self._stocks(request, chunk, results, timeout) for chunk in chunks)
+        )
+        elapsed = time.perf_counter() - start
+        self.lookups += 1
+        self.skus += len(skus)
+        self.seconds += elapsed
+        logger.debug(f"Looked up {len(skus)} SKUs in {elapsed:.2f}s")
+        return results
+
+    async def _get(self, request: APIRequestContext, url: str, timeout: float):
+        async with self._semaphore:
+            self.requests += 1
+            try:
+                if self.limiter:
+                    await self.limiter.acquire(url)
+                response = await request.get(url, headers=self.headers, timeout=remaining_ms(timeout))
+                if self.limiter:
+                    self.limiter.record_status(url, response.status)
+                if not response.ok:
+                    raise RuntimeError(f"HTTP {response.status}")
+                return _parse_json(await response.text())
+            except Exception as e:
+                self.failed_requests += 1
+                logger.warning(f"SKU lookup request failed ({url.split('?')[0]}): {str(e)}")
+                return None
+
+    async def _prices(self, request: APIRequestContext, chunk: List[str], results: Dict[str, Dict], timeout: float):
+        data = await self._get(request, self.price_url.format(skus=",".join(f"J_{sku}" for sku in chunk)), timeout)
+        for entry in data or []:
+            sku = str(entry.get("id", "")).replace("J_", "")
+            if sku in results:
+                try:
+                    price = float(entry.get("p"))
+                except (TypeError, ValueError):
+                    continue
+                # Delisted items report a negative price
+                results[sku]["price"] = price if price >= 0 else None
+
+    async def _stocks(self, request: APIRequestContext, chunk: List[str], results: Dict[str, Dict], timeout: float):
+        data = await self._get(request, self.stock_url.format(skus=",".join(chunk), area=self.area), timeout)
+        for sku, entry in (data or {}).items():
+            if sku in results and isinstance(entry, dict):
+                state = entry.get("StockState")
+                results[sku]["stock_state"] = entry.get("StockStateName") or state
+                results[sku]["in_stock"] = state in IN_STOCK_STATES
+
+    def stats(self) -> Dict:
+        return {
+            "lookups": self.lookups,
+            "skus": self.skus,
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "seconds": round(self.seconds, 3),
+        }
@@ -0,0 +1,62 @@
+from latency import LatencyTracker, url_class
+
+
+def _tracker(tmp_path, **options):
+    return LatencyTracker(str(tmp_path / "latency.json"), **options)
+
+
+def test_url_class_collapses_numbers_and_query():
+    assert url_class("https://item.jd.com/100012043978.html?x=1") == "item.jd.com/{n}.html"
+    assert url_class("https://www.jd.com") == "www.jd.com/"
+
+
+def test_default_until_enough_samples(tmp_path):
+    tracker = _tracker(tmp_path, min_samples=5)
+    for _ in range(4):
+        tracker.record("k", 100)
+    assert tracker.timeout_for("k", 30000) == 30000
+    assert tracker.timeout_for("unknown", 30000) == 30000
+
+
+def test_timeout_is_clamped(tmp_path):
+    tracker = _tracker(tmp_path, factor=3.0, floor=2000, ceiling=60000, min_samples=5)
+    for _ in range(5):
+        tracker.record("fast", 100)
+        tracker.record("mid", 1000)
+        tracker.record("slow", 50000)
+
+    # p99 x factor below the floor
+    assert tracker.timeout_for("fast", 30000) == 2000
+    assert tracker.timeout_for("mid", 30000) == 3000
+    # Never above the caller's default, nor the ceiling
+    assert tracker.timeout_for("mid", 2500) == 2500
+    assert tracker.timeout_for("slow", 30000) == 30000
+    assert tracker.timeout_for("slow", 90000) == 60000
+
+
+def test_timeouts_widen_until_a_success(tmp_path):
+    tracker = _tracker(tmp_path, factor=3.0, floor=0, min_samples=5)
+    for _ in range(5):
+        tracker.record("k", 1000)
+    tracker.record_timeout("k", 1000)
+    assert tracker.timeout_for("k", 30000) == 6000
+    tracker.record_timeout("k", 1000)
+    assert tracker.timeout_for("k", 30000) == 12000
+    assert tracker.timeout_for("k", 10000) == 10000
+
+    tracker.record("k", 1000)
+    assert tracker.timeout_for("k", 30000) == 3000
+
+
+def test_histories_persist_but_streaks_do_not(tmp_path):
+    tracker = _tracker(tmp_path, factor=3.0, floor=0, min_samples=5)
+    for _ in range(5):
+        tracker.record("k", 1000)
+    tracker.record_timeout("k", 1000)
+    tracker.save()
+
+    loaded = _tracker(tmp_path, factor=3.0, floor=0, min_samples=5)
+    assert list(loaded.stats["k"].samples) == [1000] * 6
+    assert loaded.stats["k"].timeouts == 1
+    assert loaded.timeout_for("k", 30000) == 3000
+    assert loaded.estimates()["k"]["timeout_ms"] == 3000
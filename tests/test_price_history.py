@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from price_history import PriceHistory
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = PriceHistory(str(tmp_path / "prices.db"))
+    yield history
+    history.close()
+
+
+def test_record_skips_products_without_sku_or_price(history):
+    stored = history.record('牛奶', [
+        {'id': '1', 'price': 59.9, 'shop': 'A'},
+        {'id': '', 'price': 10.0},
+        {'id': '2', 'price': None},
+    ])
+    assert stored == 1
+    assert history.lowest_price('2') is None
+
+
+def test_lowest_price_respects_the_window(history):
+    now = time.time()
+    history.record('牛奶', [{'id': '1', 'price': 40.0}], observed_at=now - 10 * 86400)
+    history.record('牛奶', [{'id': '1', 'price': 55.0}], observed_at=now - 86400)
+    history.record('牛奶', [{'id': '1', 'price': 60.0}], observed_at=now)
+
+    assert history.lowest_price('1') == 40.0
+    assert history.lowest_price('1', days=7) == 55.0
+    assert history.is_historical_low('1', 55.0, days=7)
+    assert not history.is_historical_low('1', 55.0)
+    assert not history.is_historical_low('unknown', 1.0)
+
+
+def test_lowest_prices_for_many_skus(history):
+    history.record('牛奶', [{'id': '1', 'price': 50.0}, {'id': '2', 'price': 20.0}])
+    history.record('牛奶', [{'id': '1', 'price': 45.0}, {'id': '2', 'price': 25.0}])
+
+    assert history.lowest_prices(['1', '2', '3']) == {'1': 45.0, '2': 20.0}
+    assert history.lowest_prices([]) == {}
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from rate_limit import HostRateLimiter, burst_share
+
+
+def test_burst_share_adds_up_and_keeps_one_token():
+    assert [burst_share(10, 3, index) for index in range(3)] == [4, 3, 3]
+    assert [burst_share(2, 4, index) for index in range(4)] == [1, 1, 1, 1]
+
+
+def test_most_specific_host_limits_apply():
+    limiter = HostRateLimiter(2, 4, hosts={'jd.com': (5, 10), 'item.jd.com': (1, 1)})
+    assert limiter._limits('item.jd.com') == (1, 1)
+    assert limiter._limits('search.jd.com') == (5, 10)
+    assert limiter._limits('example.com') == (2, 4)
+
+
+def test_acquire_waits_once_the_burst_is_spent():
+    limiter = HostRateLimiter(20, 2)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire('https://search.jd.com/Search')
+        await limiter.acquire('about:blank')
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    stats = limiter.stats()['search.jd.com']
+    # Two requests from the burst, two more at 20 per second
+    assert elapsed >= 0.09
+    assert stats['requests'] == 4
+    assert stats['waited'] == 2
+    assert list(limiter.stats()) == ['search.jd.com']
+
+
+def test_zero_rate_is_unlimited():
+    limiter = HostRateLimiter(0, 1)
+
+    async def run():
+        for _ in range(5):
+            await limiter.acquire('https://www.jd.com/')
+
+    asyncio.run(run())
+    assert limiter.stats()['www.jd.com']['waited'] == 0
+
+
+def test_split_rescales_existing_buckets():
+    limiter = HostRateLimiter(6, 5)
+    url = 'https://www.jd.com/'
+    limiter.record_status(url, 200)
+    limiter.record_status(url, 403)
+
+    limiter.split(3, 0)
+    bucket = limiter._bucket(url)
+    assert (bucket.rate, bucket.burst, bucket._tokens) == (2, 2, 2)
+
+    limiter.split(1)
+    assert (bucket.rate, bucket.burst) == (6, 5)
+    stats = limiter.stats()['www.jd.com']
+    assert stats['error_responses'] == 1
+    assert stats['statuses'] == {'200': 1, '403': 1}
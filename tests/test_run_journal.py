@@ -0,0 +1,96 @@
+import asyncio
+import json
+import time
+
+from run_journal import RunJournal
+
+KEYWORDS = ['牛奶', '咖啡']
+
+
+def _write(path, records, tail=''):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.write(tail)
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def _started(age=0):
+    return {'t': time.time() - age, 's': 'run', 'k': '', 'v': {'keywords': KEYWORDS}}
+
+
+async def _start(path, keywords=KEYWORDS, **options):
+    journal = RunJournal(str(path), **options)
+    await journal.start(keywords)
+    return journal
+
+
+def test_resumes_unfinished_run(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    _write(path, [_started(), {'t': time.time(), 's': 'search', 'k': '牛奶', 'v': [{'id': '1'}]}])
+
+    journal = asyncio.run(_start(path))
+
+    assert journal.resumed
+    assert journal.done('search', '牛奶')
+    assert journal.get('search', '牛奶') == [{'id': '1'}]
+    assert journal.get('search', '咖啡') is None
+    assert journal.stats()['stages_reused'] == 1
+
+
+def test_torn_last_line_is_ignored_and_dropped(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    _write(path, [_started(), {'t': time.time(), 's': 'search', 'k': '牛奶', 'v': [{'id': '1'}]}],
+           tail='{"t": 1, "s": "sea')
+
+    async def resume_and_record():
+        journal = await _start(path)
+        await journal.record('cart', '1', durable=True)
+        return journal
+
+    journal = asyncio.run(resume_and_record())
+
+    assert journal.resumed
+    assert journal.done('search', '牛奶')
+    # The partial line was removed before appending, so every line parses again
+    assert [(record['s'], record['k']) for record in _read(path)] == [('run', ''), ('search', '牛奶'), ('cart', '1')]
+
+
+def test_expired_run_is_not_resumed(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    _write(path, [_started(age=7200), {'t': time.time(), 's': 'search', 'k': '牛奶', 'v': []}])
+
+    journal = asyncio.run(_start(path, max_age=3600))
+
+    assert not journal.resumed
+    assert not journal.done('search', '牛奶')
+    records = _read(path)
+    assert len(records) == 1
+    assert records[0]['s'] == 'run' and records[0]['t'] > time.time() - 60
+
+
+def test_finished_or_different_run_is_not_resumed(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    _write(path, [_started(), {'t': time.time(), 's': 'end', 'k': '', 'v': True}])
+    assert not asyncio.run(_start(path)).resumed
+
+    _write(path, [_started()])
+    assert not asyncio.run(_start(path, keywords=['茶叶'])).resumed
+
+
+def test_buffered_records_are_written_on_close(tmp_path):
+    path = tmp_path / "journal.jsonl"
+
+    async def run():
+        journal = await _start(path, flush_interval=60, batch_size=10)
+        await journal.record('search', '牛奶', [])
+        buffered = len(_read(path))
+        await journal.close()
+        return buffered
+
+    assert asyncio.run(run()) == 1
+    assert [record['s'] for record in _read(path)] == ['run', 'search']
@@ -0,0 +1,32 @@
+from search_diff import SearchIndex
+
+
+def _product(sku, price):
+    return {'id': sku, 'name': f"SKU {sku}", 'price': price}
+
+
+def test_first_search_lists_everything_as_new():
+    delta = SearchIndex().diff('牛奶', [_product('1', 50.0), _product('', 10.0)])
+    assert delta.first
+    assert [p['id'] for p in delta.new] == ['1']
+    assert not delta.changed and not delta.removed
+
+
+def test_new_changed_and_removed():
+    index = SearchIndex()
+    index.diff('牛奶', [_product('1', 50.0), _product('2', 30.0), _product('3', 20.0)])
+    delta = index.diff('牛奶', [_product('1', 50.0), _product('2', 28.0), _product('4', 15.0)])
+
+    assert not delta.first
+    assert [p['id'] for p in delta.new] == ['4']
+    assert [(p['id'], p['previous_price']) for p in delta.changed] == [('2', 30.0)]
+    assert [p['id'] for p in delta.removed] == ['3']
+    assert [p['id'] for p in delta.candidates] == ['4', '2']
+    assert delta.summary() == "1 new, 1 price changes, 1 disappeared"
+
+
+def test_unchanged_results_are_falsy_and_keywords_are_separate():
+    index = SearchIndex()
+    index.diff('牛奶', [_product('1', 50.0)])
+    assert not index.diff('牛奶', [_product('1', 50.0)])
+    assert index.diff('咖啡', [_product('1', 50.0)]).first
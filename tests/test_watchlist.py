@@ -0,0 +1,87 @@
+import asyncio
+
+from search_diff import SearchIndex
+from watchlist import Watchlist, parse_watch_entries
+
+
+class _Buyer:
+    """Answers keyword searches from a script of result lists (None for a failed search)"""
+
+    def __init__(self, searches):
+        self.searches = list(searches)
+        self.search_index = SearchIndex()
+        self.added = []
+
+    async def search_changes(self, keyword):
+        products = self.searches.pop(0)
+        if not products:
+            return None
+        return self.search_index.diff(keyword, [dict(p) for p in products])
+
+    def select_product_by_strategy(self, products, strategy):
+        return min(products, key=lambda p: p['price'])
+
+    async def add_to_cart(self, product):
+        self.added.append(product)
+        return True
+
+
+def _product(sku, price):
+    return {'id': sku, 'name': f"SKU {sku}", 'price': price}
+
+
+def _watch(buyer, entries, max_price=None):
+    return Watchlist(buyer, parse_watch_entries(entries), 'price_low', "https://item.jd.com/{sku}.html",
+                     interval=60, min_interval=10, max_interval=600, requests_per_minute=600, search_cost=1,
+                     max_price=max_price, max_purchases=1)
+
+
+def _check(watch, times):
+    async def run():
+        for _ in range(times):
+            await watch._check_keyword(watch.items[0])
+    asyncio.run(run())
+
+
+def test_parse_watch_entries():
+    items = parse_watch_entries(['100012043978:59.9', '牛奶', ' ', 'a:b'])
+    assert [(item.kind, item.value, item.target_price) for item in items] == [
+        ('sku', '100012043978', 59.9), ('keyword', '牛奶', None), ('keyword', 'a:b', None)
+    ]
+
+
+def test_keyword_change_shortens_interval_and_stability_stretches_it():
+    buyer = _Buyer([[_product('1', 50.0)], [_product('1', 50.0)], [_product('1', 45.0)]])
+    watch = _watch(buyer, ['牛奶:30'])
+    item = watch.items[0]
+
+    _check(watch, 2)
+    assert item.changes == 0
+    assert item.interval == 135
+
+    _check(watch, 1)
+    assert item.changes == 1
+    assert item.interval == 67.5
+    assert item.checks == 3
+    assert not buyer.added
+
+
+def test_failed_search_is_not_a_change():
+    buyer = _Buyer([[_product('1', 50.0)], None, [_product('1', 50.0)]])
+    watch = _watch(buyer, ['牛奶:30'])
+
+    _check(watch, 3)
+
+    assert watch.items[0].changes == 0
+    # The failed search did not replace the remembered results with an empty list
+    assert not buyer.search_index.diff('牛奶', [_product('1', 50.0)])
+
+
+def test_rule_fires_once_for_a_new_price():
+    buyer = _Buyer([[_product('1', 50.0)], [_product('1', 29.0)], [_product('1', 29.0)]])
+    watch = _watch(buyer, ['牛奶:30'])
+
+    _check(watch, 3)
+
+    assert [(p['id'], p['price']) for p in buyer.added] == [('1', 29.0)]
+    assert watch.stats()['triggers'] == 1
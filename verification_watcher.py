@@ -0,0 +1,161 @@
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from playwright.async_api import BrowserContext, Page, TimeoutError
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class VerificationWatcher:
+    """Push-based detector for JD verification challenges
+
+    Instead of polling the challenge selectors at fixed points, every page of a
+    watched context runs a MutationObserver that reports challenge state changes
+    to Python through an exposed binding.
+    """
+
+    BINDING_NAME = "__jdVerificationState"
+
+    # Challenge kind -> selector that identifies it
+    CHALLENGE_SELECTORS = {
+        "slide": ".JDJRV-slide-bg",
+        "sms": ".mobile-code",
+        "captcha": ".verify-img",
+        "iframe": 'iframe[src*="verify"]',
+    }
+
+    OBSERVER_SCRIPT = """
+    (() => {
+        if (window.top !== window || window.__jdVerificationWatcher) return;
+        window.__jdVerificationWatcher = true;
+
+        const selectors = %(selectors)s;
+        let reported = null;
+        let scheduled = false;
+
+        const check = () => {
+            scheduled = false;
+            let kind = '';
+            for (const [name, selector] of Object.entries(selectors)) {
+                if (document.querySelector(selector)) {
+                    kind = name;
+                    break;
+                }
+            }
+            // Only talk to Python when the state actually changes
+            if (kind === reported) return;
+            reported = kind;
+            const notify = window[%(binding)s];
+            if (typeof notify === 'function') {
+                notify({ kind: kind, url: location.href });
+            }
+        };
+
+        // Coalesce bursts of DOM mutations into a single check
+        const schedule = () => {
+            if (!scheduled) {
+                scheduled = true;
+                setTimeout(check, 100);
+            }
+        };
+
+        new MutationObserver(schedule).observe(document, { childList: true, subtree: true });
+        document.addEventListener('DOMContentLoaded', check);
+    })();
+    """
+
+    def __init__(self, screenshots_dir: str):
+        self.screenshots_dir = screenshots_dir
+        self.detections = 0
+        # Page -> kind of the challenge currently shown on it
+        self._pending: Dict[Page, str] = {}
+        self._challenge = asyncio.Event()
+        self._cleared = asyncio.Event()
+        self._cleared.set()
+
+    @property
+    def challenge_active(self) -> bool:
+        return bool(self._pending)
+
+    async def install(self, context: BrowserContext):
+        """Expose the state binding and observer script on a context; call before creating pages"""
+        await context.expose_binding(self.BINDING_NAME, self._on_state)
+        await context.add_init_script(self.OBSERVER_SCRIPT % {
+            "selectors": json.dumps(self.CHALLENGE_SELECTORS),
+            "binding": json.dumps(self.BINDING_NAME),
+        })
+        context.on("page", lambda page: page.on("close", self._on_page_closed))
+
+    async def _on_state(self, source: Dict, payload: Dict):
+        """Binding callback invoked by the in-page observer"""
+        page = source.get("page")
+        kind = payload.get("kind") or ""
+
+        if kind:
+            if page in self._pending:
+                return
+            self._pending[page] = kind
+            self.detections += 1
+            self._challenge.set()
+            self._cleared.clear()
+            logger.warning(f"{kind.capitalize()} verification detected at {payload.get('url')}. Please complete it manually.")
+
+            screenshot_path = f"{self.screenshots_dir}/{kind}_verification.png"
+            try:
+                await page.screenshot(path=screenshot_path)
+                logger.info(f"Verification screenshot saved to {screenshot_path}")
+            except Exception as e:
+                logger.warning(f"Could not take verification screenshot: {str(e)}")
+        elif page in self._pending:
+            self._discard(page)
+            logger.info("Verification completed!")
+
+    def _on_page_closed(self, page: Page):
+        if page in self._pending:
+            self._discard(page)
+
+    def _discard(self, page: Page):
+        self._pending.pop(page, None)
+        if not self._pending:
+            self._challenge.clear()
+            self._cleared.set()
+
+    async def wait_until_clear(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no challenge is pending; timeout is in milliseconds"""
+        if not self._pending:
+            return True
+        try:
+            await asyncio.wait_for(self._cleared.wait(), timeout / 1000 if timeout else None)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def guard(self, factory: Callable[[], Awaitable[T]], verification_timeout: float) -> T:
+        """Run an operation, pausing it while a challenge is pending
+
+        If a challenge shows up while the operation is in flight, the operation is
+        cancelled, we wait for the user to solve the challenge and then start it again.
+        The operation must therefore be safe to restart (e.g. a selector wait).
+        """
+        while True:
+            if self._pending:
+                logger.info("Verification challenge pending, pausing until it is completed...")
+                if not await self.wait_until_clear(verification_timeout):
+                    raise TimeoutError("Verification timeout. User did not complete verification in time.")
+
+            operation = asyncio.ensure_future(factory())
+            challenge = asyncio.ensure_future(self._challenge.wait())
+            try:
+                await asyncio.wait({operation, challenge}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                challenge.cancel()
+                if not operation.done():
+                    operation.cancel()
+                    # Let the cancelled operation unwind before retrying it
+                    await asyncio.wait({operation})
+
+            if not operation.cancelled():
+                return operation.result()
+            logger.info("Verification challenge raised mid-operation, operation paused")
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Page, Response
+from loguru import logger
+
+# Runs in a page on the main site so preconnects and cache entries land in the same
+# network partition (top-level site) as the real pages
+WARMUP_SCRIPT = """
+async ({hosts, bundles, budgetMs}) => {
+    const root = document.head || document.documentElement;
+    for (const host of hosts) {
+        for (const [rel, crossOrigin] of [['dns-prefetch', null], ['preconnect', null], ['preconnect', 'anonymous']]) {
+            const link = document.createElement('link');
+            link.rel = rel;
+            link.href = host;
+            if (crossOrigin) link.crossOrigin = crossOrigin;
+            root.appendChild(link);
+        }
+    }
+    let primed = 0, failed = 0;
+    const fetches = bundles.map(url =>
+        fetch(url, {mode: 'no-cors', credentials: 'include'}).then(() => { primed++; }, () => { failed++; })
+    );
+    const timedOut = await Promise.race([
+        Promise.allSettled(fetches).then(() => false),
+        new Promise(resolve => setTimeout(() => resolve(true), budgetMs)),
+    ]);
+    return {primed, failed, timedOut};
+}
+"""
+
+# Distinct bundle URLs counted per run, bounds memory on pages with cache-busting URLs
+_MAX_TRACKED_BUNDLES = 1000
+# Bundle URLs and first-operation samples kept in the stats file
+_MAX_STORED_BUNDLES = 200
+_MAX_STORED_SAMPLES = 20
+
+
+class WarmUp:
+    """Preconnects to the hosts the flow needs and primes the HTTP cache with shared bundles
+
+    Bundles are learned: every context reports the JS/CSS it loads and the most
+    frequently used ones are primed on the next run. The latency of each run's first
+    operations is stored per warm/cold run so the report can compare the two.
+    """
+
+    def __init__(self, path: str, page_url: str, hosts: Iterable[str], budget: float, max_bundles: int,
+                 rate_limiter=None):
+        self.path = path
+        # The page load counts against its host's request budget like any other navigation
+        self.rate_limiter = rate_limiter
+        self.page_url = page_url
+        self.hosts = list(hosts)
+        self.budget = budget
+        self.max_bundles = max_bundles
+        self.bundle_counts: Counter = Counter()
+        self.first_operations: Dict[str, Dict[str, List[float]]] = {"warm": {}, "cold": {}}
+        self._seen: Counter = Counter()
+        self.started = False
+        self.result: Optional[Dict] = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.bundle_counts = Counter(data.get("bundles", {}))
+            for mode in ("warm", "cold"):
+                self.first_operations[mode] = data.get("first_operations", {}).get(mode, {})
+        except Exception as e:
+            logger.warning(f"Could not load warm-up stats: {str(e)}")
+
+    def observe(self, context: BrowserContext):
+        """Count the static bundles context loads"""
+        context.on("response", self._on_response)
+
+    def _on_response(self, response: Response):
+        request = response.request
+        if request.resource_type not in ("script", "stylesheet") or request.method != "GET" or response.status != 200:
+            return
+        if request.url in self._seen or len(self._seen) < _MAX_TRACKED_BUNDLES:
+            self._seen[request.url] += 1
+
+    def bundles(self) -> List[str]:
+        return [url for url, _ in self.bundle_counts.most_common(self.max_bundles)]
+
+    async def run(self, page: Page):
+        """Preconnect and prime within the time budget, using (and closing) page"""
+        self.started = True
+        start = time.perf_counter()
+        bundles = self.bundles()
+        hosts = sorted(set(self.hosts) | {f"{urlsplit(url).scheme}://{urlsplit(url).netloc}" for url in bundles})
+        result = {"hosts": len(hosts), "bundles": len(bundles), "primed": 0, "failed": 0, "timed_out": False}
+        try:
+            budget_ms = self.budget * 1000
+            if self.rate_limiter:
+                await asyncio.wait_for(self.rate_limiter.acquire(self.page_url), self.budget)
+            await page.goto(self.page_url, wait_until="commit",
+                            timeout=max(1.0, budget_ms - (time.perf_counter() - start) * 1000))
+            remaining_ms = max(0.0, budget_ms - (time.perf_counter() - start) * 1000)
+            outcome = await page.evaluate(WARMUP_SCRIPT, {"hosts": hosts, "bundles": bundles, "budgetMs": remaining_ms})
+            result.update(primed=outcome["primed"], failed=outcome["failed"], timed_out=outcome["timedOut"])
+        except Exception as e:
+            result["error"] = str(e)
+            logger.warning(f"Warm-up incomplete: {str(e)}")
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        self.result = result
+        logger.info(f"Warm-up: {len(hosts)} hosts preconnected, {result['primed']}/{len(bundles)} bundles primed in {result['seconds']}s")
+
+    def _record_first_operations(self, first_timings: Dict[str, float]):
+        samples = self.first_operations["warm" if self.started else "cold"]
+        for name, seconds in first_timings.items():
+            if name.startswith("operation."):
+                history = samples.setdefault(name.split(".", 1)[1], [])
+                history.append(round(seconds * 1000, 1))
+                del history[:-_MAX_STORED_SAMPLES]
+
+    def save(self, first_timings: Dict[str, float]):
+        """Merge this run's bundles and first-operation latencies into the stats file"""
+        self._record_first_operations(first_timings)
+        # Older runs count half, so bundles that are no longer used fade out
+        counts = Counter({url: count / 2 for url, count in self.bundle_counts.items()})
+        counts.update(self._seen)
+        data = {
+            "bundles": dict(counts.most_common(_MAX_STORED_BUNDLES)),
+            "first_operations": self.first_operations,
+        }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save warm-up stats: {str(e)}")
+
+    def report(self, first_timings: Dict[str, float]) -> Dict:
+        """This run's warm-up and first-operation latency against stored warm and cold runs"""
+        comparison = {}
+        operations = {name.split(".", 1)[1] for name in first_timings if name.startswith("operation.")}
+        operations |= set(self.first_operations["warm"]) | set(self.first_operations["cold"])
+        for operation in sorted(operations):
+            seconds = first_timings.get(f"operation.{operation}")
+            comparison[operation] = {
+                "this_run_ms": round(seconds * 1000, 1) if seconds is not None else None,
+                "warm_median_ms": _median(self.first_operations["warm"].get(operation)),
+                "cold_median_ms": _median(self.first_operations["cold"].get(operation)),
+            }
+        return {
+            "warm": self.started,
+            "result": self.result,
+            "bundles_seen": len(self._seen),
+            "first_operations": comparison,
+        }
+
+
+def _median(samples: Optional[List[float]]) -> Optional[float]:
+    return round(statistics.median(samples), 1) if samples else None
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from deadlines import DeadlineExceeded
+
+
+def record_hash(records: Any) -> str:
+    """Fingerprint of extracted records, key order independent"""
+    return hashlib.sha1(json.dumps(records, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class RequestBudget:
+    """Token bucket shared by every watch check, in requests per minute"""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, per_minute)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self.spent = 0.0
+        self.waited_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def spend(self, cost: float):
+        """Wait until cost requests are available and take them"""
+        # A check costing more than the whole bucket waits for a full bucket
+        cost = min(cost, self.capacity)
+        self._refill()
+        while self._tokens < cost:
+            wait = (cost - self._tokens) / self.rate
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+            self._refill()
+        self._tokens -= cost
+        self.spent += cost
+
+
+class WatchItem:
+    """A SKU or keyword under watch, with its own polling interval"""
+
+    def __init__(self, kind: str, value: str, interval: float, target_price: Optional[float] = None):
+        self.kind = kind
+        self.value = value
+        self.interval = interval
+        self.target_price = target_price
+        self.next_due = 0.0
+        # Fingerprint of the last SKU lookup; keywords are compared by the buyer's SearchIndex
+        self.digest: Optional[str] = None
+        self.checks = 0
+        self.changes = 0
+
+    def schedule(self, changed: bool, min_interval: float, max_interval: float):
+        """Poll faster while the item is moving, back off while it is stable"""
+        if changed:
+            self.interval = max(min_interval, self.interval / 2)
+        else:
+            self.interval = min(max_interval, self.interval * 1.5)
+        # Jitter keeps items that share an interval from polling in lockstep
+        self.next_due = time.monotonic() + self.interval * random.uniform(0.9, 1.1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "value": self.value,
+            "interval": round(self.interval, 1),
+            "target_price": self.target_price,
+            "checks": self.checks,
+            "changes": self.changes,
+        }
+
+
+def parse_watch_entries(entries: List[str]) -> List[WatchItem]:
+    """SKUs and keywords, each optionally with a target price (100012043978:59.9, 牛奶:30)"""
+    return [_parse_entry(entry.strip()) for entry in entries if entry.strip()]
+
+
+def _parse_entry(entry: str) -> WatchItem:
+    value, _, target = entry.rpartition(':')
+    try:
+        target_price = float(target) if value else None
+    except ValueError:
+        target_price = None
+    if target_price is None:
+        value = entry
+    return WatchItem('sku' if value.isdigit() else 'keyword', value, 0, target_price)
+
+
+class Watchlist:
+    """Re-checks watched SKUs and keywords and adds an item to the cart when its rule fires
+
+    SKUs are checked together through the batched price/stock lookup, keywords
+    through a search. Every check is paid for from a global request budget. A change
+    is a different hash of a SKU's lookup record, or a keyword's search diff with
+    new, re-priced or delisted products; it halves the item's polling interval, a
+    check without change stretches it. The rule: in stock (or unknown)
+    and price at or below the item's target price, else max_price.
+    """
+
+    def __init__(self, buyer, items: List[WatchItem], strategy: str, item_url: str, interval: float, min_interval: float,
+                 max_interval: float, requests_per_minute: float, search_cost: float, max_price: Optional[float],
+                 max_purchases: int):
+        self.buyer = buyer
+        self.strategy = strategy
+        self.item_url = item_url
+        self.items = items
+        for item in items:
+            item.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = RequestBudget(requests_per_minute)
+        self.search_cost = search_cost
+        self.max_price = max_price
+        self.max_purchases = max_purchases
+        self.purchased: List[Dict] = []
+        self.triggers = 0
+        self._attempted: set = set()
+
+    def _rule(self, price: Optional[float], in_stock: Optional[bool], target_price: Optional[float]) -> bool:
+        limit = target_price if target_price is not None else self.max_price
+        return price is not None and limit is not None and price <= limit and in_stock is not False
+
+    async def run(self, duration: float = 0):
+        """Watch until max_purchases items were added to the cart or duration seconds passed (0 = forever)"""
+        if not self.items:
+            logger.warning("Watchlist is empty, nothing to watch")
+            return
+        logger.info(f"Watching {len(self.items)} items ({', '.join(item.value for item in self.items)})")
+        end = time.monotonic() + duration if duration else None
+        while len(self.purchased) < self.max_purchases:
+            now = time.monotonic()
+            if end and now >= end:
+                break
+            due = [item for item in self.items if item.next_due <= now]
+            if not due:
+                wake = min(item.next_due for item in self.items)
+                await asyncio.sleep(max(0.0, min(wake, end or wake) - now))
+                continue
+            sku_items = [item for item in due if item.kind == 'sku']
+            if sku_items:
+                await self._check_skus(sku_items)
+            for item in due:
+                if item.kind == 'keyword' and len(self.purchased) < self.max_purchases:
+                    await self._check_keyword(item)
+        logger.info(f"Watch finished: {len(self.purchased)} item(s) added to cart")
+
+    async def _check_skus(self, items: List[WatchItem]):
+        lookup = self.buyer.sku_lookup
+        await self.budget.spend(2 * math.ceil(len(items) / lookup.chunk_size))
+        results = await self.buyer.lookup_skus([item.value for item in items])
+        for item in items:
+            record = results.get(item.value, {})
+            changed = self._observe(item, record)
+            if self._rule(record.get('price'), record.get('in_stock'), item.target_price):
+                await self._trigger({
+                    'id': item.value,
+                    'name': f"SKU {item.value}",
+                    'price': record['price'],
+                    'link': self.item_url.format(sku=item.value),
+                })
+            item.schedule(changed, self.min_interval, self.max_interval)
+
+    async def _check_keyword(self, item: WatchItem):
+        await self.budget.spend(self.search_cost)
+        try:
+            delta = await self.buyer.search_changes(item.value)
+        except DeadlineExceeded as e:
+            # One slow search does not end the watch
+            logger.warning(f"Search for {item.value} ran out of time in {e.active}")
+            delta = None
+        item.checks += 1
+        if delta is None:
+            # A failed or empty search says nothing about the listings
+            item.schedule(False, self.min_interval, self.max_interval)
+            return
+        changed = not delta.first and bool(delta)
+        if changed:
+            item.changes += 1
+            logger.info(f"Change detected for {item.kind} {item.value}")
+        # New products or new prices that satisfy the rule (search_changes already applied max_price)
+        candidates = [p for p in delta.candidates if self._rule(p['price'], None, item.target_price)]
+        if candidates:
+            product = self.buyer.select_product_by_strategy(candidates, self.strategy)
+            await self._trigger(product)
+        item.schedule(changed, self.min_interval, self.max_interval)
+
+    def _observe(self, item: WatchItem, records: Any) -> bool:
+        item.checks += 1
+        digest = record_hash(records)
+        changed = item.digest is not None and digest != item.digest
+        if changed:
+            item.changes += 1
+            logger.info(f"Change detected for {item.kind} {item.value}")
+        item.digest = digest
+        return changed
+
+    async def _trigger(self, product: Dict):
+        key = (product['id'], product['price'])
+        if key in self._attempted or len(self.purchased) >= self.max_purchases:
+            return
+        self._attempted.add(key)
+        self.triggers += 1
+        logger.info(f"Watch rule fired for {product['name']} at ¥{product['price']}, adding to cart")
+        try:
+            added = await self.buyer.add_to_cart(product)
+        except DeadlineExceeded as e:
+            logger.warning(f"Adding {product['name']} to the cart ran out of time in {e.active}")
+            added = False
+        if added:
+            self.purchased.append(product)
+
+    def stats(self) -> Dict:
+        return {
+            "items": [item.to_dict() for item in self.items],
+            "triggers": self.triggers,
+            "added_to_cart": [{"id": p['id'], "name": p['name'], "price": p['price']} for p in self.purchased],
+            "budget_spent": round(self.budget.spent, 1),
+            "budget_waited_seconds": round(self.budget.waited_seconds, 1),
+        }